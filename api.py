@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# 🌐 候補者データの JSON API（ASGI。フレームワークなし）
+#
+# 埋め込み用の読み取り専用 API。Streamlit を通さず、アプリと同じリポジトリ・索引・正規化
+# （_normalize_stance / _norm_region / search.normalize）で答える。
+#
+#   GET /candidates?party=&policy=&region=&q=&offset=&limit=   一覧（要約）
+#   GET /candidates/{id}                                       1 件（正規化済みスタンスつき）
+#   GET /search?q=&limit=                                      検索（関連度順の要約）
+#   GET /compare?ids=1,2,3                                     比較表（公約・争点ごとのスタンス）
+#
+# - 応答は (データ版, パス, クエリ, gzip 可否) をキーに LRU に置き、2 回目以降は組み立てない
+# - ETag は本文のハッシュ（弱い ETag）。If-None-Match が一致すれば 304 で本文を送らない
+#   データが差し替わっても中身が同じ応答は ETag が変わらないので、埋め込み側のキャッシュが生きる
+#   （そのためデータ版は本文に入れず X-Data-Version ヘッダで返す。本文に版を持つのは / だけ）
+# - Accept-Encoding に gzip があり、本文が GZIP_MIN_BYTES 以上なら圧縮して返す
+# - データは test.py と同じ CANDIDATES_CATALOG / CANDIDATES_DB / CANDIDATES_PATH を見て、ファイルが変われば差し替わる
+#
+#   python api.py [--host 0.0.0.0] [--port 8600]     # uvicorn が必要（pip install uvicorn）
+
+from __future__ import annotations
+import gzip, hashlib, json, os, sys
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs
+from catalog import _norm_region
+from catalog_file import catalog_version
+from loader import source_path
+from render_cache import RenderCache
+from repository import ALL, open_repository
+from snapshot import Snapshot, SnapshotStore, file_version
+from stances import _normalize_stance, topic_order_key
+
+API_CACHE_SIZE = int(os.environ.get("API_CACHE_SIZE", "8192"))
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_COMPARE = 10
+GZIP_MIN_BYTES = 1024
+CACHE_CONTROL = "public, max-age=30"   # データは差し替わりうるので短め。以降は ETag で再検証
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# --------------------------------
+# 応答の中身
+# --------------------------------
+def _summary(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": c["id"], "name": c.get("name",""), "party": c.get("party","無所属"),
+            "region": _norm_region(c.get("region","")), "keyPolicy": c.get("keyPolicy","")}
+
+def _stances(c: Dict[str, Any]) -> Dict[str, str]:
+    comps = c.get("comparisons") or {}
+    return {t: _normalize_stance(comps[t]) for t in sorted(comps, key=topic_order_key)}
+
+def _detail(c: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(c, region=_norm_region(c.get("region","")), stances=_stances(c))
+
+def _int(qs: Dict[str, List[str]], name: str, default: int, lo: int = 0, hi: int | None = None) -> int:
+    raw = qs.get(name, [None])[0]
+    if raw in (None, ""): return default
+    try:
+        v = int(raw)
+    except ValueError:
+        raise ApiError(400, f"{name} は整数で指定してください")
+    return max(lo, v if hi is None else min(v, hi))
+
+def _str(qs: Dict[str, List[str]], name: str) -> str | None:
+    v = qs.get(name, [""])[0].strip()
+    return v or None
+
+
+def handle(snap: Snapshot, path: str, qs: Dict[str, List[str]]) -> Dict[str, Any]:
+    """パスとクエリから応答の dict を作る（見つからなければ ApiError）。"""
+    repo = snap.repo
+    parts = [p for p in path.split("/") if p]
+    if parts == ["candidates"]:
+        offset = _int(qs, "offset", 0)
+        limit = _int(qs, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+        total, items = repo.query(_str(qs, "party") or ALL, _str(qs, "policy") or ALL, _str(qs, "q") or "",
+                                  offset=offset, limit=limit, region=_str(qs, "region"))
+        return {"total": total, "offset": offset, "limit": limit,
+                "items": [_summary(c) for c in items]}
+    if len(parts) == 2 and parts[0] == "candidates":
+        c = repo.get(parts[1])
+        if c is None: raise ApiError(404, f"候補者 {parts[1]} は見つかりません")
+        return _detail(c)
+    if parts == ["search"]:
+        q = _str(qs, "q")
+        if not q: raise ApiError(400, "q を指定してください")
+        total, items = repo.query(ALL, ALL, q, limit=_int(qs, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT))
+        return {"q": q, "total": total, "items": [_summary(c) for c in items]}
+    if parts == ["compare"]:
+        try:
+            ids = list(dict.fromkeys(int(x) for x in ",".join(qs.get("ids", [])).split(",") if x.strip()))
+        except ValueError:
+            raise ApiError(400, "ids は 1,2,3 のように整数をカンマ区切りで指定してください")
+        if not ids: raise ApiError(400, "ids を指定してください")
+        if len(ids) > MAX_COMPARE: raise ApiError(400, f"比較できるのは {MAX_COMPARE} 人までです")
+        cands = repo.get_many(ids)
+        if len(cands) < len(ids):
+            missing = sorted(set(ids) - {c["id"] for c in cands})
+            raise ApiError(404, f"候補者 {', '.join(map(str, missing))} は見つかりません")
+        stances = [_stances(c) for c in cands]
+        topics = sorted({t for s in stances for t in s}, key=topic_order_key)
+        nums = sorted({int(k[7:]) for c in cands for k in c if k.startswith("promise") and k[7:].isdigit()})
+        return {
+            "candidates": [_summary(c) for c in cands],
+            "career": [c.get("career","") for c in cands],
+            "promises": {f"promise{n}": [c.get(f"promise{n}") for c in cands] for n in nums},
+            "stances": {t: [s.get(t) for s in stances] for t in topics},
+        }
+    if not parts:
+        return {"version": snap.version, "candidates": len(repo),
+                "endpoints": ["/candidates", "/candidates/{id}", "/search", "/compare"]}
+    raise ApiError(404, f"{path} はありません")
+
+
+# --------------------------------
+# ASGI
+# --------------------------------
+Response = Tuple[int, bytes, str, bool]   # (ステータス, 本文, ETag, gzip 済みか)
+
+def _encode(status: int, payload: Dict[str, Any], gzip_ok: bool) -> Response:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+    if gzip_ok and len(body) >= GZIP_MIN_BYTES:
+        return status, gzip.compress(body, compresslevel=6, mtime=0), etag, True
+    return status, body, etag, False
+
+def _etag_matches(header: bytes, etag: str) -> bool:
+    tags = {t.strip() for t in header.decode("latin-1").split(",")}
+    # 弱い比較（W/ の有無は問わない）
+    return "*" in tags or etag in tags or etag[2:] in tags
+
+
+class CandidateApi:
+    def __init__(self, store: SnapshotStore, cache_size: int = API_CACHE_SIZE):
+        self.store = store
+        self.cache = RenderCache(cache_size)
+        store.on_swap(lambda old, new: self.cache.clear())
+
+    def respond(self, path: str, query: bytes, gzip_ok: bool, snap: Snapshot | None = None) -> Response:
+        snap = snap or self.store.current()
+        key = (snap.version, path, query, gzip_ok)
+
+        def build() -> Response:
+            try:
+                return _encode(200, handle(snap, path, parse_qs(query.decode("utf-8", "replace"))), gzip_ok)
+            except ApiError as e:
+                return _encode(e.status, {"error": str(e)}, gzip_ok)
+        return self.cache.get_or_build(key, build)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                msg = await receive()
+                if msg["type"] == "lifespan.startup": await send({"type": "lifespan.startup.complete"})
+                elif msg["type"] == "lifespan.shutdown":
+                    self.store.stop()
+                    await send({"type": "lifespan.shutdown.complete"}); return
+        if scope["type"] != "http": return
+
+        headers = dict(scope["headers"])
+        method = scope["method"]
+        snap = self.store.current()   # 本文とヘッダの版を揃える
+        if method not in ("GET", "HEAD"):
+            status, body, etag, gz = _encode(405, {"error": "GET のみ対応しています"}, False)
+        else:
+            status, body, etag, gz = self.respond(scope["path"], scope["query_string"],
+                                                  b"gzip" in headers.get(b"accept-encoding", b""), snap)
+        out = [(b"content-type", b"application/json; charset=utf-8"), (b"etag", etag.encode()),
+               (b"x-data-version", snap.version.encode()), (b"vary", b"Accept-Encoding"),
+               (b"access-control-allow-origin", b"*"), (b"access-control-expose-headers", b"X-Data-Version, ETag")]
+        if status == 405: out.append((b"allow", b"GET, HEAD"))
+        if status == 200:
+            out.append((b"cache-control", CACHE_CONTROL.encode()))
+            inm = headers.get(b"if-none-match")
+            if inm is not None and _etag_matches(inm, etag):
+                status, body = 304, b""
+        if gz and body: out.append((b"content-encoding", b"gzip"))
+        out.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": out})
+        await send({"type": "http.response.body", "body": b"" if method == "HEAD" else body})
+
+
+def create_app(db: str | None = None, path: str | None = None, mapped: str | None = None) -> CandidateApi:
+    db = db or os.environ.get("CANDIDATES_DB") or None
+    path = path or os.environ.get("CANDIDATES_PATH") or None
+    mapped = mapped or os.environ.get("CANDIDATES_CATALOG") or None
+    store = SnapshotStore(mapped or db or source_path(path), lambda: open_repository(db, path, mapped),
+                          version=catalog_version if mapped else file_version)
+    return CandidateApi(store.start())
+
+
+# `uvicorn api:app` 用。データは最初のリクエスト（または lifespan）で読み込む
+_app: CandidateApi | None = None
+
+async def app(scope, receive, send):
+    global _app
+    if _app is None: _app = create_app()
+    await _app(scope, receive, send)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="候補者データの JSON API")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8600)
+    args = ap.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("API の起動には uvicorn が必要です（pip install uvicorn）")
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# 🖼 画像アセットの静的配信（content-hash 付き URL）
+#
+# - 画像を static/img/ に「名前.ハッシュ.拡張子」でコピーし、HTML には短い URL だけを載せる
+# - 中身が変わればハッシュ（=URL）も変わるので、ブラウザ/CDN に長期キャッシュさせてよい
+# - Streamlit の静的配信（.streamlit/config.toml の server.enableStaticServing）で app/static/ 以下に公開
+# - ASSET_BASE_URL を指定すると CDN / 別サーバ（`python assets.py serve`）の URL を使う
+
+from __future__ import annotations
+import hashlib, json, os, shutil, sys
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+ASSET_SUBDIR = "img"
+MANIFEST_NAME = "manifest.json"
+
+# Streamlit 組み込みの静的配信の URL（ページからの相対パス）
+STREAMLIT_STATIC_PREFIX = "app/static"
+# 例: "https://cdn.example.jp/senkyo" / "http://localhost:8502"
+ASSET_BASE_URL = os.environ.get("ASSET_BASE_URL", "").rstrip("/")
+
+# ハッシュ付きファイルは中身が変わらないので 1 年キャッシュ
+CACHE_CONTROL_IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def content_hash(path: str | Path, n: int = 10) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:n]
+
+def hashed_name(path: str | Path) -> str:
+    p = Path(path)
+    return f"{p.stem}.{content_hash(p)}{p.suffix.lower()}"
+
+def publish_file(path: str, static_dir: Path = STATIC_DIR) -> str:
+    """1ファイルを公開し、static/ からの相対パスを返す（元ファイルが無ければ ""）。"""
+    src = Path(path)
+    if not src.exists(): return ""
+    out_dir = static_dir / ASSET_SUBDIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    name = hashed_name(src)
+    dst = out_dir / name
+    if not dst.exists():
+        # 配信中に中途半端なファイルが見えないよう、一時ファイル経由で置き換える
+        tmp = dst.with_name(f".{name}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    return f"{ASSET_SUBDIR}/{name}"
+
+def publish_bytes(name: str, data: bytes, subdir: str = ASSET_SUBDIR, static_dir: Path = STATIC_DIR) -> str:
+    """生成物（CSS など）を「名前.ハッシュ.拡張子」で公開し、static/ からの相対パスを返す。"""
+    stem, ext = os.path.splitext(name)
+    hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+    out_dir = static_dir / subdir
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dst = out_dir / hashed
+    if not dst.exists():
+        tmp = dst.with_name(f".{hashed}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, dst)
+    return f"{subdir}/{hashed}"
+
+def publish(files: Iterable[str], static_dir: Path = STATIC_DIR) -> Dict[str, str]:
+    """まとめて公開し、{元ファイル名: 相対パス} を manifest.json にも書き出す。"""
+    manifest = {}
+    for fn in files:
+        rel = publish_file(fn, static_dir)
+        if rel: manifest[fn] = rel
+    path = static_dir / MANIFEST_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest
+
+def asset_url(rel: str) -> str:
+    base = ASSET_BASE_URL or STREAMLIT_STATIC_PREFIX
+    return f"{base}/{rel}"
+
+
+# --------------------------------
+# 長期キャッシュヘッダ付きの簡易静的サーバ
+# --------------------------------
+class ImmutableAssetHandler(SimpleHTTPRequestHandler):
+    def end_headers(self):
+        if self.path.split("?", 1)[0].endswith(MANIFEST_NAME):
+            self.send_header("Cache-Control", "no-cache")
+        else:
+            self.send_header("Cache-Control", CACHE_CONTROL_IMMUTABLE)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        super().end_headers()
+
+def serve(port: int = 8502, static_dir: Path = STATIC_DIR):
+    handler = partial(ImmutableAssetHandler, directory=str(static_dir))
+    with ThreadingHTTPServer(("", port), handler) as httpd:
+        print(f"🚀 {static_dir} を http://localhost:{port}/ で配信中（ASSET_BASE_URL に指定してください）")
+        httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    # python assets.py publish *.png  /  python assets.py serve [port]
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "publish"
+    if cmd == "serve":
+        serve(int(sys.argv[2]) if len(sys.argv) > 2 else 8502)
+    else:
+        files = sys.argv[2:] or sorted(str(p) for p in Path(".").glob("*.png"))
+        for fn, rel in publish(files).items():
+            print(f"✅ {fn} → {asset_url(rel)}")
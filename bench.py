@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# 🏁 絞り込み・描画のホットパスのベンチマーク（Streamlit を起動せず関数を直接呼ぶ）
+#
+# data.py と同じ形の合成データ（既定 10 / 1k / 100k / 1M 件）を作り、関数ごとに
+# ops/s・p50/p99 レイテンシ・ピークメモリ（tracemalloc）を測って JSON に保存する。
+# 保存した JSON 同士を比べると、コミット間で遅くなった関数がわかる。
+#
+#   python bench.py                                  # → bench-<コミット>.json
+#   python bench.py --scales 10,1k --only card_html,detail_html --min-time 0.2
+#   python bench.py --compare bench-abc1234.json     # 前回より p50 が遅くなったものに ⚠️（あれば終了コード 1）
+#
+# - 合成データの文章（経歴・公約など）は data.py の候補者を使い回す（文字列は共有するので 1M 件でも数 GB に収まる）
+#   名前・地域・政党・重点政策・スタンス（表記ゆれ込み）は乱数で振る。seed が同じなら毎回同じデータになる
+# - 1 回の呼び出しごとに perf_counter_ns で測る。ピークメモリは別に tracemalloc を掛けて数回だけ呼んで測る
+# - catalog_build は件数ぶんの索引づくり 1 回（ピークは RSS の増分）
+#   前の規模の 1 件あたり RSS から見積もって空きメモリに収まらない規模は飛ばす（OOM で全部を失わないように）
+
+from __future__ import annotations
+import argparse, gc, json, os, platform, random, resource, runpy, subprocess, sys, time, tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+from catalog import Catalog
+from frame import compare_table
+from loader import DATA_PY
+from repository import ALL, MemoryRepository, apply_filters, facet_counts
+from stances import STANCE_CANON, TOPIC_ORDER
+import render
+
+DEFAULT_SCALES = "10,1k,100k,1m"
+MIN_TIME = 1.0          # 関数ごとの計測時間（秒）
+MIN_OPS, MAX_OPS = 20, 200_000
+MEMORY_OPS = 20         # tracemalloc を掛けて呼ぶ回数
+SAMPLE = 512            # 描画系で順に回す候補者の数
+COMPARE_N = 5           # 比較表に並べる人数
+REGRESSION = 0.20       # --compare で「遅くなった」とみなす p50 の悪化率（同じコミット同士でも 1 割ほどは揺れる）
+
+SURNAMES = "佐藤 鈴木 高橋 田中 伊藤 渡辺 山本 中村 小林 加藤 吉田 山田 佐々木 山口 松本 井上 木村 林 斎藤 清水".split()
+GIVEN = "太郎 次郎 一郎 健太 大輔 翔 誠 花子 美咲 由美 陽子 直子 さくら 恵 彩香".split()
+PREFS = "東京 大阪 神奈川 愛知 北海道 福岡 埼玉 千葉 兵庫 静岡 広島 宮城".split()
+RAW_STANCES = list(STANCE_CANON)   # 「条件付き賛成」「どちらとも言えない」などの表記ゆれも混ぜる
+
+
+# --------------------------------
+# 合成データ
+# --------------------------------
+def parse_scale(s: str) -> int:
+    s = s.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(float(s[:-1] if mult > 1 else s) * mult)
+
+def synth_candidates(n: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    base = runpy.run_path(DATA_PY)["candidates"]
+    parties = sorted({c["party"] for c in base})
+    policies = sorted({c["keyPolicy"] for c in base})
+    rng = random.Random(seed)
+    for i in range(1, n + 1):
+        sur, given = rng.choice(SURNAMES), rng.choice(GIVEN)
+        c = dict(base[rng.randrange(len(base))])
+        c.update(id=i, name=sur + given, initial=sur[0], age=rng.randint(25, 80),
+                 region=f"{rng.choice(PREFS)}{rng.randint(1, 25)}区",
+                 party=rng.choice(parties), keyPolicy=rng.choice(policies),
+                 comparisons={t: rng.choice(RAW_STANCES) for t in TOPIC_ORDER if rng.random() < 0.9})
+        yield c
+
+
+# --------------------------------
+# 計測
+# --------------------------------
+def _percentile(sorted_ns: List[int], q: float) -> float:
+    return sorted_ns[min(len(sorted_ns) - 1, int(q * len(sorted_ns)))] / 1000
+
+def measure(fn: Callable, args: Sequence[tuple], min_time: float = MIN_TIME) -> Dict[str, Any]:
+    """args を順に回して fn を呼び、ops/s・p50/p99（µs）・ピークメモリ（KiB）を返す。"""
+    for a in args[:3]: fn(*a)   # 準備運動（遅延初期化・キャッシュの作り置きを計測から外す）
+    lat: List[int] = []
+    clock = time.perf_counter_ns
+    deadline = clock() + int(min_time * 1e9)
+    i = 0
+    while len(lat) < MAX_OPS and (len(lat) < MIN_OPS or clock() < deadline):
+        a = args[i % len(args)]; i += 1
+        t = clock(); fn(*a); lat.append(clock() - t)
+    lat.sort()
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for k in range(MEMORY_OPS): fn(*args[k % len(args)])
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return {
+        "ops": len(lat),
+        "ops_per_s": round(len(lat) / (sum(lat) / 1e9), 1),
+        "p50_us": round(_percentile(lat, 0.50), 2),
+        "p99_us": round(_percentile(lat, 0.99), 2),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+def _maxrss_kib() -> int:
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r // 1024 if sys.platform == "darwin" else r   # macOS はバイト、Linux は KiB
+
+def _mem_available_kib() -> int | None:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"): return int(line.split()[1])
+    except OSError:
+        pass
+    return None   # Linux 以外は見積もらない
+
+
+def benchmarks(cat: Catalog, seed: int = 0) -> Dict[str, Tuple[Callable, List[tuple]]]:
+    """{名前: (関数, 引数の並び)}。引数は条件や候補者を散らして、同じ入力ばかりにならないようにする。"""
+    rng = random.Random(seed)
+    repo = MemoryRepository(cat)
+    sample = [cat.candidates[rng.randrange(len(cat.candidates))] for _ in range(SAMPLE)]
+    party, policy = cat.party_options[0], cat.policy_options[0]
+    filters = [(ALL, ALL, ""), (party, ALL, ""), (ALL, policy, ""), (ALL, ALL, "田中"),
+               (party, ALL, "東京"), (party, policy, ""), (ALL, ALL, "原発")]
+
+    ids = [c["id"] for c in cat.candidates]
+    picks = [rng.sample(ids, min(COMPARE_N, len(ids))) for _ in range(64)]
+    labels = {cid: f"{cat.by_id[cid]['name']}#{cid}" for p in picks for cid in p}
+
+    def compare(ids_: List[int]):
+        return compare_table(repo.compare_frame(ids_), ids_, [labels[i] for i in ids_],
+                             career=True, promises=True, comparisons=True)
+
+    return {
+        "apply_filters": (lambda *f: apply_filters(cat, *f), filters),
+        "facet_counts":  (lambda *f: facet_counts(cat, *f), filters),
+        "card_html":     (render.candidate_card_html, [(c, cat.photos[c["id"]]) for c in sample]),
+        "detail_html":   (render.detail_html, [(c, cat.photos[c["id"]]) for c in sample]),
+        # 顔写真の割り当て（assign_photo）から <picture> / スプライトのタグまで
+        "photo_html":    (lambda c: render._photo_html(c, 120, sprite=True, lazy=True), [(c,) for c in sample]),
+        "compare_table": (compare, [(p,) for p in picks]),
+    }
+
+
+def run_scale(n: int, only: set | None, min_time: float, seed: int) -> List[Dict[str, Any]]:
+    rss0 = _maxrss_kib()
+    t = time.perf_counter()
+    cat = Catalog.build(synth_candidates(n, seed))
+    build_s = time.perf_counter() - t
+    results = [{"scale": n, "bench": "catalog_build", "ops": 1, "ops_per_s": round(1 / build_s, 3),
+                "p50_us": round(build_s * 1e6, 1), "p99_us": round(build_s * 1e6, 1),
+                "peak_rss_kib": _maxrss_kib() - rss0}]
+    print(f"📦 {n:,} 件: カタログ {build_s:.2f} 秒")
+    for name, (fn, args) in benchmarks(cat, seed).items():
+        if only and name not in only: continue
+        r = {"scale": n, "bench": name, **measure(fn, args, min_time)}
+        print(f"  {name:<14} {r['ops_per_s']:>12,.1f} ops/s  p50 {r['p50_us']:>10,.1f} µs  "
+              f"p99 {r['p99_us']:>10,.1f} µs  peak {r['peak_kib']:>9,.1f} KiB")
+        results.append(r)
+    del cat; gc.collect()
+    return results
+
+
+# --------------------------------
+# 保存・比較
+# --------------------------------
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+def metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+        "scales": args.scales, "min_time": args.min_time, "seed": args.seed, "image_mode": render.IMAGE_MODE,
+    }
+
+def compare_results(old: Dict[str, Any], new: Dict[str, Any], threshold: float = REGRESSION) -> int:
+    """前回の結果と比べて表にする。遅くなった件数を返す。
+
+    判定は外れ値に強い p50 で行う（ops/s は平均なので GC などの揺れを拾いやすい）。
+    1 回しか測らない catalog_build は表に出すだけで判定しない。
+    """
+    before = {(r["scale"], r["bench"]): r for r in old["results"]}
+    print(f"\n🔍 {old['meta'].get('commit')} → {new['meta'].get('commit')}"
+          f"（× は p50 の速さの比で 1 より大きければ速くなった。p50 が {threshold:.0%} 以上悪化したものに ⚠️）")
+    slower = 0
+    for r in new["results"]:
+        o = before.get((r["scale"], r["bench"]))
+        if not o or "skipped" in r or "skipped" in o: continue
+        ratio = o["p50_us"] / r["p50_us"] if r["p50_us"] else float("inf")
+        mark = "⚠️" if r["ops"] >= MIN_OPS and ratio < 1 / (1 + threshold) else "  "
+        slower += mark != "  "
+        print(f"{mark} {r['scale']:>9,} {r['bench']:<14} p50 {o['p50_us']:>10,.1f} → {r['p50_us']:>10,.1f} µs"
+              f"  ×{ratio:.2f}  p99 {o['p99_us']:,.1f} → {r['p99_us']:,.1f} µs")
+    return slower
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="絞り込み・描画のホットパスのベンチマーク")
+    ap.add_argument("--scales", default=DEFAULT_SCALES, help=f"件数（カンマ区切り、k/m 可。既定 {DEFAULT_SCALES}）")
+    ap.add_argument("--only", default="", help="測る関数（カンマ区切り。catalog_build は常に測る）")
+    ap.add_argument("--min-time", type=float, default=MIN_TIME, help="関数ごとの計測時間（秒）")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-o", "--out", help="結果の JSON（既定 bench-<コミット>.json）")
+    ap.add_argument("--compare", metavar="OLD_JSON", help="前回の結果と比べる")
+    ap.add_argument("--threshold", type=float, default=REGRESSION, help=f"遅くなったとみなす p50 の悪化率（既定 {REGRESSION}）")
+    args = ap.parse_args()
+
+    meta = metadata(args)
+    only = {s.strip() for s in args.only.split(",") if s.strip()} or None
+    results: List[Dict[str, Any]] = []
+    kib_per_cand = 0.0
+    for n in sorted(parse_scale(s) for s in args.scales.split(",")):
+        need, avail = kib_per_cand * n, _mem_available_kib()
+        if avail and need > avail * 0.9:
+            print(f"⏭ {n:,} 件: 約 {need / 2**20:.1f} GiB 要る見込みで空き {avail / 2**20:.1f} GiB に収まらないので飛ばします")
+            results.append({"scale": n, "bench": "catalog_build", "skipped": f"needs ~{need / 2**20:.1f} GiB"})
+            continue
+        rs = run_scale(n, only, args.min_time, args.seed)
+        if n >= 1000: kib_per_cand = max(kib_per_cand, rs[0]["peak_rss_kib"] / n)
+        results += rs
+
+    report = {"meta": meta, "results": results}
+    out = args.out or f"bench-{meta['commit']}{'-dirty' if meta['dirty'] else ''}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f: old = json.load(f)
+        sys.exit(1 if compare_results(old, report, args.threshold) else 0)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# 📇 候補者カタログ（候補者データから一度だけ作る読み取り専用の索引）
+#
+# Streamlit は操作のたびにスクリプトを頭から実行し直すので、
+# 政党・政策・地域ごとの ID 一覧や選択肢は st.cache_resource でプロセスに 1 つだけ作り、
+# 各 rerun では辞書を引くだけにする。
+# 候補者は records.CandidateRecord（__slots__ の省メモリ表現。dict と同じように読める）で持つ。
+
+from __future__ import annotations
+import re, unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+from facets import FacetIndex
+from photos import assign_photo
+from records import compact
+from render_cache import record_digest
+from search import SearchIndex
+
+# ---------- 地域（region）: 正規化 & 多数派検出 ----------
+def _norm_region(s: str) -> str:
+    s = unicodedata.normalize("NFKC", s or "")
+    s = re.sub(r"\s+", "", s)
+    s = s.replace("東京都", "東京")
+    return s
+
+def _majority(cnt: Counter):
+    if not cnt: return None, 0
+    top, n_top = cnt.most_common(1)[0]
+    others = sum(cnt.values()) - n_top
+    return top, others
+
+
+def candidate_label(c: Dict[str, Any]) -> str:
+    return f"{c.get('name','')}（{c.get('party','無所属')}）"
+
+def _freeze(index: Dict[Any, List[int]]) -> Mapping[Any, Tuple[int, ...]]:
+    # ID 一覧は昇順で持つ
+    return MappingProxyType({k: tuple(sorted(v)) for k, v in index.items()})
+
+
+@dataclass(frozen=True)
+class Catalog:
+    candidates: Tuple[Dict[str, Any], ...]         # 中身は CandidateRecord（Mapping）
+    by_id: Mapping[int, Dict[str, Any]]
+    digests: Mapping[int, str]                     # id → 内容ハッシュ（描画キャッシュのキー）
+    photos: Mapping[int, str]                      # id → 顔写真ファイル（photos.assign_photo を引き済み）
+    ids_by_party: Mapping[str, Tuple[int, ...]]
+    ids_by_policy: Mapping[str, Tuple[int, ...]]
+    ids_by_region: Mapping[str, Tuple[int, ...]]   # キーは _norm_region 済み
+    party_options: Tuple[str, ...]
+    policy_options: Tuple[str, ...]
+    region_options: Tuple[str, ...]
+    labels: Tuple[str, ...]                        # 比較ページの選択肢
+    label_to_id: Mapping[str, int]
+    region: str | None                             # 多数派の地域
+    region_others: int                             # それ以外の表記の件数
+    search: SearchIndex                            # 名前・政党・地域・公約などの全文検索
+    facets: FacetIndex                             # 政党・政策・地域・スタンスのビットマップ
+
+    @classmethod
+    def build(cls, candidates: Iterable[Dict[str, Any]]) -> "Catalog":
+        """候補者を 1 回なめるだけで全索引を作る（loader からのストリームもそのまま渡せる）。"""
+        cands: List[Dict[str, Any]] = []
+        by_id: Dict[int, Dict[str, Any]] = {}
+        digests: Dict[int, str] = {}
+        photos: Dict[int, str] = {}
+        by_party: Dict[str, List[int]] = {}
+        by_policy: Dict[str, List[int]] = {}
+        by_region: Dict[str, List[int]] = {}
+        labels: List[str] = []
+        label_to_id: Dict[str, int] = {}
+        regions: Counter = Counter()
+        facets = FacetIndex()
+        search = SearchIndex()
+        for c in candidates:
+            cid = c["id"]
+            # 索引づくりは元の dict で行い、持ち続けるのは詰め直したレコードだけ
+            rec = compact(c)
+            cands.append(rec)
+            by_id[cid] = rec
+            digests[cid] = record_digest(c)
+            photos[cid] = assign_photo(c)
+            region = _norm_region(c.get("region",""))
+            by_party.setdefault(c.get("party","無所属"), []).append(cid)
+            if c.get("keyPolicy"): by_policy.setdefault(c["keyPolicy"], []).append(cid)
+            if region:
+                by_region.setdefault(region, []).append(cid)
+                regions[region] += 1
+            lb = candidate_label(c)
+            labels.append(lb); label_to_id[lb] = cid
+            facets.add(c, region)
+            search.add(c)
+
+        region, region_others = _majority(regions)
+        return cls(
+            candidates=tuple(cands),
+            by_id=MappingProxyType(by_id),
+            digests=MappingProxyType(digests),
+            photos=MappingProxyType(photos),
+            ids_by_party=_freeze(by_party),
+            ids_by_policy=_freeze(by_policy),
+            ids_by_region=_freeze(by_region),
+            party_options=tuple(sorted(by_party)),
+            policy_options=tuple(sorted(by_policy)),
+            region_options=tuple(sorted(by_region)),
+            labels=tuple(labels),
+            label_to_id=MappingProxyType(label_to_id),
+            region=region,
+            region_others=region_others,
+            search=search.freeze(),
+            facets=facets.freeze(),
+        )
+
+    def get(self, cid: Any) -> Dict[str, Any] | None:
+        """ID（int でも "3" のような文字列でも可）から候補者を引く。"""
+        try:
+            return self.by_id.get(int(cid))
+        except (TypeError, ValueError):
+            return None
+
+    def same_party_ids(self, c: Dict[str, Any], limit: int | None = None) -> Tuple[int, ...]:
+        ids = self.ids_by_party.get(c.get("party","無所属"), ())
+        if limit is not None: ids = ids[:limit + 1]   # 本人を除いても limit 件残る分だけ見る
+        return tuple(i for i in ids if i != c["id"])[:limit]
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+# 🗂 共有カタログファイル（同じホストの複数プロセスが 1 つのファイルを mmap して読む）
+#
+# レプリカを何プロセスも動かすと、それぞれが data.py を読んで Catalog を組み立て、同じ索引をプロセスの数だけ持つ。
+# ここでは組み立て済みのカタログ（候補者・検索の転置リスト・ファセットのビットマップ・スタンス行列）を
+# 1 つのバイナリファイルに書き出し、各プロセスは読み取り専用で mmap する。
+# - 開くときに読むのは先頭・目次（JSON）・ファセットのビットマップだけ。候補者や転置リストは触ったページだけ
+#   OS が読み込み、そのページキャッシュはプロセス間で共有される
+# - 候補者は 1 人 1 つの JSON。引くたびに dict に戻す（SqliteRepository と同じく、表示する行だけ）
+# - 先頭に形式の版（FORMAT_VERSION）、目次に中身のハッシュ（version）。形式の版が違うファイルは開かない
+# - 書き出しは一時ファイルから os.replace で置き換える。開いているプロセスは古いファイルの mmap を読み続け、
+#   SnapshotStore が version の変化を見つけて開き直す
+#
+#   python catalog_file.py build candidates.cat [入力.jsonl|.csv|.parquet]   # 省略時は data.py
+#
+# ファイルの中身:
+#   先頭 32 バイト  MAGIC / 形式の版 / 予約 / 目次の位置 / 目次の長さ（リトルエンディアン）
+#   各セクション    8 バイト境界に並べた配列（目次の sections に 名前 → [位置, 長さ, 型]）
+#   目次            JSON（件数・選択肢・争点・ファセットの値など）。最後に書くのでファイルの末尾にある
+
+from __future__ import annotations
+import hashlib, json, mmap, os, struct, sys, time
+from array import array
+from typing import Any, BinaryIO, Dict, List, Sequence
+import numpy as np
+from catalog import Catalog
+from facets import FacetIndex
+from frame import build_frame
+from match import StanceMatrix
+from search import FIELD_BITS, SearchIndex
+from stances import STANCE_MISSING
+
+MAGIC = b"CANDCAT\0"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<8sIIQQ")
+_ALIGN = 8
+
+
+# --------------------------------
+# 書き出し
+# --------------------------------
+class _Writer:
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.sections: Dict[str, List[Any]] = {}
+        self.hash = hashlib.sha256()
+        f.write(bytes(_PREFIX.size))
+
+    def add(self, name: str, data: Any, typecode: str = "B"):
+        pos = self.f.tell()
+        pad = -pos % _ALIGN
+        if pad: self.f.write(bytes(pad))
+        buf = memoryview(data).cast("B")
+        self.f.write(buf)
+        self.hash.update(buf)
+        self.sections[name] = [pos + pad, buf.nbytes, typecode]
+
+    def strings(self, name: str, items: Sequence[str]):
+        """文字列の並び（"{name}.off" に終わりの位置、name に UTF-8 を詰めたもの）。"""
+        off, blob = array("q", [0]), bytearray()
+        for s in items:
+            blob += s.encode("utf-8")
+            off.append(len(blob))
+        self.add(name + ".off", off, "q")
+        self.add(name, blob)
+
+
+def write_catalog(cat: Catalog, path: str) -> str:
+    """カタログを path に書き出し、中身の版（ハッシュ）を返す。"""
+    n = len(cat.candidates)
+    ids = np.array([c["id"] for c in cat.candidates], dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    search = cat.search
+    postings = search.postings()
+    grams = sorted(postings, key=lambda g: g.encode("utf-8"))   # 引くときは UTF-8 のバイト列で二分探索
+    keys = "i" if n << FIELD_BITS < 1 << 31 else "q"
+    stances = StanceMatrix.from_frame(build_frame(cat.candidates))
+    facet_values = {f: sorted(vals) for f, vals in cat.facets.bits.items()}
+    nbytes = (n + 7) // 8
+
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            w = _Writer(f)
+            w.add("ids", ids, "q")
+            w.add("sorted_ids", ids[order], "q")
+            w.add("sorted_docs", order.astype(np.int64), "q")
+            w.strings("records", [json.dumps(dict(c), ensure_ascii=False, separators=(",", ":")) for c in cat.candidates])
+            w.strings("digests", [cat.digests[c["id"]] for c in cat.candidates])
+            w.strings("photos", [cat.photos[c["id"]] for c in cat.candidates])
+            w.strings("labels", list(cat.labels))
+            w.strings("texts", [t for texts in search.texts for t in texts])
+            w.strings("grams", grams)
+            off = array("q", [0])
+            for g in grams: off.append(off[-1] + len(postings[g]))
+            w.add("postings.off", off, "q")
+            w.add("postings", array(keys, (k for g in grams for k in postings[g])), keys)
+            w.add("facets", b"".join(cat.facets.bits[f][v].to_bytes(nbytes, "little")
+                                     for f, vals in facet_values.items() for v in vals))
+            w.add("stance_ids", np.ascontiguousarray(stances.ids, dtype=np.int64), "q")
+            # 2 次元のまま memoryview で cast すると、争点が 0 個（形に 0 がある）のとき失敗するので bytes にしておく
+            w.add("stance_codes", np.ascontiguousarray(stances.codes, dtype=np.int8).tobytes(), "b")
+            header = json.dumps({
+                "version": w.hash.hexdigest()[:12],
+                "count": n,
+                "byteorder": sys.byteorder,
+                "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "fields": [list(fw) for fw in search.fields],
+                "region": cat.region,
+                "region_others": cat.region_others,
+                "party_options": list(cat.party_options),
+                "policy_options": list(cat.policy_options),
+                "facets": facet_values,
+                "topics": list(stances.topics),
+                "sections": w.sections,
+            }, ensure_ascii=False).encode("utf-8")
+            pos = f.tell()
+            f.write(header)
+            f.seek(0)
+            f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, 0, pos, len(header)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        # 書きかけの一時ファイルは残さない（path の古い版はそのまま）
+        if os.path.exists(tmp): os.remove(tmp)
+        raise
+    return w.hash.hexdigest()[:12]
+
+
+# --------------------------------
+# 読み込み
+# --------------------------------
+def _parse_header(prefix: bytes, read) -> Dict[str, Any]:
+    magic, fmt, _, pos, length = _PREFIX.unpack_from(prefix)
+    if magic != MAGIC: raise ValueError("共有カタログファイルではありません")
+    if fmt != FORMAT_VERSION:
+        raise ValueError(f"形式の版 {fmt} のファイルは読めません（対応しているのは {FORMAT_VERSION}）。作り直してください")
+    header = json.loads(read(pos, length))
+    if header["byteorder"] != sys.byteorder: raise ValueError(f"{header['byteorder']} エンディアンで書かれたファイルです")
+    return header
+
+def catalog_version(path: str) -> str:
+    """目次に書かれた版（SnapshotStore 用。ファイル全体は読まない）。"""
+    with open(path, "rb") as f:
+        def read(pos: int, length: int) -> bytes:
+            f.seek(pos)
+            return f.read(length)
+        return _parse_header(f.read(_PREFIX.size), read)["version"]
+
+
+class _Strings:
+    def __init__(self, off: memoryview, data: memoryview):
+        self._off, self._data = off, data
+
+    def __len__(self) -> int:
+        return len(self._off) - 1
+
+    def raw(self, i: int) -> bytes:
+        return bytes(self._data[self._off[i]:self._off[i + 1]])
+
+    def __getitem__(self, i: int) -> str:
+        return self.raw(i).decode("utf-8")
+
+
+class _Records(_Strings):
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        return json.loads(self.raw(i))
+
+
+class _DocTexts:
+    # 検索の確認で引くのは 1 項目だけなので、引かれた項目だけ文字列に戻す
+    __slots__ = ("_strings", "_base")
+
+    def __init__(self, strings: _Strings, base: int):
+        self._strings, self._base = strings, base
+
+    def __getitem__(self, f: int) -> str:
+        return self._strings[self._base + f]
+
+
+class _Texts:
+    """文書番号 → 正規化済みの各項目（SearchIndex.texts の代わり）。"""
+
+    def __init__(self, strings: _Strings, n_fields: int):
+        self._strings, self._n = strings, n_fields
+
+    def __len__(self) -> int:
+        return len(self._strings) // self._n
+
+    def __getitem__(self, doc: int) -> _DocTexts:
+        return _DocTexts(self._strings, doc * self._n)
+
+
+class _Postings:
+    """n-gram → 転置リスト（SearchIndex._postings の代わり）。n-gram は UTF-8 の昇順に並んでいる。"""
+
+    def __init__(self, grams: _Strings, off: memoryview, keys: memoryview):
+        self._grams, self._off, self._keys = grams, off, keys
+
+    def get(self, gram: str, default: Any = None) -> Any:
+        key = gram.encode("utf-8")
+        lo, hi = 0, len(self._grams)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._grams.raw(mid) < key: lo = mid + 1
+            else: hi = mid
+        if lo == len(self._grams) or self._grams.raw(lo) != key: return default
+        return self._keys[self._off[lo]:self._off[lo + 1]]
+
+
+class MappedCatalog:
+    """共有カタログファイルを読み取り専用で mmap したもの。Catalog と同じく facets / search / candidates を持つ。"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self._mm = memoryview(mm)
+        h = self.header = _parse_header(mm[:_PREFIX.size], lambda pos, length: mm[pos:pos + length])
+        self.version: str = h["version"]
+        self.size: int = h["count"]
+        self.region: str | None = h["region"]
+        self.region_others: int = h["region_others"]
+        self.party_options = tuple(h["party_options"])
+        self.policy_options = tuple(h["policy_options"])
+
+        self.ids = self._view("ids")
+        self._sorted_ids = self._array("sorted_ids")
+        self._sorted_docs = self._array("sorted_docs")
+        self.candidates = _Records(self._view("records.off"), self._view("records"))
+        self.digests = self._strings("digests")
+        self.photos = self._strings("photos")
+        self.labels = self._strings("labels")
+
+        fields = tuple((f, w) for f, w in h["fields"])
+        self.search = SearchIndex.from_parts(
+            self.ids, _Texts(self._strings("texts"), len(fields)),
+            _Postings(self._strings("grams"), self._view("postings.off"), self._view("postings")), fields)
+
+        # ビットマップは Python の int にしないと AND できないので、ここだけはプロセスごとに持つ（値の数 × 件数/8 バイト）
+        facets = self._view("facets")
+        nbytes = (self.size + 7) // 8
+        bits: Dict[str, Dict[str, int]] = {}
+        i = 0
+        for facet, values in h["facets"].items():
+            bits[facet] = {}
+            for v in values:
+                bits[facet][v] = int.from_bytes(facets[i * nbytes:(i + 1) * nbytes], "little")
+                i += 1
+        self.facets = FacetIndex.from_bits(self.size, bits)
+
+        codes = self._array("stance_codes")
+        sids = self._array("stance_ids")
+        codes = codes.reshape(len(sids), len(h["topics"]))
+        self.stances = StanceMatrix(ids=sids, topics=list(h["topics"]), codes=codes, answered=codes != STANCE_MISSING)
+
+    def _view(self, name: str) -> memoryview:
+        pos, length, typecode = self.header["sections"][name]
+        return self._mm[pos:pos + length].cast(typecode)
+
+    def _array(self, name: str) -> np.ndarray:
+        # mmap の上の読み取り専用の配列（コピーしない）
+        return np.asarray(self._view(name))
+
+    def _strings(self, name: str) -> _Strings:
+        return _Strings(self._view(name + ".off"), self._view(name))
+
+    def doc_of(self, cid: Any) -> int | None:
+        try:
+            cid = np.int64(int(cid))
+        except (TypeError, ValueError, OverflowError):
+            return None
+        i = int(np.searchsorted(self._sorted_ids, cid))
+        if i == self.size or self._sorted_ids[i] != cid: return None
+        return int(self._sorted_docs[i])
+
+    def get(self, cid: Any) -> Dict[str, Any] | None:
+        doc = self.doc_of(cid)
+        return None if doc is None else self.candidates[doc]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "build":
+        from loader import load_catalog
+        t0 = time.perf_counter()
+        catalog, errors = load_catalog(sys.argv[3] if len(sys.argv) > 3 else None)
+        version = write_catalog(catalog, sys.argv[2])
+        for e in errors: print(f"⚠️ {e}")
+        print(f"✅ {len(catalog.candidates)} 件を {sys.argv[2]} に書き込みました"
+              f"（版 {version}、スキップ {len(errors)} 件、{time.perf_counter() - t0:.1f} 秒）")
+    else:
+        print("使い方: python catalog_file.py build 出力.cat [入力.jsonl|.csv|.parquet]")
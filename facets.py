@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# 🧮 ファセット絞り込み（値ごとのビットマップ）
+#
+# - 政党・重点政策・地域・争点ごとのスタンスについて、値ごとに「該当する文書番号のビット」を
+#   Python の int に立てて持つ（文書番号 = Catalog.candidates の並び順）
+# - 絞り込みはビット AND、件数は bit_count() だけで求まるので候補者を走査しない
+
+from __future__ import annotations
+import re
+from typing import Any, Dict, Iterable, List, Mapping
+from stances import _normalize_stance
+
+STANCE_PREFIX = "stance:"   # 争点は "stance:原発再稼働" のようなファセット名にする
+
+_ONE = re.compile("1")
+
+
+class FacetIndex:
+    def __init__(self):
+        self.size = 0
+        self.bits: Dict[str, Dict[str, int]] = {}        # ファセット → 値 → ビットマップ
+        self._acc: Dict[str, Dict[str, bytearray]] = {}  # 構築中はビット列を bytearray で持つ
+
+    @classmethod
+    def from_bits(cls, size: int, bits: Dict[str, Dict[str, int]]) -> "FacetIndex":
+        """freeze() 済みのビットマップ（catalog_file から読んだもの）で作る。"""
+        idx = cls()
+        idx.size, idx.bits = size, bits
+        return idx
+
+    @property
+    def all(self) -> int:
+        return (1 << self.size) - 1
+
+    def _set(self, facet: str, value: str, doc: int):
+        buf = self._acc.setdefault(facet, {}).setdefault(value, bytearray())
+        need = doc // 8 + 1
+        if len(buf) < need: buf.extend(bytes(need - len(buf)))
+        buf[doc // 8] |= 1 << (doc % 8)
+
+    def add(self, c: Dict[str, Any], region: str = ""):
+        doc = self.size
+        self.size += 1
+        self._set("party", c.get("party","無所属"), doc)
+        if c.get("keyPolicy"): self._set("keyPolicy", c["keyPolicy"], doc)
+        # 地域は Catalog 側で _norm_region 済みの値を受け取る
+        if region: self._set("region", region, doc)
+        for topic, raw in (c.get("comparisons") or {}).items():
+            self._set(STANCE_PREFIX + topic, _normalize_stance(raw), doc)
+
+    def freeze(self) -> "FacetIndex":
+        self.bits = {f: {v: int.from_bytes(buf, "little") for v, buf in vals.items()}
+                     for f, vals in self._acc.items()}
+        self._acc = {}
+        return self
+
+    # ---------- 問い合わせ ----------
+    def filter(self, selected: Mapping[str, str]) -> int:
+        """{ファセット: 値} をすべて満たす文書のビットマップ（空の指定なら全件）。"""
+        mask = self.all
+        for facet, value in selected.items():
+            mask &= self.bits.get(facet, {}).get(value, 0)
+            if not mask: break
+        return mask
+
+    def counts(self, facet: str, within: int | None = None) -> Dict[str, int]:
+        """値ごとの件数。within を渡すとその範囲内で数える。"""
+        vals = self.bits.get(facet, {})
+        if within is None: return {v: b.bit_count() for v, b in vals.items()}
+        return {v: (b & within).bit_count() for v, b in vals.items()}
+
+    def mask_of(self, docs: Iterable[int]) -> int:
+        buf = bytearray(self.size // 8 + 1)
+        for d in docs: buf[d // 8] |= 1 << (d % 8)
+        return int.from_bytes(buf, "little")
+
+    @staticmethod
+    def docs(mask: int) -> List[int]:
+        """立っているビットの位置（昇順）。"""
+        return [m.start() for m in _ONE.finditer(bin(mask)[:1:-1])]
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# 🧱 候補者の列指向ストア（pandas / NumPy）
+#
+# 比較ページ用に、候補者を「1 行 = 1 人」の DataFrame に一度だけ詰めておく。
+# - party / region / keyPolicy は category 型
+# - 争点ごとのスタンスは "stance:争点" 列に int8（賛成=2 … 反対=-2、未回答=STANCE_MISSING）
+# - 文字列列は object 型のまま持つ（レコードと同じ str を指すのでコピーしない）
+# 比較表は行を作り直さず、選んだ候補者の位置で NumPy 配列を切り出して 1 枚の表にするだけ。
+# pandas のインデクシング／concat／転置は数人分だと固定費の方が重いので、
+# 列の NumPy 配列はフレームごとに 1 回だけ作って覚えておく（_compare_arrays）。
+
+from __future__ import annotations
+import re
+import weakref
+from typing import Any, Dict, Iterable, List, Sequence
+import numpy as np
+import pandas as pd
+from catalog import _norm_region
+from stances import STANCE_FROM_SCORE, STANCE_MISSING, stance_code, topic_order_key
+
+STANCE_PREFIX = "stance:"
+_PROMISE_KEY = re.compile(r"promise(\d+)$")
+
+
+def promise_columns(candidates: Iterable[Dict[str, Any]]) -> List[str]:
+    nums = {int(m[1]) for c in candidates for k in c if (m := _PROMISE_KEY.match(k))}
+    return [f"promise{i}" for i in range(1, max(nums, default=0) + 1)]
+
+def _text(values: List[Any]) -> pd.Series:
+    # pandas 3 の既定（pyarrow の str 型）だと文字列が丸ごと複製されるので object のまま持つ
+    return pd.Series(values, dtype=object)
+
+def _ages(values: List[Any]) -> Any:
+    # 整数（と欠損）だけなら Int16。"45歳" などが混じるときは、比較表にそのまま出せるよう object で持つ
+    if all(v is None or (type(v) is int and -2**15 <= v < 2**15) for v in values):
+        return pd.array(values, dtype="Int16")
+    return pd.Series(values, dtype=object)
+
+def build_frame(candidates: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    topics = sorted({t for c in candidates for t in (c.get("comparisons") or {})}, key=topic_order_key)
+    promises = promise_columns(candidates)
+    cols: Dict[str, Any] = {
+        "name":      _text([c.get("name","") for c in candidates]),
+        "party":     pd.Categorical([c.get("party","無所属") for c in candidates]),
+        "region":    pd.Categorical([_norm_region(c.get("region","")) for c in candidates]),
+        "keyPolicy": pd.Categorical([c.get("keyPolicy","") for c in candidates]),
+        "age":       _ages([c.get("age") for c in candidates]),
+        "career":    _text([c.get("career","") or "" for c in candidates]),
+        "brief":     _text([c.get("brief","") or "" for c in candidates]),
+    }
+    for p in promises:
+        cols[p] = _text([c.get(p,"") or "" for c in candidates])
+    for t in topics:
+        cols[STANCE_PREFIX + t] = np.fromiter(
+            (stance_code((c.get("comparisons") or {}).get(t,"")) for c in candidates),
+            dtype=np.int8, count=len(candidates))
+    return pd.DataFrame(cols).set_axis(pd.Index([c["id"] for c in candidates], name="id"))
+
+def stance_columns(frame: pd.DataFrame) -> List[str]:
+    return [c for c in frame.columns if c.startswith(STANCE_PREFIX)]
+
+def _stance_lut() -> np.ndarray:
+    lut = np.array(["未回答"] * 256, dtype=object)
+    for score, label in STANCE_FROM_SCORE.items(): lut[score % 256] = label
+    return lut
+
+_STANCE_LUT = _stance_lut()
+
+def stance_labels(codes: pd.DataFrame) -> pd.DataFrame:
+    """int8 のスタンス列を表示用の文字列に戻す（未回答・項目なしは "未回答"）。"""
+    return pd.DataFrame(_STANCE_LUT[codes.to_numpy().astype(np.uint8)], index=codes.index, columns=codes.columns)
+
+# ---- 比較表 ----
+_ARRAYS: Dict[int, Dict[str, Any]] = {}   # id(frame) → 列の NumPy 配列（フレームが消えたら消す）
+
+def _compare_arrays(frame: pd.DataFrame) -> Dict[str, Any]:
+    arrays = _ARRAYS.get(id(frame))
+    if arrays is not None:
+        return arrays
+    scols = stance_columns(frame)
+    arrays = {c: frame[c].to_numpy(dtype=object, na_value="") for c in frame.columns if c not in scols}
+    # 年齢は表示用の文字列にしておく（欠損は ""）
+    arrays["age"] = np.array([str(a) if a != "" else "" for a in arrays["age"]], dtype=object)
+    arrays[STANCE_PREFIX] = frame[scols].to_numpy(dtype=np.int8) if scols else np.zeros((len(frame), 0), np.int8)
+    arrays["topics"] = [c[len(STANCE_PREFIX):] for c in scols]
+    arrays["promises"] = [c for c in frame.columns if _PROMISE_KEY.match(c)]
+    _ARRAYS[id(frame)] = arrays
+    weakref.finalize(frame, _ARRAYS.pop, id(frame), None)
+    return arrays
+
+def compare_table(frame: pd.DataFrame, ids: Sequence[int], labels: Sequence[str], *,
+                  career: bool = False, promises: bool = False, comparisons: bool = True) -> pd.DataFrame:
+    """選んだ候補者 × 項目の比較表（行 = 項目, 列 = 候補者）。"""
+    pos = frame.index.get_indexer(list(ids))
+    if (pos < 0).any():
+        raise KeyError([i for i, p in zip(ids, pos) if p < 0])
+    arrays = _compare_arrays(frame)
+    names: List[str] = []
+    rows: List[np.ndarray] = []
+    if career:
+        names += ["年齢", "経歴"]
+        rows += [arrays["age"][pos], arrays["career"][pos]]
+    if promises:
+        pcols = arrays["promises"]
+        names += ["重点政策", "政策説明", *[f"📋 公約{c[7:]}" for c in pcols]]
+        rows += [arrays[c][pos] for c in ("keyPolicy", "brief", *pcols)]
+    if comparisons:
+        codes = arrays[STANCE_PREFIX][pos]
+        # 選んだ候補者が誰も答えていない争点は出さない
+        for j in np.flatnonzero((codes != STANCE_MISSING).any(axis=0)):
+            names.append(f"⚖️ {arrays['topics'][j]}")
+            rows.append(_STANCE_LUT[codes[:, j].astype(np.uint8)])
+    if not rows:
+        return pd.DataFrame()
+    # dtype=object を明示しないと pandas 3 が全セルを str 型へ推論し直して遅い
+    return pd.DataFrame(np.column_stack([np.array(names, dtype=object), np.stack(rows)]),
+                        columns=["項目", *labels], dtype=object)
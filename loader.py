@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# 📥 候補者データの読み込み（JSONL / CSV / Parquet / data.py）
+#
+# - ファイルは 1 行（1 バッチ）ずつ読み、検証しながら Catalog.build にそのまま流す
+#   （ファイル全体や中間リストをメモリに載せない）
+# - 各レコードは detail_html などが前提にしている形（id, name, promise1..N, comparisons, …）か検証し、
+#   壊れた行はスキップしてエラー一覧に積む
+# - CANDIDATES_PATH が未指定なら従来どおり data.py の candidates を使う
+#
+#   python loader.py export candidates.jsonl   # data.py → JSONL / CSV / Parquet に書き出し
+#   python loader.py check  candidates.csv     # 検証だけ行う
+
+from __future__ import annotations
+import csv, json, os, re, runpy, sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from catalog import Catalog
+
+STR_FIELDS = ("name", "initial", "region", "career", "party", "keyPolicy", "brief", "photo", "partyIcon", "kana")
+PROMISE_KEY = re.compile(r"promise(\d+)$")
+CSV_STANCE_PREFIX = "comparisons."   # CSV では「comparisons.消費税増税」のような列でも渡せる
+PARQUET_BATCH_ROWS = 4096
+DATA_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.py")
+
+
+class RecordError(ValueError):
+    def __init__(self, where: str, msg: str):
+        super().__init__(f"{where}: {msg}")
+        self.where = where
+
+
+# --------------------------------
+# 検証
+# --------------------------------
+def validate(rec: Dict[str, Any], where: str = "?") -> Dict[str, Any]:
+    """スキーマに合わせて型をそろえたレコードを返す（合わなければ RecordError）。"""
+    out: Dict[str, Any] = {}
+    try:
+        out["id"] = int(rec["id"])
+    except KeyError:
+        raise RecordError(where, "id がありません")
+    except (TypeError, ValueError):
+        raise RecordError(where, f"id が整数ではありません: {rec.get('id')!r}")
+
+    for k, v in rec.items():
+        if k == "id" or v is None: continue
+        if k in STR_FIELDS or PROMISE_KEY.match(k):
+            if not isinstance(v, str): raise RecordError(where, f"{k} は文字列である必要があります")
+            out[k] = v
+        elif v == "":
+            continue   # CSV の空欄（年齢・スタンスなど）は「なし」扱い
+        elif k == "age":
+            try: out[k] = int(v)
+            except (TypeError, ValueError): raise RecordError(where, f"age が整数ではありません: {v!r}")
+        elif k == "comparisons":
+            if isinstance(v, str): v = json.loads(v)
+            if not isinstance(v, dict) or not all(isinstance(t, str) and isinstance(s, str) for t, s in v.items()):
+                raise RecordError(where, "comparisons は {争点: スタンス} の辞書である必要があります")
+            out[k] = {t: s for t, s in v.items() if s}
+        else:
+            out[k] = v   # 未知の項目はそのまま通す
+
+    if not out.get("name"): raise RecordError(where, "name がありません")
+    return out
+
+
+# --------------------------------
+# 形式ごとの読み込み（どれも 1 件ずつ yield する）
+# --------------------------------
+def _iter_jsonl(path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    with path.open(encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line: continue
+            try:
+                yield f"{path.name}:{n}", json.loads(line)
+            except json.JSONDecodeError as e:
+                yield f"{path.name}:{n}", {"__error__": f"JSON として読めません: {e}"}
+
+def _iter_csv(path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    with path.open(encoding="utf-8-sig", newline="") as f:
+        for n, row in enumerate(csv.DictReader(f), 2):
+            rec: Dict[str, Any] = {}
+            comps = {}
+            for k, v in row.items():
+                if k is None: continue
+                if k.startswith(CSV_STANCE_PREFIX):
+                    if v: comps[k[len(CSV_STANCE_PREFIX):]] = v
+                else:
+                    rec[k] = v
+            # 「comparisons.争点」列があれば、JSON の comparisons 列より優先する
+            if comps: rec["comparisons"] = comps
+            yield f"{path.name}:{n}", rec
+
+def _iter_parquet(path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet の読み込みには pyarrow が必要です（pip install pyarrow）")
+    n = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=PARQUET_BATCH_ROWS):
+        for rec in batch.to_pylist():
+            n += 1
+            yield f"{path.name}#{n}", rec
+
+def _iter_data_py() -> Iterator[Tuple[str, Dict[str, Any]]]:
+    # import だとモジュールがキャッシュされてホットリロードで読み直せないので、毎回ファイルから実行する
+    candidates = runpy.run_path(DATA_PY)["candidates"]
+    for i, rec in enumerate(candidates):
+        yield f"data.py[{i}]", rec
+
+READERS = {".jsonl": _iter_jsonl, ".ndjson": _iter_jsonl, ".csv": _iter_csv, ".parquet": _iter_parquet}
+
+def source_path(path: str | None) -> str:
+    """読み込み元のファイル（見張る対象）。"""
+    return path or DATA_PY
+
+def iter_raw(path: str | None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    if not path: return _iter_data_py()
+    p = Path(path)
+    reader = READERS.get(p.suffix.lower())
+    if reader is None:
+        raise ValueError(f"対応していない形式です: {p.suffix}（{', '.join(READERS)}）")
+    return reader(p)
+
+
+def iter_candidates(path: str | None, errors: List[str]) -> Iterator[Dict[str, Any]]:
+    """検証済みレコードを 1 件ずつ返す。スキップした行の理由は errors に積む。"""
+    seen = set()
+    for where, rec in iter_raw(path):
+        try:
+            if "__error__" in rec: raise RecordError(where, rec["__error__"])
+            c = validate(rec, where)
+            if c["id"] in seen: raise RecordError(where, f"id {c['id']} が重複しています")
+        except (RecordError, json.JSONDecodeError) as e:
+            errors.append(str(e) if isinstance(e, RecordError) else f"{where}: {e}")
+            continue
+        seen.add(c["id"])
+        yield c
+
+def load_catalog(path: str | None = None) -> Tuple[Catalog, List[str]]:
+    """ファイル（省略時は data.py）を 1 パスで読み、(カタログ, スキップした行のエラー) を返す。"""
+    errors: List[str] = []
+    return Catalog.build(iter_candidates(path, errors)), errors
+
+
+# --------------------------------
+# 書き出し（data.py からの移行用）
+# --------------------------------
+def export(records: Iterable[Dict[str, Any]], path: str):
+    p = Path(path)
+    records = list(records)
+    if p.suffix == ".csv":
+        topics = list(dict.fromkeys(t for r in records for t in (r.get("comparisons") or {})))
+        keys = list(dict.fromkeys(k for r in records for k in r if k != "comparisons"))
+        with p.open("w", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=keys + [CSV_STANCE_PREFIX + t for t in topics])
+            w.writeheader()
+            for r in records:
+                row = {k: v for k, v in r.items() if k != "comparisons"}
+                row.update({CSV_STANCE_PREFIX + t: s for t, s in (r.get("comparisons") or {}).items()})
+                w.writerow(row)
+    elif p.suffix == ".parquet":
+        import pyarrow as pa, pyarrow.parquet as pq
+        rows = [dict(r, comparisons=json.dumps(r.get("comparisons") or {}, ensure_ascii=False)) for r in records]
+        pq.write_table(pa.Table.from_pylist(rows), p)
+    else:
+        with p.open("w", encoding="utf-8") as f:
+            for r in records: f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    cmd, target = (sys.argv[1:3] + [None, None])[:2]
+    if cmd == "export" and target:
+        from data import candidates
+        export(candidates, target)
+        print(f"✅ {len(candidates)} 件を {target} に書き出しました")
+    elif cmd == "check":
+        cat, errs = load_catalog(target)
+        for e in errs: print(f"⚠️ {e}")
+        print(f"✅ {len(cat.candidates)} 件 OK / スキップ {len(errs)} 件")
+    else:
+        print("使い方: python loader.py export 出力.jsonl|.csv|.parquet  /  python loader.py check [入力]")
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+# 🔥 Streamlit アプリの負荷試験（N 人が websocket で 一覧 → 絞り込み → 詳細 → 一覧 → 比較 をたどる）
+#
+# ブラウザの代わりに Streamlit の websocket（/_stcore/stream）へ直接つなぎ、
+# 画面から受け取ったウィジェット（セレクトボックス・ボタン・マルチセレクト）を操作して再実行させる。
+# 外部サービスには一切つながない（サーバーはこのマシンで起動するか、起動済みのものを指定する）。
+#
+#   python loadtest.py -n 20 --duration 60                  # test.py をこのマシンで起動して試す
+#   python loadtest.py -n 50 --url http://127.0.0.1:8501 --pid 12345   # 起動済みのサーバーに（pid で CPU/RSS も測る）
+#   python loadtest.py -n 20 --json loadtest.json           # 結果を JSON でも保存
+#
+# - 再実行の時間は「操作を送ってから最後の script_finished まで」（st.rerun() で走り直す分も含む）
+# - バイト数は受け取った ForwardMsg の大きさ（圧縮前）。ブラウザと違い送信済みメッセージのキャッシュは使わない
+# - サーバーの CPU / RSS は /proc/<pid> を見る（Linux のみ）。CPU が 1 コアだと負荷をかける側も同じコアを食うので注意
+#   websockets が必要（pip install websockets。uvicorn[standard] に含まれる）
+
+from __future__ import annotations
+import argparse, asyncio, json, os, random, re, statistics, subprocess, sys, time, urllib.request
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.py")
+DEFAULT_PORT = 8599
+STEP_TIMEOUT = 30.0   # 1 操作の上限（秒）
+SAMPLE_SECONDS = 0.5  # サーバーの CPU / RSS を見る間隔
+FINISHED_EARLY_FOR_RERUN = 2   # ForwardMsg.ScriptFinishedStatus（st.rerun() で走り直す）
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+
+# --------------------------------
+# 1 人分のセッション
+# --------------------------------
+class AppError(RuntimeError):
+    pass
+
+class StSession:
+    """ブラウザ 1 タブ分。画面のウィジェットを覚えておき、操作を BackMsg にして送る。"""
+
+    def __init__(self, ws):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        self._BackMsg, self._ForwardMsg = BackMsg, ForwardMsg
+        self.ws = ws
+        self.query_string = ""
+        self.widgets: Dict[str, Tuple[str, Any]] = {}   # ウィジェット ID → (種類, 要素の proto)
+        self.values: Dict[str, Tuple[str, Any]] = {}    # こちらで値を決めたウィジェット ID → (WidgetState の型, 値)
+
+    async def rerun(self, trigger: str | None = None) -> Tuple[float, int]:
+        """再実行を 1 回頼み、終わるまで待つ。(秒, 受け取ったバイト数) を返す。"""
+        msg = self._BackMsg()
+        rs = msg.rerun_script
+        rs.query_string = self.query_string
+        for wid, (kind, value) in self.values.items():
+            if wid not in self.widgets: continue   # もう画面にない
+            w = rs.widget_states.widgets.add(); w.id = wid
+            if kind == "string_array_value": w.string_array_value.data.extend(value)
+            else: setattr(w, kind, value)
+        if trigger:
+            w = rs.widget_states.widgets.add(); w.id = trigger; w.trigger_value = True
+
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        size, seen, raised = 0, {}, []
+        while True:
+            raw = await asyncio.wait_for(self.ws.recv(), STEP_TIMEOUT)
+            size += len(raw)
+            fm = self._ForwardMsg(); fm.ParseFromString(raw)
+            kind = fm.WhichOneof("type")
+            if kind == "page_info_changed":
+                self.query_string = fm.page_info_changed.query_string
+            elif kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                el = fm.delta.new_element
+                etype = el.WhichOneof("type")
+                if etype == "exception": raised.append(el.exception.message)
+                wid = getattr(getattr(el, etype), "id", None) if etype else None
+                if wid: seen[wid] = (etype, getattr(el, etype))
+            elif kind == "script_finished":
+                if fm.script_finished == FINISHED_EARLY_FOR_RERUN:
+                    seen = {}; continue   # st.rerun()：描き直しを待つ
+                self.widgets = seen
+                if raised: raise AppError(raised[0])   # アプリ側の例外（画面に赤枠で出るもの）
+                return time.perf_counter() - t0, size
+
+    # ---------- 画面の部品を探す ----------
+    def find(self, etype: str, key: str | None = None, label: str | None = None) -> Tuple[str, Any]:
+        """種類とキー（ID 末尾の「-キー」、前方一致）かラベルでウィジェットを探す。"""
+        for wid, (t, el) in self.widgets.items():
+            if t != etype: continue
+            if key is not None and not re.search(rf"-{re.escape(key)}", wid): continue
+            if label is not None and el.label != label: continue
+            return wid, el
+        raise LookupError(f"{etype} {key or label} が画面にありません")
+
+    async def click(self, key: str | None = None, label: str | None = None):
+        wid, _ = self.find("button", key, label)
+        return await self.rerun(trigger=wid)
+
+    async def click_any(self, key_prefix: str, rng: random.Random):
+        """キーが key_prefix で始まるボタン（一覧のカードなど）のどれかを押す。"""
+        ids = [wid for wid, (t, _) in self.widgets.items() if t == "button" and f"-{key_prefix}" in wid]
+        if not ids: raise LookupError(f"{key_prefix}* のボタンが画面にありません")
+        return await self.rerun(trigger=rng.choice(ids))
+
+    async def select(self, key: str, rng: random.Random):
+        """先頭（「すべて」）以外の選択肢をどれか選ぶ。"""
+        wid, el = self.find("selectbox", key)
+        self.values[wid] = ("string_value", rng.choice(el.options[1:] or el.options))
+        return await self.rerun()
+
+    async def multiselect(self, label: str, n: int, rng: random.Random):
+        wid, el = self.find("multiselect", label=label)
+        self.values[wid] = ("string_array_value", rng.sample(list(el.options), min(n, len(el.options))))
+        return await self.rerun()
+
+
+# 1 周の操作（名前, 関数）。ボタンは画面に出ているものを押すので、アプリの導線どおりに進む
+FLOW: List[Tuple[str, Callable]] = [
+    ("list",    lambda s, rng: s.rerun()),
+    ("filter",  lambda s, rng: s.select("party_filter", rng)),
+    ("detail",  lambda s, rng: s.click_any("goto_", rng)),
+    ("back",    lambda s, rng: s.click(label="← 一覧へ戻る")),
+    ("compare", lambda s, rng: s.click("go_compare")),
+    ("compare_select", lambda s, rng: s.multiselect("比較したい候補者", 3, rng)),
+]
+
+
+# --------------------------------
+# 集計
+# --------------------------------
+@dataclass
+class Stats:
+    latency: Dict[str, List[float]] = field(default_factory=dict)
+    nbytes: Dict[str, List[int]] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    flows_done: int = 0
+
+    def add(self, step: str, dt: float, size: int):
+        self.latency.setdefault(step, []).append(dt)
+        self.nbytes.setdefault(step, []).append(size)
+
+    def error(self, step: str, e: BaseException):
+        key = f"{step}: {type(e).__name__}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+async def run_session(n: int, url: str, stats: Stats, stop_at: float, think: float, seed: int):
+    import websockets
+    rng = random.Random(seed * 100_003 + n)
+    while time.monotonic() < stop_at:
+        try:
+            async with websockets.connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=STEP_TIMEOUT) as ws:
+                s = StSession(ws)
+                for step, action in FLOW:
+                    try:
+                        dt, size = await action(s, rng)
+                    except (LookupError, AppError, asyncio.TimeoutError) as e:
+                        stats.error(step, e); break   # この周はあきらめて、つなぎ直して最初から
+                    stats.add(step, dt, size)
+                    if time.monotonic() >= stop_at: return
+                    await asyncio.sleep(think * rng.uniform(0.5, 1.5))   # 人が読んで次を押すまで
+                else:
+                    stats.flows_done += 1
+        except (OSError, asyncio.TimeoutError) as e:
+            stats.error("connect", e)
+            await asyncio.sleep(1)
+        except Exception as e:   # websockets の ConnectionClosed など
+            stats.error("session", e)
+            await asyncio.sleep(1)
+
+
+class ProcSampler:
+    """/proc/<pid> から CPU 使用率と RSS を定期的に拾う。"""
+
+    def __init__(self, pid: int | None):
+        self.pid = pid if pid and os.path.exists(f"/proc/{pid}") else None
+        self.cpu: List[float] = []
+        self.rss_mb: List[float] = []
+        self._hz = os.sysconf("SC_CLK_TCK") if self.pid else 100
+
+    def _read(self) -> Tuple[float, float]:
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = int(fields[11]) + int(fields[12])   # utime + stime
+        with open(f"/proc/{self.pid}/status") as f:
+            rss = next(int(l.split()[1]) for l in f if l.startswith("VmRSS:"))
+        return ticks / self._hz, rss / 1024
+
+    async def run(self, stop: asyncio.Event):
+        if not self.pid: return
+        cpu0, rss = self._read(); t0 = time.monotonic()
+        self.rss_mb.append(rss)
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), SAMPLE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                cpu1, rss = self._read()
+            except (OSError, StopIteration):
+                return   # サーバーが落ちた
+            t1 = time.monotonic()
+            self.cpu.append((cpu1 - cpu0) / (t1 - t0) * 100)
+            self.rss_mb.append(rss)
+            cpu0, t0 = cpu1, t1
+
+
+def report(stats: Stats, sampler: ProcSampler, args: argparse.Namespace, elapsed: float) -> Dict[str, Any]:
+    all_lat = [x for xs in stats.latency.values() for x in xs]
+    all_bytes = [x for xs in stats.nbytes.values() for x in xs]
+    steps = {}
+    for step, _ in FLOW:
+        lat, nb = stats.latency.get(step, []), stats.nbytes.get(step, [])
+        if not lat: continue
+        steps[step] = {"count": len(lat), "p50_ms": _percentile(lat, .5) * 1000, "p95_ms": _percentile(lat, .95) * 1000,
+                       "p99_ms": _percentile(lat, .99) * 1000, "max_ms": max(lat) * 1000,
+                       "bytes_mean": statistics.fmean(nb)}
+    out = {
+        "sessions": args.sessions, "duration_s": round(elapsed, 1), "think_s": args.think,
+        "interactions": len(all_lat), "reruns_per_s": round(len(all_lat) / elapsed, 2) if elapsed else 0,
+        "flows_completed": stats.flows_done,
+        "p50_ms": _percentile(all_lat, .5) * 1000, "p95_ms": _percentile(all_lat, .95) * 1000,
+        "p99_ms": _percentile(all_lat, .99) * 1000,
+        "bytes_per_interaction": statistics.fmean(all_bytes) if all_bytes else 0,
+        "steps": steps, "errors": stats.errors,
+    }
+    if sampler.cpu:
+        out["server"] = {"cpu_mean_pct": statistics.fmean(sampler.cpu), "cpu_max_pct": max(sampler.cpu),
+                         "rss_start_mb": sampler.rss_mb[0], "rss_max_mb": max(sampler.rss_mb),
+                         "rss_per_session_mb": (max(sampler.rss_mb) - sampler.rss_mb[0]) / args.sessions}
+
+    print(f"\n👥 {args.sessions} セッション / {elapsed:.0f} 秒: 操作 {out['interactions']:,} 回"
+          f"（{out['reruns_per_s']:.1f} 回/秒）・一巡 {stats.flows_done:,} 回")
+    print(f"⏱ 再実行 p50 {out['p50_ms']:.0f} ms · p95 {out['p95_ms']:.0f} ms · p99 {out['p99_ms']:.0f} ms"
+          f" · 1 操作あたり {out['bytes_per_interaction'] / 1024:.1f} KiB")
+    for step, r in steps.items():
+        print(f"  {step:<15} {r['count']:>6,} 回  p50 {r['p50_ms']:>7.0f}  p95 {r['p95_ms']:>7.0f}"
+              f"  p99 {r['p99_ms']:>7.0f}  max {r['max_ms']:>7.0f} ms  {r['bytes_mean'] / 1024:>7.1f} KiB")
+    if "server" in out:
+        sv = out["server"]
+        print(f"🖥 サーバー CPU 平均 {sv['cpu_mean_pct']:.0f}% · 最大 {sv['cpu_max_pct']:.0f}%"
+              f" / RSS {sv['rss_start_mb']:.0f} → 最大 {sv['rss_max_mb']:.0f} MB（1 セッションあたり約 {sv['rss_per_session_mb']:.1f} MB）")
+    for k, v in stats.errors.items():
+        print(f"⚠️ {k} × {v}")
+    return out
+
+
+# --------------------------------
+# サーバーの起動と実行
+# --------------------------------
+def start_server(port: int) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "streamlit", "run", APP, "--server.headless=true", f"--server.port={port}",
+           "--server.address=127.0.0.1", "--browser.gatherUsageStats=false", "--server.fileWatcherType=none"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None: raise RuntimeError(f"streamlit が起動しませんでした（終了コード {proc.returncode}）")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200: return proc
+        except OSError:
+            time.sleep(0.3)
+    proc.terminate()
+    raise RuntimeError("streamlit の起動を 60 秒待ちましたが応答がありません")
+
+def ws_url(url: str) -> str:
+    return re.sub(r"^http", "ws", url.rstrip("/")) + "/_stcore/stream"
+
+async def warm_up(url: str):
+    # 最初の 1 回はデータの読み込み・索引づくりが走るので、測る前に済ませておく（RSS の基準もその後に取る）
+    import websockets
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=STEP_TIMEOUT) as ws:
+        await StSession(ws).rerun()
+
+async def main(args: argparse.Namespace, url: str, pid: int | None) -> Dict[str, Any]:
+    await warm_up(url)
+    stats = Stats()
+    sampler = ProcSampler(pid)
+    stop = asyncio.Event()
+    sampling = asyncio.create_task(sampler.run(stop))
+    t0 = time.monotonic()
+    stop_at = t0 + args.ramp + args.duration
+    tasks = []
+    for n in range(args.sessions):
+        tasks.append(asyncio.create_task(run_session(n, url, stats, stop_at, args.think, args.seed)))
+        await asyncio.sleep(args.ramp / max(1, args.sessions))   # 少しずつ人を増やす
+    await asyncio.gather(*tasks)
+    stop.set(); await sampling
+    return report(stats, sampler, args, time.monotonic() - t0)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Streamlit アプリの負荷試験（websocket で同時セッションを再現）")
+    ap.add_argument("-n", "--sessions", type=int, default=10, help="同時セッション数")
+    ap.add_argument("--duration", type=float, default=30, help="全員がそろってからの試験時間（秒）")
+    ap.add_argument("--ramp", type=float, default=5, help="全員がそろうまでの時間（秒）")
+    ap.add_argument("--think", type=float, default=1.0, help="操作の間の待ち（秒、±50%% でばらつかせる）")
+    ap.add_argument("--url", help="起動済みのサーバー（例 http://127.0.0.1:8501）。省略時は test.py を起動する")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT, help="自分で起動するときのポート")
+    ap.add_argument("--pid", type=int, help="--url のサーバーのプロセス ID（CPU / RSS を測る）")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="結果を JSON で保存する")
+    args = ap.parse_args()
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        sys.exit("負荷試験には websockets が必要です（pip install websockets）")
+
+    server = None
+    if args.url:
+        url, pid = ws_url(args.url), args.pid
+    else:
+        print(f"🚀 streamlit run test.py（127.0.0.1:{args.port}）を起動しています…")
+        server = start_server(args.port)
+        url, pid = ws_url(f"http://127.0.0.1:{args.port}"), server.pid
+    try:
+        result = asyncio.run(main(args, url, pid))
+    finally:
+        if server:
+            server.terminate(); server.wait(10)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"💾 {args.json}")
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# 🧭 スタンス一致度（「あなたに近い候補者」）
+#
+# 候補者 × 争点の順序尺度行列（賛成=2 … 反対=-2、未回答はマスク）に対して、
+# 利用者の回答との一致度を NumPy の行列演算で一括計算する（候補者ごとの Python ループなし）。
+#   一致度 = Σ w·(1 - |あなた - 候補者| / 4) / Σ w   （双方が答えた争点のみ）
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from frame import STANCE_PREFIX, stance_columns
+from stances import STANCE_MISSING, topic_order_key
+
+MAX_DIFF = 4   # 賛成(2) と 反対(-2) の差
+
+
+@dataclass(frozen=True)
+class StanceMatrix:
+    ids: np.ndarray          # (n,) 候補者ID
+    topics: List[str]        # (t,) 争点
+    codes: np.ndarray        # (n, t) int8
+    answered: np.ndarray     # (n, t) bool
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "StanceMatrix":
+        cols = sorted(stance_columns(frame), key=lambda c: topic_order_key(c[len(STANCE_PREFIX):]))
+        codes = np.ascontiguousarray(frame[cols].to_numpy(dtype=np.int8))
+        return cls(
+            ids=frame.index.to_numpy(),
+            topics=[c[len(STANCE_PREFIX):] for c in cols],
+            codes=codes,
+            answered=codes != STANCE_MISSING,
+        )
+
+
+def match_scores(m: StanceMatrix, answers: Dict[str, int], weights: Dict[str, float] | None = None):
+    """(一致度 0–100 の配列, 比較できた争点数の配列)。比較できる争点が無い候補者は NaN。"""
+    t = len(m.topics)
+    ans = np.zeros(t, dtype=np.int16)
+    w = np.zeros(t, dtype=np.float32)
+    for j, topic in enumerate(m.topics):
+        if topic in answers:
+            ans[j] = answers[topic]
+            w[j] = (weights or {}).get(topic, 1.0)
+    mask = m.answered & (w > 0)                                   # (n, t)
+    agree = 1.0 - np.abs(m.codes.astype(np.int16) - ans) / MAX_DIFF  # (n, t)
+    num = np.where(mask, agree, 0.0) @ w
+    den = mask @ w
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = np.where(den > 0, 100.0 * num / den, np.nan)
+    return score, mask.sum(axis=1)
+
+def rank(m: StanceMatrix, answers: Dict[str, int], weights: Dict[str, float] | None = None,
+         limit: int | None = None) -> List[tuple]:
+    """[(候補者ID, 一致度, 比較できた争点数), ...] を一致度の高い順に返す。"""
+    score, overlap = match_scores(m, answers, weights)
+    valid = np.flatnonzero(~np.isnan(score))
+    if limit and len(valid) > limit:
+        # 上位 limit 件の境目の一致度以上だけ残してから並べる（同点は全部残す）
+        kth = np.partition(score[valid], len(valid) - limit)[len(valid) - limit]
+        valid = valid[score[valid] >= kth]
+    # 一致度 → 比較できた争点数 → ID の順（lexsort は最後のキーが第 1 キー）
+    order = valid[np.lexsort((m.ids[valid], -overlap[valid], -score[valid]))]
+    if limit: order = order[:limit]
+    return [(int(m.ids[i]), float(score[i]), int(overlap[i])) for i in order]
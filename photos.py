@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# 🧑 顔写真の割り当て（どのプロセス・どの再起動でも同じ結果）
+#
+# photo 項目 → 明示マップ → 名前からの簡易推定＋安定分配、の順に決める。
+# 分配は整数 ID ならこれまでどおり ID の剰余（既存の候補者の写真は変わらない）。ID が整数でないときだけ、
+# Python の hash()（プロセスごとにランダム化される）ではなく名前の SHA-1 を使う。
+# Catalog.build が全候補者分を 1 回だけ引いて表（id → ファイル名）にしておく。
+
+from __future__ import annotations
+import hashlib
+from pathlib import Path
+from typing import Any, Dict
+
+IMAGE_FILES = [
+    "asano.png","kawarada.png","hiratuka.png","murakami.png","yanagisawa.png",
+    "men1.png","men2.png","woman1.png","woman2.png","woman3.png",
+]
+IMAGE_AVAILABLE = {fn for fn in IMAGE_FILES if Path(fn).exists()}
+
+PHOTO_MAP_BY_ID = { 1:"asano.png", 2:"kawarada.png", 3:"hiratuka.png", 4:"murakami.png", 5:"woman1.png" }
+PHOTO_MAP_BY_NAME = {
+    "佐藤太郎":"asano.png","鈴木次郎":"kawarada.png","田中三郎":"hiratuka.png",
+    "加藤花":"murakami.png","石原さくら":"woman1.png",
+}
+
+FEM_HINTS = ("子","美","花","華","さくら","桜","奈","香","莉","恵","江", "さやか", "みさき", "まりこ", "まい", "あい", "あかね")
+MEN_POOL   = ["men1.png","men2.png"]
+WOMEN_POOL = ["woman1.png","woman2.png","woman3.png"]
+
+NO_PHOTO = ""   # 表の中で「画像なし（頭文字を出す）」を表す
+
+
+def stable_seed(*parts: Any) -> int:
+    raw = "\x1f".join(str(p) for p in parts).encode("utf-8")
+    return int.from_bytes(hashlib.sha1(raw).digest()[:8], "big")
+
+def assign_photo(c: Dict[str, Any]) -> str:
+    """候補者の顔写真ファイル名（使える画像が無ければ NO_PHOTO）。"""
+    # 1) データに photo があれば最優先
+    p = c.get("photo")
+    # 2) 明示マップ
+    if not p:
+        p = PHOTO_MAP_BY_ID.get(c.get("id")) or PHOTO_MAP_BY_NAME.get(c.get("name"))
+    # 3) 簡易推定 → 安定分配
+    if not p:
+        name = c.get("name","")
+        is_female = any(h in name for h in FEM_HINTS)
+        pool = WOMEN_POOL if is_female else MEN_POOL
+        cid = c.get("id")
+        seed = cid if isinstance(cid, int) else stable_seed(name)
+        p = pool[seed % len(pool)]
+    return p if p in IMAGE_AVAILABLE else NO_PHOTO
@@ -1,34 +1,234 @@
-from PIL import Image
-import os
+from __future__ import annotations
+from PIL import Image, features
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse, base64, hashlib, io, json, math, os, time
+
+# 顔写真・党ロゴのサムネイル（複数サイズ × 複数フォーマット）を作るビルド手順
+#   python png.py [-j ワーカー数] [--force] [--sprite]
+# --sprite を付けると、一覧カード用の顔写真と党ロゴを 1 枚のスプライトシートにまとめ、
+# 位置の表（sprite.json）も書き出す（render.py がこれを見て CSS の背景位置でカードを描く）。
+# 元画像はそのまま残し、OUTPUT_DIR に「名前-サイズ.拡張子」で書き出す。
+# 一覧カードの読み込み中に出すぼかしプレースホルダ（数百バイトのデータ URI）もマニフェストの lqip に入れる。
+# プロセスプールで並列に処理し、マニフェスト（mtime/サイズ/sha256）で変更のない画像はスキップする。
 
 # === 設定項目 ===
-# 対象ディレクトリを指定（例: "C:/Users/yuki/images"）
-TARGET_DIR = "/home/ytmr0/demo/tokyo_gasu_i_net"
+# 対象ディレクトリ（既定はこのファイルと同じ場所。PHOTO_DIR で上書き可）
+TARGET_DIR = os.environ.get("PHOTO_DIR", os.path.dirname(os.path.abspath(__file__)))
+
+# 出力フォルダ（元画像は上書きしない）
+OUTPUT_DIR = os.path.join(TARGET_DIR, "thumbs")
+# 前回処理したソースの mtime/サイズ/sha256 と出力一覧
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, "manifest.json")
+
+# 表示枠（CSS の px）: .candidate-photo = 120px, .modal-photo = 150px
+SLOTS = {"card": 120, "modal": 150}
+# 1x と Retina 用の 2x
+DENSITIES = (1, 2)
+THUMB_SIZES = sorted({px * d for px in SLOTS.values() for d in DENSITIES})  # [120, 150, 240, 300]
+
+# 出力フォーマット（AVIF は Pillow が対応している場合のみ）
+FORMATS = ["png", "webp"] + (["avif"] if features.check("avif") else [])
+SAVE_OPTIONS = {
+    "png":  {"optimize": True},
+    # method/speed は圧縮率より速度寄り（method=6 は 1 枚数秒かかる）
+    "webp": {"quality": 82, "method": 4},
+    "avif": {"quality": 60, "speed": 8},
+}
+
+
+# プレースホルダ: LQIP_SIZE px 四方まで縮めた低画質 WebP（ブラウザが拡大するとぼける）
+LQIP_SIZE = 16
+LQIP_QUALITY = 40
+
+# スプライトシート: カード枠 120px の 2x でタイルを並べる
+SPRITE_TILE = SLOTS["card"] * max(DENSITIES)
+SPRITE_MANIFEST = os.path.join(OUTPUT_DIR, "sprite.json")
+
+
+def thumb_name(file: str, size: int, fmt: str) -> str:
+    stem = os.path.splitext(file)[0]
+    return f"{stem}-{size}.{fmt}"
+
+def square_crop(img: Image.Image) -> Image.Image:
+    # 丸枠（object-fit: cover）に合わせて中央を正方形に切り出す
+    w, h = img.size
+    s = min(w, h)
+    left, top = (w - s) // 2, (h - s) // 2
+    return img.crop((left, top, left + s, top + s))
+
+def contain_tile(img: Image.Image, size: int) -> Image.Image:
+    # 党ロゴは切り抜かず、透明な正方形の中央に収める
+    img = img.convert("RGBA")
+    img.thumbnail((size, size), Image.LANCZOS)
+    tile = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    tile.paste(img, ((size - img.width) // 2, (size - img.height) // 2))
+    return tile
+
+def lqip_data_uri(img: Image.Image) -> str:
+    # 透過部分は白に載せる（WebP の低画質だとアルファの縁が汚れる）
+    small = img.convert("RGBA").resize((LQIP_SIZE, LQIP_SIZE), Image.BOX)
+    flat = Image.new("RGB", small.size, (255, 255, 255))
+    flat.paste(small, mask=small.getchannel("A"))
+    buf = io.BytesIO()
+    flat.save(buf, format="WEBP", quality=LQIP_QUALITY, method=6)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""): h.update(chunk)
+    return h.hexdigest()
+
+def load_manifest() -> dict:
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f: return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(manifest: dict):
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
 
-# 解像度を下げる倍率（例: 0.5で半分、0.25で1/4）
-SCALE = 0.5
+def needs_build(file: str, entry: dict | None) -> tuple:
+    """(作り直すか, 今のソース情報) を返す。mtime/サイズが同じなら中身を読まない。"""
+    st = os.stat(os.path.join(TARGET_DIR, file))
+    info = {"mtime": st.st_mtime, "size": st.st_size}
+    if entry and (not all(os.path.exists(os.path.join(TARGET_DIR, p)) for p in entry.get("outputs", []))
+                  or "lqip" not in entry):
+        entry = None
+    if entry and entry.get("mtime") == info["mtime"] and entry.get("size") == info["size"]:
+        return False, dict(entry, **info)
+    info["sha256"] = file_sha256(os.path.join(TARGET_DIR, file))
+    # touch されただけ（中身が同じ）なら作り直さない
+    if entry and entry.get("sha256") == info["sha256"]:
+        return False, dict(entry, **info)
+    return True, info
+
+def build_thumbs(file: str) -> dict:
+    """1枚の PNG からサムネイル一式を作る（プロセスプールのワーカーで実行）。"""
+    src_path = os.path.join(TARGET_DIR, file)
+    img = square_crop(Image.open(src_path))
+    if img.mode not in ("RGB", "RGBA"): img = img.convert("RGBA")
+
+    written = []
+    for size in THUMB_SIZES:
+        # 元画像より大きくはしない（小さい元画像は手持ちの最大サイズまで）
+        if size > img.width: continue
+        resized = img.resize((size, size), Image.LANCZOS)
+        for fmt in FORMATS:
+            out = os.path.join(OUTPUT_DIR, thumb_name(file, size, fmt))
+            resized.save(out, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+            written.append(out)
+
+    # カード表示（1x）で実際に配る最小ファイル
+    card = [p for p in written if f"-{min(THUMB_SIZES)}." in os.path.basename(p)] or written
+    return {
+        "file": file,
+        "outputs": [os.path.relpath(p, TARGET_DIR) for p in written],
+        "src_bytes": os.path.getsize(src_path),
+        "card_bytes": min((os.path.getsize(p) for p in card), default=0),
+        "lqip": lqip_data_uri(img),
+    }
+
+
+def sprite_sources() -> tuple:
+    """(顔写真, 党ロゴ) のうち実在するファイル名。"""
+    from photos import IMAGE_FILES
+    from render import PARTY_ICON_FILES
+    exists = lambda f: os.path.exists(os.path.join(TARGET_DIR, f))
+    return [f for f in IMAGE_FILES if exists(f)], [f for f in dict.fromkeys(PARTY_ICON_FILES.values()) if exists(f)]
+
+def build_sprite(sources: dict, force: bool = False) -> dict | None:
+    """顔写真・党ロゴを 1 枚にまとめる。sources（ファイル → mtime/サイズ）が前回と同じなら作らない。"""
+    photos, logos = sprite_sources()
+    files = photos + logos
+    if not files: return None
+    stamp = {f: [sources.get(f, {}).get("mtime"), sources.get(f, {}).get("size")] for f in files}
+    try:
+        with open(SPRITE_MANIFEST, encoding="utf-8") as f: old = json.load(f)
+        if not force and old.get("sources") == stamp and old.get("tile") == SPRITE_TILE and \
+           all(os.path.exists(os.path.join(TARGET_DIR, p)) for p in old["sheets"].values()):
+            return None
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+
+    t = SPRITE_TILE
+    cols = math.ceil(math.sqrt(len(files)))
+    rows = math.ceil(len(files) / cols)
+    sheet = Image.new("RGBA", (cols * t, rows * t), (0, 0, 0, 0))
+    tiles = {}
+    for i, f in enumerate(files):
+        img = Image.open(os.path.join(TARGET_DIR, f))
+        tile = contain_tile(img, t) if f in logos else square_crop(img).convert("RGBA").resize((t, t), Image.LANCZOS)
+        col, row = i % cols, i // cols
+        sheet.paste(tile, (col * t, row * t))
+        tiles[f] = [col, row]
+
+    sheets = {}
+    for fmt in FORMATS:
+        out = os.path.join(OUTPUT_DIR, f"sprite.{fmt}")
+        sheet.save(out, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+        sheets[fmt] = os.path.relpath(out, TARGET_DIR)
+    manifest = {"tile": t, "cols": cols, "rows": rows, "tiles": tiles, "sheets": sheets, "sources": stamp}
+    tmp = SPRITE_MANIFEST + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, SPRITE_MANIFEST)
+    return manifest
 
-# 出力フォルダ（元と同じに上書きしたいなら同じにしてもOK）
-OUTPUT_DIR = os.path.join(TARGET_DIR)
 
 # === 実行 ===
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-for file in os.listdir(TARGET_DIR):
-    if file.lower().endswith(".png"):
-        
-        img_path = os.path.join(TARGET_DIR, file)
-        img = Image.open(img_path)
-        
-        # 現在のサイズ取得
-        w, h = img.size
-        new_size = (int(w * SCALE), int(h * SCALE))
-        
-        # リサイズして保存（品質を落とす）
-        img_resized = img.resize(new_size, Image.LANCZOS)
-        output_path = os.path.join(OUTPUT_DIR, file)
-        img_resized.save(output_path, optimize=True)
-
-        print(f"✅ {file}: {w}x{h} → {new_size[0]}x{new_size[1]}")
-
-print("🎉 全てのPNGの解像度を下げました！")
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="候補者写真のサムネイルを並列・差分ビルドする")
+    ap.add_argument("-j", "--workers", type=int, default=int(os.environ.get("PNG_WORKERS", 0)) or os.cpu_count(),
+                    help="プロセス数（既定: CPU コア数 / PNG_WORKERS）")
+    ap.add_argument("--force", action="store_true", help="マニフェストを無視して全件作り直す")
+    ap.add_argument("--sprite", action="store_true", help="一覧カード用のスプライトシートも作る")
+    args = ap.parse_args()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest = {} if args.force else load_manifest()
+
+    files = sorted(f for f in os.listdir(TARGET_DIR) if f.lower().endswith(".png"))
+    todo, new_manifest = [], {}
+    for file in files:
+        build, info = needs_build(file, manifest.get(file))
+        new_manifest[file] = info
+        if build: todo.append(file)
+    print(f"📦 {len(files)} 枚中 {len(todo)} 枚を処理します（スキップ {len(files) - len(todo)} 枚, {args.workers} プロセス）")
+
+    t0 = time.perf_counter()
+    src_total = card_total = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(build_thumbs, f): f for f in todo}
+        for fut in as_completed(futures):
+            file = futures[fut]
+            try:
+                r = fut.result()
+            except Exception as e:
+                # 失敗した画像は次回もう一度処理する
+                new_manifest.pop(file, None)
+                print(f"⚠️ {file}: {e}")
+                continue
+            new_manifest[file].update(outputs=r["outputs"], lqip=r["lqip"])
+            src_total += r["src_bytes"]; card_total += r["card_bytes"]
+            print(f"✅ {file}: {r['src_bytes'] // 1024} KB → {len(r['outputs'])} 個（カード用 {r['card_bytes'] // 1024} KB）")
+    elapsed = time.perf_counter() - t0
+
+    # ハッシュ未計算のまま残ったエントリ（mtime 一致でスキップ）も前回の値を引き継いでいる
+    save_manifest(new_manifest)
+
+    rate = len(todo) / elapsed if elapsed > 0 else 0.0
+    saved = src_total - card_total
+    print(f"🎉 {len(todo)} 枚 / {elapsed:.2f} 秒（{rate:.1f} 枚/秒）"
+          f" 元画像 {src_total / 1e6:.1f} MB → カード用 {card_total / 1e6:.2f} MB（{saved / 1e6:.1f} MB 削減）")
+
+    if args.sprite:
+        sprite = build_sprite(new_manifest, force=args.force)
+        if sprite is None:
+            print("🧩 スプライトシートは最新です")
+        else:
+            sizes = ", ".join(f"{fmt} {os.path.getsize(os.path.join(TARGET_DIR, p)) // 1024} KB" for fmt, p in sprite["sheets"].items())
+            print(f"🧩 {len(sprite['tiles'])} 枚を {sprite['cols']}×{sprite['rows']} のスプライトにまとめました（{sizes}）")
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# ⏱ 再実行ごとの計測（フェーズ別の時間・送った HTML のバイト数・キャッシュのヒット/ミス）
+#
+# Streamlit は操作のたびにスクリプト全体を再実行するので、1 回の再実行を 1 件として測る。
+# - 有効にするのは APP_PROFILE=1（全セッション）か、URL に ?debug=1（そのセッションだけ）
+# - 無効のときの phase() / count() は何もしない（計測のための時計も読まない）
+# - 有効なら 1 再実行につき JSON 1 行のログを出す（複数レプリカのログを集計できるよう host/pid つき）
+#   出力先は PROFILE_LOG（ファイル）、未指定なら標準エラー
+#
+#   with prof.phase("cards"): ...        # 同じ名前は合算
+#   prof.count("card_hit")               # 回数
+#   prof.add_bytes(len(html))            # 送ったバイト数
+
+from __future__ import annotations
+import json, logging, os, socket, sys, time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+PROFILE_ENV = os.environ.get("APP_PROFILE", "0") not in ("", "0", "false")
+PROFILE_LOG = os.environ.get("PROFILE_LOG") or None
+
+logger = logging.getLogger("candidates.profile")
+
+
+def _setup_logger():
+    # Streamlit のロガー設定に混ざらないよう、専用のハンドラで「メッセージだけ」を出す
+    if logger.handlers: return
+    handler = logging.FileHandler(PROFILE_LOG, encoding="utf-8") if PROFILE_LOG else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class RerunProfile:
+    def __init__(self, enabled: bool = PROFILE_ENV, **context: Any):
+        self.enabled = enabled
+        self.context = context   # view / データ版など、ログに一緒に残すもの
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield; return
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            # st.rerun() などの例外で抜けても、そこまでの時間は数える
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - t
+
+    def count(self, name: str, n: int = 1):
+        if self.enabled: self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_bytes(self, n: int):
+        if self.enabled: self.bytes_sent += n
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def record(self) -> Dict[str, Any]:
+        return {
+            "event": "rerun", "ts": round(time.time(), 3), "host": socket.gethostname(), "pid": os.getpid(),
+            **self.context,
+            "total_ms": round(self.elapsed() * 1000, 2),
+            "phases_ms": {k: round(v * 1000, 2) for k, v in self.phases.items()},
+            "counters": dict(self.counters),
+            "bytes_sent": self.bytes_sent,
+        }
+
+    def log(self):
+        if not self.enabled: return
+        _setup_logger()
+        logger.info(json.dumps(self.record(), ensure_ascii=False, separators=(",", ":")))
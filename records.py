@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# 🗜 候補者レコードの省メモリ表現（__slots__ + 文字列の共有 + スタンスのバイト列）
+#
+# 候補者 1 人を 15 個ほどのキーの dict（＋争点 6 つを毎回同じキーで持つ comparisons の dict）で持つと、
+# ハッシュ表だけで 1 人あたり 1 KB 近くになる。Catalog に載せるときは CandidateRecord に詰め直す。
+# - よく出る項目は __slots__ の属性（インスタンスごとの dict を持たない）
+#   政党・地域・重点政策・イニシャルは sys.intern で全員分を 1 つの文字列に寄せる
+# - 公約 promise1..N はタプル 1 つ、スタンスは TOPIC_ORDER の順に 1 争点 1 バイト
+#   （バイトは表記の語彙表の番号。0 = 回答なし。「条件付き賛成」などの表記はそのまま残し、正規化は表示側で行う）
+# - それ以外の項目（kana・photo・未知の項目、TOPIC_ORDER にない争点）は extra の dict に入れる（無ければ None）
+#   値が None の項目も「項目はあるが None」として extra に None で持つ（属性の None は「項目なし」）
+# - Mapping なので c["name"] / c.get(...) / dict(c) / for k in c がそのまま使える（render.py などは dict と同じに扱える）
+#   JSON にするときは dict(c) にしてから。dict(compact(c)) == c（None の項目も残る）
+
+from __future__ import annotations
+import re, sys, threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List
+from stances import TOPIC_ORDER
+
+_FIELDS = ("id", "name", "initial", "age", "region", "career", "party", "keyPolicy", "brief")
+_FIELD_SET = frozenset(_FIELDS)
+_INTERNED = ("initial", "region", "party", "keyPolicy")
+_PROMISE_KEY = re.compile(r"promise([1-9]\d*)$")
+_TOPIC_INDEX = {t: i for i, t in enumerate(TOPIC_ORDER)}
+
+# スタンスの表記の語彙表（番号 0 は「なし」）。プロセス内で共有し、追記のみ
+_STANCE_VOCAB: List[str] = [""]
+_STANCE_CODE: Dict[str, int] = {}
+_VOCAB_LOCK = threading.Lock()
+
+def _stance_byte(raw: Any) -> int | None:
+    if not isinstance(raw, str) or not raw: return None
+    b = _STANCE_CODE.get(raw)
+    if b is None:
+        with _VOCAB_LOCK:
+            b = _STANCE_CODE.get(raw)
+            if b is None:
+                if len(_STANCE_VOCAB) > 255: return None   # 1 バイトに収まらない表記は extra に逃がす
+                b = _STANCE_CODE[raw] = len(_STANCE_VOCAB)
+                _STANCE_VOCAB.append(raw)
+    return b
+
+def _intern(v: Any) -> Any:
+    return sys.intern(v) if type(v) is str else v
+
+
+class CandidateRecord(Mapping):
+    __slots__ = ("id", "name", "initial", "age", "region", "career", "party", "keyPolicy", "brief",
+                 "promises", "stances", "extra")
+
+    @classmethod
+    def from_dict(cls, c: Mapping[str, Any]) -> "CandidateRecord":
+        r = cls.__new__(cls)
+        get = c.get
+        r.id, r.name, r.career, r.brief, r.age = c["id"], get("name"), get("career"), get("brief"), get("age")
+        r.initial, r.region, r.party, r.keyPolicy = (_intern(get(k)) for k in _INTERNED)
+        promises: Dict[int, str] = {}
+        extra: Dict[str, Any] = {}
+        r.stances = None
+        for k, v in c.items():
+            if k in _FIELD_SET and v is not None: continue
+            if v is None:
+                extra[k] = None
+            elif k == "comparisons" and isinstance(v, Mapping):
+                buf, rest = bytearray(len(TOPIC_ORDER)), {}
+                for topic, raw in v.items():
+                    i = _TOPIC_INDEX.get(topic)
+                    b = _stance_byte(raw) if i is not None else None
+                    if b is None: rest[topic] = raw
+                    else: buf[i] = b
+                r.stances = bytes(buf)
+                if rest: extra["comparisons"] = rest
+            elif (m := _PROMISE_KEY.match(k)) and isinstance(v, str):
+                promises[int(m[1])] = v
+            else:
+                extra[k] = v
+        r.promises = tuple(promises.get(i) for i in range(1, max(promises, default=0) + 1))
+        r.extra = extra or None
+        return r
+
+    def __reduce__(self):
+        # スタンスの番号はプロセスごとの語彙表なので、別プロセスへは dict で渡して詰め直す
+        return CandidateRecord.from_dict, (dict(self),)
+
+    # ---------- 争点 ----------
+    def comparisons(self) -> Dict[str, str]:
+        out = {t: _STANCE_VOCAB[b] for t, b in zip(TOPIC_ORDER, self.stances or b"") if b}
+        if self.extra and (rest := self.extra.get("comparisons")): out.update(rest)
+        return out
+
+    def _has_comparisons(self) -> bool:
+        return self.stances is not None or bool(self.extra and self.extra.get("comparisons") is not None)
+
+    # ---------- Mapping ----------
+    def __getitem__(self, k: str) -> Any:
+        if k in _FIELD_SET:
+            v = getattr(self, k)
+            if v is not None: return v
+        elif k == "comparisons":
+            if self._has_comparisons(): return self.comparisons()
+        elif isinstance(k, str) and (m := _PROMISE_KEY.match(k)):
+            i = int(m[1]) - 1
+            if i < len(self.promises) and self.promises[i] is not None: return self.promises[i]
+        if self.extra and k in self.extra:   # 未知の項目と「あるが None」の項目
+            return self.extra[k]
+        raise KeyError(k)
+
+    def get(self, k: str, default: Any = None) -> Any:
+        if k in _FIELD_SET:   # よく引く項目は例外を経由しない
+            v = getattr(self, k)
+            return default if v is None and not (self.extra and k in self.extra) else v
+        try:
+            return self[k]
+        except KeyError:
+            return default
+
+    def __contains__(self, k: object) -> bool:
+        try:
+            self[k]   # type: ignore[index]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        for f in _FIELDS:
+            if getattr(self, f) is not None: yield f
+        for i, p in enumerate(self.promises, 1):
+            if p is not None: yield f"promise{i}"
+        if self._has_comparisons(): yield "comparisons"
+        if self.extra: yield from (k for k, v in self.extra.items() if k != "comparisons" or v is None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"CandidateRecord({dict(self)!r})"
+
+
+def compact(c: Mapping[str, Any]) -> CandidateRecord:
+    return c if isinstance(c, CandidateRecord) else CandidateRecord.from_dict(c)
@@ -0,0 +1,503 @@
+# -*- coding: utf-8 -*-
+# 🎨 画面の部品（CSS・顔写真/党アイコン・カード/詳細 HTML）
+#
+# Streamlit に依存しないので、アプリ（test.py）と静的サイト書き出し（static_export.py）の両方から使う。
+
+from __future__ import annotations
+import base64, hashlib, html, json, os, re
+from functools import lru_cache
+from pathlib import Path
+from textwrap import dedent
+from typing import Any, Dict, Iterable, List, NamedTuple
+import assets
+from photos import assign_photo
+from stances import TOPIC_ORDER, STANCE_META, _normalize_stance
+
+# --------------------------------
+# CSS（画面遷移のアニメーション含む）
+# --------------------------------
+# 政党ごとの .photo-* / .party-* はここに書かず、PARTY_COLORS とデータ中の政党から build_css() で作る
+BASE_CSS = """
+.stApp {
+  background: linear-gradient(135deg, #ECECFF 0%, #F8F8FF 100%);
+  font-family: -apple-system, BlinkMacSystemFont, "Hiragino Sans", "Yu Gothic", "Noto Sans JP", sans-serif;
+}
+
+/* ヘッダー */
+.app-header { color:#4a4a6a; margin: 6px 0 18px; }
+.app-header h1 { font-size:2.0rem; margin-bottom:.2rem; text-shadow: 2px 2px 4px rgba(0,0,0,0.2); }
+.app-header .subtitle { font-size:1rem; opacity:.9; }
+
+/* ヘッダーは左・中央・右の3列。中央見出しは常に真正面 */
+.header-row{ display:grid; grid-template-columns: 1fr auto 1fr; align-items:center; }
+.header-center{ text-align:center; }
+.header-right{ justify-self:end; }
+
+/* 地域バッジ */
+.region-badge{
+  display:inline-block; padding:6px 12px; border-radius:999px;
+  background:#eef2ff; color:#334155; border:1px solid #c7d2fe;
+  font-weight:700; white-space:nowrap; box-shadow:0 1px 2px rgba(0,0,0,.06);
+}
+.region-note{ font-size:.85em; color:#64748b; margin-left:.4em; }
+
+/* 画面コンテナ & アニメーション */
+.page { background: transparent; }
+@media (prefers-reduced-motion: no-preference) {
+  .enter-left  { animation: slideInFromLeft .28s ease both; }
+  .enter-right { animation: slideInFromRight .28s ease both; }
+}
+@keyframes slideInFromLeft {
+  from { opacity: 0; transform: translateX(-10px); }
+  to   { opacity: 1; transform: translateX(0); }
+}
+@keyframes slideInFromRight {
+  from { opacity: 0; transform: translateX(10px); }
+  to   { opacity: 1; transform: translateX(0); }
+}
+
+/* フィルタ表示（チップ）*/
+.chips { display:flex; gap:8px; flex-wrap:wrap; align-items:center; background:#f8f9ff; border-radius:8px; padding:8px 12px; }
+.chip-label { font-weight:700; color:#666; margin-right:4px; }
+.chip { display:inline-flex; align-items:center; gap:6px; background:white; padding:6px 12px; border-radius:20px; font-size:.85em; color:#333; 
+        box-shadow: 0 2px 4px rgba(0,0,0,.08); }
+
+/* 候補者カード */
+.candidate-card { background:white; border-radius:16px; padding:16px; text-align:center; 
+  box-shadow: 0 4px 12px rgba(0,0,0,.08); transition: transform .2s ease, box-shadow .2s ease, border .2s ease; border: 2px solid transparent; }
+.candidate-card:hover { transform: translateY(-6px); box-shadow: 0 8px 24px rgba(0,0,0,.12); }
+.candidate-card.selected { border: 3px solid #667eea; box-shadow: 0 8px 24px rgba(102,126,234,.3); }
+
+.candidate-photo { width:120px; height:120px; border-radius:50%; margin: 0 auto 12px; display:flex; align-items:center; justify-content:center; 
+  color:white; font-size:2.4rem; font-weight:700; box-shadow: 0 5px 15px rgba(0,0,0,.2); border: 3px solid; overflow:hidden; position:relative; }
+.candidate-name { font-size:1.1rem; font-weight:700; color:#333; margin-bottom:6px; }
+.candidate-tags { font-size:.85rem; color:#888; margin-bottom:8px; display:flex; gap:8px; justify-content:center; flex-wrap:wrap; }
+.tag { background:#f0f0f0; padding:3px 8px; border-radius:4px; white-space:nowrap; }
+.candidate-party { display:inline-block; padding: 4px 12px; border-radius: 20px; font-size:.9rem; margin-bottom:8px; font-weight:700; border: 2px solid; }
+.party-icon { margin-right:6px; font-size:1.1em; }
+.candidate-brief { font-size:.9rem; color:#777; line-height:1.5; min-height: 3em; }
+
+/* 詳細カード（モーダル相当）*/
+.detail-card { background:white; border-radius:16px; padding:24px; box-shadow: 0 8px 32px rgba(0,0,0,.15); }
+.detail-header { text-align:center; padding-bottom:12px; border-bottom: 2px solid #f0f0f0; margin-bottom:16px; }
+.modal-photo { width:150px; height:150px; border-radius:50%; margin: 0 auto 12px; display:flex; align-items:center; justify-content:center; 
+  color:white; font-size:3rem; font-weight:700; box-shadow: 0 10px 25px rgba(0,0,0,.2); border: 4px solid; overflow:hidden; position:relative; }
+.section-title { font-size:1.2rem; font-weight:700; color:#667eea; margin: 16px 0 8px; padding-left: 12px; border-left: 4px solid #667eea; }
+.manifesto-list { list-style:none; padding-left:0; margin:0; }
+.manifesto-list li { padding:12px; margin: 0 0 10px; background:#f8f9ff; border-left: 4px solid #667eea; border-radius:5px; }
+.candidate-photo img,.modal-photo img{ width:100%; height:100%; object-fit:cover; display:block; }
+.candidate-photo picture,.modal-photo picture{ width:100%; height:100%; display:block; }
+/* 読み込み中のプレースホルダ（ぼかした縮小画像かイニシャル）。本物の画像はその上に重なる */
+.photo-ph{ position:absolute; inset:0; display:flex; align-items:center; justify-content:center; background-size:cover; background-position:center; }
+.photo-ph.lqip{ filter:blur(6px); transform:scale(1.15); }
+.photo-ph ~ *{ position:relative; }
+
+/* 主なスタンス 表 */
+.stance-table{ width:100%; border-collapse:collapse; margin-top:8px; font-size:14px; }
+.stance-table th, .stance-table td{ padding:10px 12px; border-top:1px solid #eee; vertical-align:middle; text-align:center; }
+.stance-table th{ width:60%; color:#333; font-weight:600; }
+
+/* バッジ */
+.stance-badge{ display:inline-block; padding:8px 16px; border-radius:999px; font-weight:700; line-height:1.25; letter-spacing:.02em; box-shadow:inset 0 0 0 1px rgba(0,0,0,.05); white-space:nowrap; }
+@media (min-width: 900px){ .stance-badge{ font-size:1.15rem; padding:10px 18px; } }
+.stance-badge.pro{      background:#e6f4ea; color:#137333; }  /* 緑: 賛成 */
+.stance-badge.partial1{ background:#fff7e5; color:#8a6d1d; }  /* 黄: 一部賛成 */
+.stance-badge.neutral{  background:#f1f3f4; color:#3c4043; }  /* 灰: 中立 */
+.stance-badge.partial2{ background:#fff3e0; color:#8a6d1d; }  /* 橙: 一部反対 */
+.stance-badge.con{      background:#fce8e6; color:#c5221f; }  /* 赤: 反対 */
+.stance-badge.unknown{  background:#e8f0fe; color:#1967d2; }  /* 青: 未回答 */
+
+.stance-legend{ margin-top:4px; font-size:12px; color:#666; display:flex; gap:8px; flex-wrap:wrap; justify-content:center; }
+
+/* 相性診断の一致度 */
+.match-score{ text-align:center; font-weight:700; color:#667eea; margin-bottom:6px; }
+.data-footer{ text-align:center; font-size:.75rem; color:#9ca3af; margin:28px 0 8px; }
+
+/* 党アイコンの画像サイズ */
+.party-icon img{ width:1.15em; height:1.15em; object-fit:contain; vertical-align:-0.18em; display:inline-block; }
+
+/* ===== 中央寄せ（本文幅を絞って読みやすく） ===================== */
+.block-container{ max-width: 1080px; margin-left:auto; margin-right:auto; padding: 0 16px; }
+.app-header, .chips, .detail-card{ max-width: 880px; margin-left:auto; margin-right:auto; }
+""".strip("\n")
+
+# ---------- 政党カラー（.photo-政党 / .party-政党 を生成） ----------
+class PartyColor(NamedTuple):
+    start: str                  # 顔写真のグラデーション（始点）
+    end: str                    # 同（終点）。政党バッジの文字・枠の色にも使う
+    border: str                 # 顔写真の枠
+    light: str                  # 政党バッジの背景
+    outline: str | None = None  # 政党バッジの枠（省略時は end）
+
+PARTY_COLORS: Dict[str, PartyColor] = {
+    "自民党":     PartyColor("#3d94c3", "#2b7a9e", "#236680", "#e8f4f8"),
+    "民主党":     PartyColor("#e89060", "#d77840", "#b8623a", "#fff5ed"),
+    "立憲民主党": PartyColor("#9a5fb8", "#7d4a9a", "#603b7a", "#f5eef8"),
+    "立憲社会党": PartyColor("#9a5fb8", "#7d4a9a", "#603b7a", "#f5eef8"),  # 互換：古いデータの表記
+    "社民党":     PartyColor("#55a563", "#3d8b4a", "#2e6b38", "#eef8f0"),
+    "共産党":     PartyColor("#e66b6b", "#c83e3e", "#a83232", "#fdeaea"),
+    "社会党":     PartyColor("#4F8FCB", "#2E6FA6", "#2E6FA6", "#e8f1fb"),
+    "無所属":     PartyColor("#616161", "#424242", "#212121", "#f5f5f5", "#757575"),
+}
+
+_CLASS_SAFE = re.compile(r"[^\W\d][\w-]*")
+
+def party_slug(party: str) -> str:
+    """クラス名に使う政党の表記。そのまま使えない名前（記号・空白入り）はハッシュにする。"""
+    if _CLASS_SAFE.fullmatch(party): return party
+    return "p" + hashlib.sha1(party.encode("utf-8")).hexdigest()[:8]
+
+def party_color(party: str) -> PartyColor:
+    """表にない政党は名前から色相を決める（名前が同じなら毎回同じ色）。"""
+    if party in PARTY_COLORS: return PARTY_COLORS[party]
+    hue = int(hashlib.sha1(party.encode("utf-8")).hexdigest()[:4], 16) % 360
+    hsl = lambda s, l: f"hsl({hue},{s}%,{l}%)"
+    return PartyColor(hsl(45, 55), hsl(50, 42), hsl(55, 32), hsl(60, 95))
+
+def party_css(party: str) -> str:
+    k, c = party_slug(party), party_color(party)
+    return (f".photo-{k}{{ background: linear-gradient(135deg, {c.start} 0%, {c.end} 100%); border-color:{c.border}; }}\n"
+            f".party-{k}{{ background:{c.light}; color:{c.end}; border-color:{c.outline or c.end}; }}\n")
+
+def build_css(parties: Iterable[str] = ()) -> str:
+    """共通 CSS ＋ 表にある政党とデータに出てくる政党のクラス。"""
+    names = list(dict.fromkeys([*PARTY_COLORS, *parties]))
+    return BASE_CSS + "\n\n/* 政党カラー（自動生成） */\n" + "".join(party_css(p) for p in names) + sprite_css()
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCT = re.compile(r"\s*([{};:,>])\s*")
+
+def minify_css(css: str) -> str:
+    css = _CSS_COMMENT.sub("", css)
+    css = _CSS_SPACE.sub(" ", css)
+    css = _CSS_PUNCT.sub(r"\1", css)
+    return css.replace(";}", "}").strip()
+
+def publish_css(parties: Iterable[str] = (), extra: str = "", name: str = "app") -> str:
+    """最小化した CSS を static/css/名前.ハッシュ.css に置き、static/ からの相対パスを返す。"""
+    css = minify_css(build_css(parties) + extra)
+    return assets.publish_bytes(f"{name}.css", css.encode("utf-8"), "css", STATIC_DIR)
+
+def stylesheet_tag(parties: Iterable[str] = ()) -> str:
+    """ページに入れるタグ。静的配信ならハッシュ付き URL の <link>（中身が変わった時だけ URL が変わる）。"""
+    parties = tuple(parties)
+    if IMAGE_MODE == "inline":
+        return f"<style>{minify_css(build_css(parties))}</style>"
+    rel = publish_css(parties)
+    href = f"{STATIC_BASE_URL}/{rel}" if STATIC_BASE_URL is not None else assets.asset_url(rel)
+    return f'<link rel="stylesheet" href="{href}">'
+
+# ---------- 党アイコン ----------
+PARTY_ICON_DEFAULT = {
+    "自民党":"🏛️","民主党":"👨‍👩‍👧","立憲民主党":"🏥","社民党":"🌿","共産党":"🗣️","社会党":"🏫","無所属":"🧭"
+}
+
+@lru_cache(maxsize=None)
+def _data_uri_from_file(path: str) -> str:
+    p = Path(path)
+    if not p.exists(): return ""
+    ext = p.suffix.lower()
+    mime = "image/png" if ext == ".png" else ("image/jpeg" if ext in [".jpg",".jpeg"] else "image/png")
+    b64 = base64.b64encode(p.read_bytes()).decode("ascii")
+    return f"data:{mime};base64,{b64}"
+
+# 画像の渡し方: "static"=ハッシュ付きURLで静的配信（既定） / "inline"=base64 データURIを埋め込み
+IMAGE_MODE = os.environ.get("IMAGE_MODE", "static")
+
+# 公開先と URL の付け方（static_export.py は出力先の static/ と相対 URL に差し替える）
+STATIC_DIR = assets.STATIC_DIR
+STATIC_BASE_URL: str | None = None   # None なら assets.asset_url（ASSET_BASE_URL / app/static）
+
+@lru_cache(maxsize=None)
+def _static_url_from_file(path: str) -> str:
+    rel = assets.publish_file(path, STATIC_DIR)
+    if not rel: return ""
+    return f"{STATIC_BASE_URL}/{rel}" if STATIC_BASE_URL is not None else assets.asset_url(rel)
+
+def _image_src(path: str) -> str:
+    if IMAGE_MODE == "inline": return _data_uri_from_file(path)
+    return _static_url_from_file(path)
+
+# 必要なら党ロゴを画像に
+PARTY_ICON_FILES = {
+    "自民党":"zimin.png",
+    "民主党":"minsh.png",
+    "立憲民主党":"rikken.png",  # ← 立憲民主党に修正
+    "社民党":"shamin.png",
+}
+
+@lru_cache(maxsize=None)
+def party_icon_table() -> tuple[Dict[str, str], List[str]]:
+    """(政党→アイコンHTML, 見つからなかった画像) を一度だけ作る。"""
+    table, missing = dict(PARTY_ICON_DEFAULT), []
+    for party, path in PARTY_ICON_FILES.items():
+        tag = sprite_html(path, party)
+        if tag:
+            table[party] = tag; continue
+        uri = _image_src(path)
+        if uri: table[party] = f'<img src="{uri}" alt="{party}">'
+        else:   missing.append(path)
+    return table, missing
+
+def get_party_icon(party: str, fallback: str | None) -> str:
+    return fallback or party_icon_table()[0].get(party, "🏛️")
+
+# ---------- サムネイル（png.py が thumbs/ に作る「名前-サイズ.拡張子」） ----------
+THUMB_DIR = Path("thumbs")
+# <source> に出す順（ブラウザは対応している最初のものを使う）。PNG は <img> のフォールバック
+THUMB_SOURCES = [("avif", "image/avif"), ("webp", "image/webp")]
+
+@lru_cache(maxsize=None)
+def _thumb_index() -> Dict[str, Dict[str, Dict[int, str]]]:
+    """{元ファイル名: {拡張子: {サイズ: パス}}}"""
+    idx: Dict[str, Dict[str, Dict[int, str]]] = {}
+    if THUMB_DIR.is_dir():
+        for p in THUMB_DIR.iterdir():
+            m = re.fullmatch(r"(.+)-(\d+)\.(png|webp|avif)", p.name)
+            if m: idx.setdefault(f"{m[1]}.png", {}).setdefault(m[3], {})[int(m[2])] = str(p)
+    return idx
+
+@lru_cache(maxsize=None)
+def _placeholders() -> Dict[str, str]:
+    """{元ファイル名: ぼかしプレースホルダのデータ URI}（png.py がマニフェストの lqip に書いたもの）"""
+    try:
+        m = json.loads((THUMB_DIR / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return {f: e["lqip"] for f, e in m.items() if isinstance(e, dict) and e.get("lqip")}
+
+def _fit_size(sizes, need: int) -> int:
+    # 枠に収まる最小のサイズ（足りなければ手持ちの最大）
+    fit = [s for s in sizes if s >= need]
+    return min(fit) if fit else max(sizes)
+
+def _srcset(by_size: Dict[int, str], px: int) -> str:
+    picks, seen = [], set()
+    for d in (1, 2):
+        s = _fit_size(by_size, px * d)
+        if s in seen: continue
+        seen.add(s); picks.append(f"{_image_src(by_size[s])} {d}x")
+    return ", ".join(picks)
+
+def photo_img_html(fn: str, px: int, alt: str, lazy: bool = False) -> str:
+    """表示枠 px に合う最小のサムネイルを <picture>（AVIF/WebP/PNG, 1x/2x）で返す。"""
+    alt = html.escape(alt)
+    # lazy: 画面外のカードの画像は見えるまで取りにいかず、デコードも描画を止めない
+    attrs = ' loading="lazy" decoding="async"' if lazy else ""
+    variants = _thumb_index().get(fn, {})
+    pngs = variants.get("png")
+    if not pngs:
+        return f'<img src="{_image_src(fn)}" alt="{alt}"{attrs}>'
+    src = _image_src(pngs[_fit_size(pngs, px)])
+    if IMAGE_MODE == "inline":
+        # データURIは重いので 1x の PNG 1 枚だけ
+        return f'<img src="{src}" alt="{alt}"{attrs}>'
+    sources = "".join(
+        f'<source type="{mime}" srcset="{_srcset(variants[ext], px)}">'
+        for ext, mime in THUMB_SOURCES if ext in variants
+    )
+    return f'<picture>{sources}<img src="{src}" srcset="{_srcset(pngs, px)}" alt="{alt}"{attrs}></picture>'
+
+# ---------- スプライトシート（png.py --sprite が thumbs/sprite.json を作ったときだけ使う） ----------
+# 一覧カードの顔写真と党ロゴを 1 枚の画像の背景位置で描くので、カードが何枚でも画像の取得は 1 回で済む
+SPRITE_MANIFEST = THUMB_DIR / "sprite.json"
+PHOTO_SPRITE = os.environ.get("PHOTO_SPRITE", "1") != "0"
+SPRITE_FORMATS = [("avif", "image/avif"), ("webp", "image/webp"), ("png", "image/png")]
+
+@lru_cache(maxsize=None)
+def _sprite() -> Dict[str, Any] | None:
+    # データ URI 埋め込み（inline）では CSS から画像を参照できないので使わない
+    if not PHOTO_SPRITE or IMAGE_MODE == "inline" or not SPRITE_MANIFEST.exists(): return None
+    try:
+        m = json.loads(SPRITE_MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if "png" not in m.get("sheets", {}) or not all(Path(p).exists() for p in m["sheets"].values()): return None
+    return m
+
+def _sprite_class(fn: str) -> str:
+    return "sp-" + re.sub(r"[^\w-]", "_", Path(fn).stem)
+
+def sprite_html(fn: str, alt: str) -> str | None:
+    sp = _sprite()
+    if not sp or fn not in sp["tiles"]: return None
+    return f'<span class="sp {_sprite_class(fn)}" role="img" aria-label="{html.escape(alt)}"></span>'
+
+def sprite_css() -> str:
+    """スプライトの CSS（位置は % 指定なので、カード 120px でも党ロゴ 1.15em でも同じ規則で使える）。"""
+    sp = _sprite()
+    if not sp: return ""
+    # CSS は static/css/、画像は static/img/ に置かれるので相対 URL で参照する
+    urls = {fmt: "../" + assets.publish_file(p, STATIC_DIR) for fmt, p in sp["sheets"].items()}
+    image_set = ", ".join(f'url({urls[fmt]}) type("{mime}")' for fmt, mime in SPRITE_FORMATS if fmt in urls)
+    cols, rows = sp["cols"], sp["rows"]
+    pct = lambda i, n: f"{i * 100 / (n - 1):g}%" if n > 1 else "0"
+    rules = [
+        f".sp{{ display:block; width:100%; height:100%; background-repeat:no-repeat; "
+        f"background-size:{cols * 100}% {rows * 100}%; background-image:url({urls['png']}); "
+        f"background-image:image-set({image_set}); }}",
+        ".party-icon .sp{ display:inline-block; width:1.15em; height:1.15em; vertical-align:-0.18em; }",
+    ]
+    rules += [f".{_sprite_class(fn)}{{ background-position:{pct(c, cols)} {pct(r, rows)}; }}"
+              for fn, (c, r) in sp["tiles"].items()]
+    return "\n\n/* スプライト（自動生成） */\n" + "\n".join(rules) + "\n"
+
+def _photo_html(c: Dict[str, Any], px: int, photo: str | None = None, sprite: bool = False, lazy: bool = False) -> str:
+    # photo は Catalog.photos などで引き済みの割り当て（None ならここで決める）
+    fn = assign_photo(c) if photo is None else photo
+    initial = html.escape(c.get("initial",""))
+    if not fn: return initial
+    if sprite and (sp := sprite_html(fn, c.get("name",""))):
+        return sp   # スプライトは全カードで 1 枚の画像を共有するので、遅延読み込みもプレースホルダも要らない
+    img = photo_img_html(fn, px, c.get("name",""), lazy)
+    if not lazy or IMAGE_MODE == "inline": return img   # inline は画像が HTML に入っているので待ちがない
+    # 画像が届くまではぼかした縮小画像（なければイニシャル）を下に敷いておく
+    lqip = _placeholders().get(fn)
+    ph = (f'<span class="photo-ph lqip" style="background-image:url({lqip})"></span>' if lqip
+          else f'<span class="photo-ph">{initial}</span>')
+    return ph + img
+
+def configure(image_mode: str | None = None, static_dir: Path = assets.STATIC_DIR, base_url: str | None = None):
+    """画像の渡し方・公開先を切り替える（作り置きの URL やアイコンは捨てる）。引数なしで既定に戻る。"""
+    global IMAGE_MODE, STATIC_DIR, STATIC_BASE_URL
+    if image_mode is not None: IMAGE_MODE = image_mode
+    STATIC_DIR, STATIC_BASE_URL = Path(static_dir), base_url
+    for f in (_data_uri_from_file, _static_url_from_file, party_icon_table, _thumb_index, _placeholders, _sprite):
+        f.cache_clear()
+
+# --------------------------------
+# HTML
+# --------------------------------
+def header_html(region: str | None, region_others: int) -> str:
+    if region:
+        note = f"<span class='region-note'>※表記差 {region_others} 件</span>" if region_others>0 else ""
+        region_badge = f"<span class='region-badge'>🗺 {html.escape(region)}{note}</span>"
+    else:
+        region_badge = ""
+    return dedent(f"""
+    <div class="app-header">
+      <div class="header-row">
+        <div class="header-left"></div>
+        <div class="header-center">
+          <h1>選挙候補者情報システム</h1>
+          <p class="subtitle">候補者の公約・政策を確認して、あなたの一票を決めましょう</p>
+        </div>
+        <div class="header-right">{region_badge}</div>
+      </div>
+    </div>
+    """)
+
+def candidate_card_html(c: Dict[str, Any], photo: str | None = None) -> str:
+    party = c.get("party","無所属")
+    photo_class = f"photo-{party_slug(party)}"
+    party_class = f"party-{party_slug(party)}"
+    name = c.get("name","")
+    key_policy = c.get("keyPolicy","")
+    brief = c.get("brief","")
+    party_icon = get_party_icon(party, c.get("partyIcon"))
+    photo_html = _photo_html(c, 120, photo, sprite=True, lazy=True)
+
+    tags = []
+    if key_policy: tags.append(f'<span class="tag">🎯 {html.escape(key_policy)}</span>')
+    tags_html = "".join(tags)
+
+    return f"""
+    <div class="candidate-card">
+      <div class="candidate-photo {photo_class}">{photo_html}</div>
+      <div class="candidate-name">{html.escape(name)}</div>
+      <div class="candidate-tags">{tags_html}</div>
+      <div class="candidate-party {party_class}">
+        <span class="party-icon">{party_icon}</span>{html.escape(party)}
+      </div>
+      <div class="candidate-brief">{html.escape(brief)}</div>
+    </div>
+    """
+
+def detail_html(c: Dict[str, Any], photo: str | None = None) -> str:
+    party = c.get("party","無所属")
+    photo_class = f"photo-{party_slug(party)}"
+    party_class = f"party-{party_slug(party)}"
+    key_policy = c.get("keyPolicy","")
+    brief = c.get("brief","")
+    party_icon = get_party_icon(party, c.get("partyIcon"))
+    name = c.get("name","")
+    career = c.get("career","")
+    photo_html = _photo_html(c, 150, photo)
+
+    # 公約: promise1..N を数字順に
+    promises = []
+    for k, v in c.items():
+        if k.startswith("promise") and v:
+            m = re.findall(r"\d+", k); num = int(m[0]) if m else 0
+            promises.append((num, v))
+    promises.sort(key=lambda t: t[0])
+    manifesto_items = "\n".join([f"<li>{html.escape(v)}</li>" for _, v in promises])
+
+    # 主なスタンス
+    comparisons = c.get("comparisons", {}) or {}
+    comparisons_html = ""
+    if comparisons:
+        def _order_key(topic: str) -> int:
+            try: return TOPIC_ORDER.index(topic)
+            except ValueError: return len(TOPIC_ORDER) + 1
+
+        rows = []
+        for topic, raw in sorted(comparisons.items(), key=lambda kv: _order_key(kv[0])):
+            stance = _normalize_stance(raw)
+            m = STANCE_META.get(stance, STANCE_META["未回答"])
+            badge_class = m.get("class","unknown")
+            badge_icon  = m.get("icon","❓")
+            badge_desc  = html.escape(m.get("desc",""), quote=True)
+            t = html.escape(topic); s = html.escape(stance)
+            rows.append(
+                f'<tr><th class="stance-topic">{t}</th>'
+                f'<td class="stance-value"><span class="stance-badge {badge_class}" title="{badge_desc}">{badge_icon} {s}</span></td></tr>'
+            )
+        legend = ' '.join([
+            '<span class="stance-badge pro">✅ 賛成</span>',
+            '<span class="stance-badge partial1">⚖️ 一部賛成</span>',
+            '<span class="stance-badge neutral">➖ 中立</span>',
+            '<span class="stance-badge partial2">🤷‍♀️ 一部反対</span>',
+            '<span class="stance-badge con">❌ 反対</span>',
+            '<span class="stance-badge unknown">❓ 未回答</span>',
+        ])
+        rows_html = "\n".join(rows)
+        comparisons_html = dedent(f"""
+        <div class="section">
+          <div class="section-title">📌 主なスタンス</div>
+          <div class="stance-legend">{legend}</div>
+          <table class="stance-table" aria-label="政策ごとの賛否一覧">
+            <tbody>
+              {rows_html}
+            </tbody>
+          </table>
+        </div>
+        """).strip()
+
+    return dedent(f"""
+    <div class="detail-card">
+      <div class="detail-header">
+        <div class="modal-photo {photo_class}">{photo_html}</div>
+        <h2 style="margin:0 0 8px 0;">{html.escape(name)}</h2>
+        <div class="candidate-party {party_class}" style="display:inline-block;">
+          <span class="party-icon">{party_icon}</span>{html.escape(party)}
+        </div>
+      </div>
+      <div class="section">
+        <div class="section-title">📋 主な公約</div>
+        <ul class="manifesto-list">{manifesto_items}</ul>
+      </div>
+      <div class="section">
+        <div class="section-title">💼 経歴・実績</div>
+        <div style="line-height:1.8; color:#555;">{html.escape(career)}</div>
+      </div>
+      {comparisons_html}
+      <div class="section">
+        <div class="section-title">🎯 重点政策</div>
+        <p style="margin:0; font-weight:bold;">分野：{html.escape(key_policy)}</p>
+        <div style="line-height:1.8; color:#555;">{html.escape(brief)}</div>
+      </div>
+    </div>
+    """).strip()
+
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# 🧠 カード/詳細 HTML のキャッシュ（件数上限つき LRU）
+#
+# キーは (種類, 候補者ID, 内容ハッシュ, アセット版)。データが更新されると変わった候補者だけ
+# 内容ハッシュが変わって新しいキーになり、古いエントリは LRU で自然に追い出される。
+
+from __future__ import annotations
+import hashlib, json, threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+def record_digest(c: Dict[str, Any]) -> str:
+    """候補者レコードの内容ハッシュ（キー順に依存しない）。"""
+    raw = json.dumps(c if isinstance(c, dict) else dict(c), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class RenderCache:
+    """スレッドセーフな LRU。Streamlit の各セッション（スレッド）で共有する。"""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], str]) -> str:
+        with self._lock:
+            v = self._data.get(key)
+            if v is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return v
+            self.misses += 1
+        # 組み立てはロックの外で（同時に作られても結果は同じ）
+        v = build()
+        with self._lock:
+            self._data[key] = v
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return v
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,504 @@
+# -*- coding: utf-8 -*-
+# 🗄 候補者リポジトリ（ページが必要な行だけを返す窓口）
+#
+# - MemoryRepository: プロセス内の Catalog（索引・ビットマップ・列指向フレーム）から返す
+# - SqliteRepository: 組み込み DB（candidates / promises / stances + FTS5）に毎回問い合わせる
+#   全選挙区のデータを 1 つの DB に置いても、各セッションは表示する行しか読み込まない
+# - MappedRepository: 共有カタログファイル（catalog_file.py）を mmap して、索引は MemoryRepository と同じ絞り込みを使う
+#   同じホストの複数プロセスが 1 つのファイル（ページキャッシュ）を共有し、起動時に組み立てもしない
+# どれも同じメソッドを持つので、test.py は CANDIDATES_CATALOG / CANDIDATES_DB の有無で切り替えるだけ。
+#
+#   python repository.py build candidates.db [入力.jsonl|.csv|.parquet]   # 省略時は data.py
+
+from __future__ import annotations
+import json, os, re, sqlite3, sys, threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from catalog import Catalog, _majority, _norm_region, candidate_label
+from catalog_file import MappedCatalog
+from frame import build_frame
+from match import StanceMatrix
+from photos import assign_photo
+from render_cache import RenderCache, record_digest
+from search import NAME_PREFIX_BONUS, SEARCH_FIELDS, _field_text, normalize
+from stances import STANCE_MISSING, _normalize_stance, stance_code, topic_order_key
+
+ALL = "すべて"   # セレクトボックスの「絞り込みなし」
+
+
+def _is_all(v: str | None) -> bool:
+    return v is None or v == ALL
+
+
+# --------------------------------
+# プロセス内カタログ
+# --------------------------------
+SEARCH_MEMO_SIZE = 256   # リポジトリごとに覚えておく検索結果の数
+
+SearchHits = Tuple[Tuple[int, ...], int]   # (関連度順の文書番号, そのビットマップ)
+
+def search_hits(cat: Catalog | MappedCatalog, search: str) -> SearchHits | None:
+    """検索語に合う文書番号とビットマップ。空の検索は None（絞り込みなし）。"""
+    search = (search or "").strip()
+    if not search: return None
+    docs = tuple(cat.search.search_docs(search))
+    return docs, cat.facets.mask_of(docs)
+
+def _facet_masks(cat: Catalog | MappedCatalog, party: str, policy: str, hits: SearchHits | None,
+                 region: str | None = None) -> Dict[str, int]:
+    """条件ごとのビットマップ（"すべて"・空検索は全件）。地域は _norm_region してから引く。"""
+    facets = cat.facets
+    return {
+        "party":  facets.filter({"party": party}) if not _is_all(party) else facets.all,
+        "policy": facets.filter({"keyPolicy": policy}) if not _is_all(policy) else facets.all,
+        "region": facets.filter({"region": _norm_region(region)}) if not _is_all(region) else facets.all,
+        "search": hits[1] if hits else facets.all,
+    }
+
+# 検索語で索引を引くのがいちばん重いので、件数（facet_counts）と該当者（filter_docs）は
+# search_hits の結果を hits で受け取って使い回せる。省略時はその場で引く
+_UNSET: Any = object()
+
+def filter_docs(cat: Catalog | MappedCatalog, party: str, policy: str, search: str,
+                region: str | None = None, hits: SearchHits | None = _UNSET) -> Sequence[int]:
+    """条件に合う文書番号（検索語があれば関連度順、なければ並び順）。"""
+    if hits is _UNSET: hits = search_hits(cat, search)
+    masks = _facet_masks(cat, party, policy, hits, region)
+    mask = masks["party"] & masks["policy"] & masks["region"]
+    if not hits:
+        return cat.facets.docs(mask)
+    # 検索語があれば関連度順のまま、政党・政策のビットで絞る
+    docs = hits[0]
+    if mask != cat.facets.all:
+        allowed = set(cat.facets.docs(mask & masks["search"]))
+        docs = [d for d in docs if d in allowed]
+    return docs
+
+def apply_filters(cat: Catalog, party: str, policy: str, search: str, region: str | None = None,
+                  hits: SearchHits | None = _UNSET) -> List[Dict[str, Any]]:
+    return [cat.candidates[d] for d in filter_docs(cat, party, policy, search, region, hits)]
+
+def facet_counts(cat: Catalog | MappedCatalog, party: str, policy: str, search: str,
+                 hits: SearchHits | None = _UNSET) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """セレクトボックス用の件数。各ファセットは「自分以外の条件」で絞った範囲で数える。"""
+    if hits is _UNSET: hits = search_hits(cat, search)
+    masks = _facet_masks(cat, party, policy, hits)
+    party_within  = masks["policy"] & masks["search"]
+    policy_within = masks["party"]  & masks["search"]
+    party_counts  = cat.facets.counts("party", party_within)
+    policy_counts = cat.facets.counts("keyPolicy", policy_within)
+    party_counts[ALL]  = party_within.bit_count()
+    policy_counts[ALL] = policy_within.bit_count()
+    return party_counts, policy_counts
+
+
+class MemoryRepository:
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self._frame: pd.DataFrame | None = None
+        self._matrix: StanceMatrix | None = None
+        self._searches = RenderCache(SEARCH_MEMO_SIZE)
+
+    def _hits(self, search: str) -> SearchHits | None:
+        # 1 回の再実行で facet_counts と query が同じ検索語を引くので、結果をリポジトリ（＝版）ごとに覚えておく
+        search = (search or "").strip()
+        return self._searches.get_or_build(search, lambda: search_hits(self.catalog, search)) if search else None
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None: self._frame = build_frame(self.catalog.candidates)
+        return self._frame
+
+    def __len__(self) -> int:
+        return len(self.catalog.candidates)
+
+    def region_summary(self) -> Tuple[str | None, int]:
+        return self.catalog.region, self.catalog.region_others
+
+    def options(self, facet: str) -> Tuple[str, ...]:
+        return self.catalog.party_options if facet == "party" else self.catalog.policy_options
+
+    def facet_counts(self, party: str, policy: str, search: str):
+        return facet_counts(self.catalog, party, policy, search, self._hits(search))
+
+    def query(self, party: str, policy: str, search: str, offset: int = 0, limit: int | None = None,
+              region: str | None = None):
+        """(該当件数, offset から limit 件の候補者)。"""
+        docs = filter_docs(self.catalog, party, policy, search, region, self._hits(search))
+        end = None if limit is None else offset + limit
+        return len(docs), [self.catalog.candidates[d] for d in docs[offset:end]]
+
+    def get(self, cid: Any) -> Dict[str, Any] | None:
+        return self.catalog.get(cid)
+
+    def get_many(self, ids: Sequence[int]) -> List[Dict[str, Any]]:
+        return [self.catalog.by_id[i] for i in ids if i in self.catalog.by_id]
+
+    def same_party(self, c: Dict[str, Any], limit: int | None = None) -> List[Dict[str, Any]]:
+        return self.get_many(self.catalog.same_party_ids(c, limit))
+
+    def label_to_id(self) -> Mapping[str, int]:
+        return self.catalog.label_to_id
+
+    def compare_frame(self, ids: Sequence[int]) -> pd.DataFrame:
+        return self.frame
+
+    def stance_matrix(self) -> StanceMatrix:
+        if self._matrix is None: self._matrix = StanceMatrix.from_frame(self.frame)
+        return self._matrix
+
+    def digest(self, c: Dict[str, Any]) -> str:
+        return self.catalog.digests.get(c.get("id")) or record_digest(c)
+
+    def photo(self, c: Dict[str, Any]) -> str:
+        p = self.catalog.photos.get(c.get("id"))
+        return assign_photo(c) if p is None else p
+
+
+# --------------------------------
+# 共有カタログファイル（mmap）
+# --------------------------------
+class MappedRepository:
+    """索引は mmap の上のビューのまま引き、候補者は返す分だけ dict に戻す。"""
+
+    def __init__(self, path: str):
+        self.catalog = MappedCatalog(path)
+        self._memo: Dict[str, Any] = {}
+        self._searches = RenderCache(SEARCH_MEMO_SIZE)
+
+    def _hits(self, search: str) -> SearchHits | None:
+        search = (search or "").strip()
+        return self._searches.get_or_build(search, lambda: search_hits(self.catalog, search)) if search else None
+
+    def __len__(self) -> int:
+        return self.catalog.size
+
+    def region_summary(self) -> Tuple[str | None, int]:
+        return self.catalog.region, self.catalog.region_others
+
+    def options(self, facet: str) -> Tuple[str, ...]:
+        return self.catalog.party_options if facet == "party" else self.catalog.policy_options
+
+    def facet_counts(self, party: str, policy: str, search: str):
+        return facet_counts(self.catalog, party, policy, search, self._hits(search))
+
+    def query(self, party: str, policy: str, search: str, offset: int = 0, limit: int | None = None,
+              region: str | None = None):
+        docs = filter_docs(self.catalog, party, policy, search, region, self._hits(search))
+        end = None if limit is None else offset + limit
+        return len(docs), [self.catalog.candidates[d] for d in docs[offset:end]]
+
+    def get(self, cid: Any) -> Dict[str, Any] | None:
+        return self.catalog.get(cid)
+
+    def get_many(self, ids: Sequence[int]) -> List[Dict[str, Any]]:
+        return [c for c in map(self.catalog.get, ids) if c is not None]
+
+    def same_party(self, c: Dict[str, Any], limit: int | None = None) -> List[Dict[str, Any]]:
+        cat = self.catalog
+        docs = cat.facets.docs(cat.facets.filter({"party": c.get("party","無所属")}))
+        ids = sorted(i for i in (cat.ids[d] for d in docs) if i != c["id"])
+        return self.get_many(ids[:limit])
+
+    def label_to_id(self) -> Mapping[str, int]:
+        if "labels" not in self._memo:
+            cat = self.catalog
+            self._memo["labels"] = {cat.labels[d]: cat.ids[d] for d in range(cat.size)}
+        return self._memo["labels"]
+
+    def compare_frame(self, ids: Sequence[int]) -> pd.DataFrame:
+        return build_frame(self.get_many(ids))
+
+    def stance_matrix(self) -> StanceMatrix:
+        return self.catalog.stances
+
+    def digest(self, c: Dict[str, Any]) -> str:
+        doc = self.catalog.doc_of(c.get("id"))
+        return record_digest(c) if doc is None else self.catalog.digests[doc]
+
+    def photo(self, c: Dict[str, Any]) -> str:
+        doc = self.catalog.doc_of(c.get("id"))
+        return assign_photo(c) if doc is None else self.catalog.photos[doc]
+
+
+# --------------------------------
+# SQLite
+# --------------------------------
+SCHEMA = """
+CREATE TABLE candidates(
+  id          INTEGER PRIMARY KEY,
+  name        TEXT NOT NULL,
+  party       TEXT NOT NULL,
+  key_policy  TEXT,
+  region      TEXT,
+  region_norm TEXT,
+  age,                               -- 型なし（"45歳" などの文字列もそのまま戻す）
+  extra       TEXT NOT NULL          -- 上記以外の項目（initial, career, brief, photo …）と値が None の項目の JSON
+);
+CREATE TABLE promises(
+  candidate_id INTEGER NOT NULL REFERENCES candidates(id),
+  num          INTEGER NOT NULL,
+  text         TEXT NOT NULL,
+  PRIMARY KEY(candidate_id, num)
+) WITHOUT ROWID;
+CREATE TABLE stances(
+  candidate_id INTEGER NOT NULL REFERENCES candidates(id),
+  topic        TEXT NOT NULL,
+  raw          TEXT NOT NULL,        -- データに書かれていたままの値
+  stance       TEXT NOT NULL,        -- _normalize_stance 済み
+  score        INTEGER NOT NULL,     -- 賛成=2 … 反対=-2、未回答=STANCE_MISSING
+  PRIMARY KEY(candidate_id, topic)
+) WITHOUT ROWID;
+CREATE INDEX idx_candidates_party  ON candidates(party, id);
+CREATE INDEX idx_candidates_policy ON candidates(key_policy, id);
+CREATE INDEX idx_candidates_region ON candidates(region_norm, id);
+CREATE INDEX idx_stances_topic     ON stances(topic, stance);
+-- 検索用（SearchIndex と同じく search.SEARCH_FIELDS の項目ごとに search.normalize 済みの文字列）。rowid = candidates.id
+CREATE VIRTUAL TABLE candidates_fts USING fts5(name, kana, party, region, keyPolicy, brief, career, promise, tokenize='trigram');
+"""
+FTS_COLUMNS = tuple(f for f, _ in SEARCH_FIELDS)
+_PROMISE_KEY = re.compile(r"promise(\d+)$")
+_COLUMNS = ("id", "name", "party", "keyPolicy", "region", "age")
+
+
+def build_sqlite(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """レコードを 1 件ずつ書き込んで DB を作り、件数を返す（一時ファイルに作ってから置き換える）。"""
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp): os.remove(tmp)
+    con = sqlite3.connect(tmp)
+    try:
+        con.execute("PRAGMA journal_mode=MEMORY")
+        con.execute("PRAGMA synchronous=OFF")
+        con.executescript(SCHEMA)
+        n = 0
+        with con:
+            for c in records:
+                cid = c["id"]
+                promises = sorted((int(m[1]), v) for k, v in c.items() if (m := _PROMISE_KEY.match(k)) and v)
+                comps = c.get("comparisons") or {}
+                # 列に持つ項目でも「あるが None」は extra に残す（列の NULL は「項目なし」）
+                extra = {k: v for k, v in c.items()
+                         if (k not in _COLUMNS or v is None) and k != "comparisons" and not _PROMISE_KEY.match(k)}
+                party = c.get("party","無所属")
+                con.execute("INSERT INTO candidates VALUES (?,?,?,?,?,?,?,?)", (
+                    cid, c.get("name") or "", party or "", c.get("keyPolicy"), c.get("region"),
+                    _norm_region(c.get("region","")), c.get("age"), json.dumps(extra, ensure_ascii=False)))
+                # promise の番号は元のキー名（promise1…）をそのまま復元できるよう保存する
+                con.executemany("INSERT INTO promises VALUES (?,?,?)",
+                                [(cid, num, v) for num, v in promises])
+                con.executemany("INSERT INTO stances VALUES (?,?,?,?,?)",
+                                [(cid, t, raw, _normalize_stance(raw), stance_code(raw)) for t, raw in comps.items()])
+                con.execute(f"INSERT INTO candidates_fts(rowid, {', '.join(FTS_COLUMNS)}) "
+                            f"VALUES (?{',?' * len(FTS_COLUMNS)})",
+                            (cid, *(normalize(_field_text(c, f)) for f in FTS_COLUMNS)))
+                n += 1
+        con.execute("INSERT INTO candidates_fts(candidates_fts) VALUES('optimize')")
+        con.execute("ANALYZE")
+    finally:
+        con.close()
+    os.replace(tmp, path)
+    return n
+
+
+def _term_score(term: str) -> Tuple[str, List[str]]:
+    """1 語分のスコアの SQL 式と引数（SearchIndex._score と同じ重み。一致しなければ 0）。"""
+    cases, params = [], []
+    for f, w in SEARCH_FIELDS:
+        if f == "name":
+            cases.append(f"CASE instr(f.{f}, ?) WHEN 0 THEN 0 WHEN 1 THEN {w + NAME_PREFIX_BONUS} ELSE {w} END")
+        else:
+            cases.append(f"CASE WHEN instr(f.{f}, ?) > 0 THEN {w} ELSE 0 END")
+        params.append(term)
+    return f"max({', '.join(cases)})", params
+
+
+class SqliteRepository:
+    """読み取り専用。Streamlit のセッションはスレッドなので、接続はスレッドごとに持つ。"""
+
+    def __init__(self, path: str):
+        if not os.path.exists(path): raise FileNotFoundError(path)
+        self.path = path
+        self._local = threading.local()
+        self._memo: Dict[str, Any] = {}   # 全件に対する集計（地域・選択肢・ラベル・スタンス行列）は 1 回だけ
+
+    def _once(self, key: str, build):
+        if key not in self._memo: self._memo[key] = build()
+        return self._memo[key]
+
+    @property
+    def con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            con.execute("PRAGMA query_only=1")
+            con.execute("PRAGMA mmap_size=268435456")
+            self._local.con = con
+        return con
+
+    # ---------- 条件 → SQL ----------
+    def _where(self, party: str | None, policy: str | None, search: str | None, skip: str = "",
+               region: str | None = None):
+        """(FROM 句, WHERE 句, 引数, ORDER BY 句)。skip に "party"/"policy" を渡すとその条件を外す。"""
+        joins, clauses, params, order_params = "candidates c", [], [], []
+        order = "c.id"
+        if not _is_all(party) and skip != "party":
+            clauses.append("c.party = ?"); params.append(party)
+        if not _is_all(policy) and skip != "policy":
+            clauses.append("c.key_policy = ?"); params.append(policy)
+        if not _is_all(region):
+            clauses.append("c.region_norm = ?"); params.append(_norm_region(region))
+        # SearchIndex.search と同じ: 空白で区切った語をそれぞれ正規化し、どれかの項目に部分一致する語がすべてそろうこと。
+        # 並びは語ごとの「一致した項目の重みの最大（名前の先頭一致は加点）」の合計が大きい順、同点は ID 順
+        terms = [t for t in (normalize(w) for w in (search or "").split()) if t]
+        if (search or "").strip() and not terms:
+            clauses.append("0")   # 記号だけの検索（正規化すると空）は 0 件
+        if terms:
+            joins += " JOIN candidates_fts f ON f.rowid = c.id"
+            long_terms = [t for t in terms if len(t) >= 3]
+            # 3 文字以上は trigram 索引で先に絞る（2 文字以下は索引が効かないので走査になる）。
+            # 一致の判定はどちらも instr の部分一致で行う（trigram の大文字小文字の畳み込みに頼らない）
+            if long_terms:
+                clauses.append("candidates_fts MATCH ?")
+                params.append(" AND ".join('"' + t.replace('"', '""') + '"' for t in long_terms))
+            scores = []
+            for t in terms:
+                score, score_params = _term_score(t)
+                clauses.append(f"{score} > 0"); params += score_params
+                scores.append(score); order_params += score_params
+            order = f"{' + '.join(scores)} DESC, c.id"
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return joins, where, params, order, order_params
+
+    # ---------- 行 → 候補者 dict ----------
+    def _records(self, rows: List[tuple]) -> List[Dict[str, Any]]:
+        if not rows: return []
+        ids = [r[0] for r in rows]
+        marks = ",".join("?" * len(ids))
+        promises: Dict[int, List[tuple]] = {}
+        for cid, num, text in self.con.execute(
+                f"SELECT candidate_id, num, text FROM promises WHERE candidate_id IN ({marks}) ORDER BY candidate_id, num", ids):
+            promises.setdefault(cid, []).append((num, text))
+        comps: Dict[int, Dict[str, str]] = {}
+        for cid, topic, raw in self.con.execute(
+                f"SELECT candidate_id, topic, raw FROM stances WHERE candidate_id IN ({marks})", ids):
+            comps.setdefault(cid, {})[topic] = raw
+        out = []
+        for cid, name, party, key_policy, region, age, extra in rows:
+            c: Dict[str, Any] = {"id": cid, "name": name, "party": party}
+            if key_policy is not None: c["keyPolicy"] = key_policy
+            if region is not None: c["region"] = region
+            if age is not None: c["age"] = age
+            c.update(json.loads(extra))
+            for num, text in promises.get(cid, []): c[f"promise{num}"] = text
+            if cid in comps: c["comparisons"] = comps[cid]
+            out.append(c)
+        return out
+
+    _SELECT = "SELECT c.id, c.name, c.party, c.key_policy, c.region, c.age, c.extra"
+
+    # ---------- 問い合わせ ----------
+    def __len__(self) -> int:
+        return self._once("count", lambda: self.con.execute("SELECT COUNT(*) FROM candidates").fetchone()[0])
+
+    def region_summary(self) -> Tuple[str | None, int]:
+        return self._once("region", lambda: _majority(Counter(dict(self.con.execute(
+            "SELECT region_norm, COUNT(*) FROM candidates WHERE region_norm <> '' GROUP BY region_norm")))))
+
+    def options(self, facet: str) -> Tuple[str, ...]:
+        col = "party" if facet == "party" else "key_policy"
+        return self._once(f"options:{col}", lambda: tuple(r[0] for r in self.con.execute(
+            f"SELECT DISTINCT {col} FROM candidates WHERE {col} IS NOT NULL AND {col} <> '' ORDER BY {col}")))
+
+    def facet_counts(self, party: str, policy: str, search: str):
+        out = []
+        for facet, col in (("party", "party"), ("policy", "key_policy")):
+            joins, where, params, _, _ = self._where(party, policy, search, skip=facet)
+            counts = dict(self.con.execute(f"SELECT c.{col}, COUNT(*) FROM {joins}{where} GROUP BY c.{col}", params))
+            counts[ALL] = sum(counts.values())   # 「すべて」は項目なしの候補者も数える（メモリ版と同じ）
+            counts.pop(None, None)
+            out.append(counts)
+        return out[0], out[1]
+
+    def query(self, party: str, policy: str, search: str, offset: int = 0, limit: int | None = None,
+              region: str | None = None):
+        joins, where, params, order, order_params = self._where(party, policy, search, region=region)
+        total = self.con.execute(f"SELECT COUNT(*) FROM {joins}{where}", params).fetchone()[0]
+        rows = self.con.execute(
+            f"{self._SELECT} FROM {joins}{where} ORDER BY {order} LIMIT ? OFFSET ?",
+            [*params, *order_params, -1 if limit is None else limit, offset]).fetchall()
+        return total, self._records(rows)
+
+    def get(self, cid: Any) -> Dict[str, Any] | None:
+        try:
+            cid = int(cid)
+        except (TypeError, ValueError):
+            return None
+        rows = self.con.execute(f"{self._SELECT} FROM candidates c WHERE c.id = ?", (cid,)).fetchall()
+        recs = self._records(rows)
+        return recs[0] if recs else None
+
+    def get_many(self, ids: Sequence[int]) -> List[Dict[str, Any]]:
+        if not ids: return []
+        rows = self.con.execute(
+            f"{self._SELECT} FROM candidates c WHERE c.id IN ({','.join('?' * len(ids))})", list(ids)).fetchall()
+        by_id = {c["id"]: c for c in self._records(rows)}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def same_party(self, c: Dict[str, Any], limit: int | None = None) -> List[Dict[str, Any]]:
+        rows = self.con.execute(
+            f"{self._SELECT} FROM candidates c WHERE c.party = ? AND c.id <> ? ORDER BY c.id LIMIT ?",
+            (c.get("party","無所属"), c["id"], -1 if limit is None else limit)).fetchall()
+        return self._records(rows)
+
+    def label_to_id(self) -> Mapping[str, int]:
+        return self._once("labels", lambda: {
+            candidate_label({"name": name, "party": party}): cid
+            for cid, name, party in self.con.execute("SELECT id, name, party FROM candidates ORDER BY id")})
+
+    def compare_frame(self, ids: Sequence[int]) -> pd.DataFrame:
+        return build_frame(self.get_many(ids))
+
+    def stance_matrix(self) -> StanceMatrix:
+        return self._once("stances", self._build_stance_matrix)
+
+    def _build_stance_matrix(self) -> StanceMatrix:
+        ids = np.array([r[0] for r in self.con.execute("SELECT id FROM candidates ORDER BY id")], dtype=np.int64)
+        topics = sorted({r[0] for r in self.con.execute("SELECT DISTINCT topic FROM stances")}, key=topic_order_key)
+        pos = {cid: i for i, cid in enumerate(ids.tolist())}
+        tpos = {t: j for j, t in enumerate(topics)}
+        codes = np.full((len(ids), len(topics)), STANCE_MISSING, dtype=np.int8)
+        for cid, topic, score in self.con.execute("SELECT candidate_id, topic, score FROM stances"):
+            codes[pos[cid], tpos[topic]] = score
+        return StanceMatrix(ids=ids, topics=topics, codes=codes, answered=codes != STANCE_MISSING)
+
+    def digest(self, c: Dict[str, Any]) -> str:
+        # DB から復元した dict は元のレコードと同じ内容なので、そのまま計算すればよい
+        return record_digest(c)
+
+    def photo(self, c: Dict[str, Any]) -> str:
+        # 割り当ては ID と名前だけで決まるので、その場で引いてもどのプロセスでも同じ
+        return assign_photo(c)
+
+
+def open_repository(db: str | None, path: str | None, mapped: str | None = None
+                    ) -> Tuple[MemoryRepository | SqliteRepository | MappedRepository, List[str]]:
+    """(リポジトリ, 読み込めなかった行)。mapped があれば共有カタログファイル、db があれば SQLite、
+    どちらもなければ path（省略時は data.py）をメモリに読む。"""
+    if mapped: return MappedRepository(mapped), []
+    if db: return SqliteRepository(db), []
+    from loader import load_catalog
+    catalog, errors = load_catalog(path)
+    return MemoryRepository(catalog), errors
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "build":
+        from loader import iter_candidates
+        errors: List[str] = []
+        n = build_sqlite(sys.argv[2], iter_candidates(sys.argv[3] if len(sys.argv) > 3 else None, errors))
+        for e in errors: print(f"⚠️ {e}")
+        print(f"✅ {n} 件を {sys.argv[2]} に書き込みました（スキップ {len(errors)} 件）")
+    else:
+        print("使い方: python repository.py build 出力.db [入力.jsonl|.csv|.parquet]")
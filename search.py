@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# 🔎 候補者検索（文字 n-gram 転置インデックス）
+#
+# - 名前・政党・地域・経歴・公約などを正規化して 1-gram / 2-gram の転置インデックスを作る
+# - 正規化: NFKC（全角/半角）→ 小文字 → カタカナをひらがなに → 空白・中黒を除去
+#   （「佐藤 太郎」/「佐藤太郎」、「ｻﾄｳ」/「サトウ」/「さとう」の表記ゆれを吸収。漢字⇔かなは読み（kana 項目）がある場合のみ）
+# - n-gram の積集合で候補を絞り、正規化済みテキストの部分一致で確認してからスコア順に返す
+
+from __future__ import annotations
+import re, unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+# (項目, 重み)。promise1..N はまとめて "promise" として扱う
+SEARCH_FIELDS: Tuple[Tuple[str, int], ...] = (
+    ("name", 10), ("kana", 10), ("party", 4), ("region", 3), ("keyPolicy", 3),
+    ("brief", 1), ("career", 1), ("promise", 1),
+)
+NAME_PREFIX_BONUS = 5
+
+_DROP = re.compile(r"[\s・･,，、。()（）「」『』]+")
+_KATAKANA = {c: c - 0x60 for c in range(ord("ァ"), ord("ヶ") + 1)}
+
+def normalize(text: str) -> str:
+    s = unicodedata.normalize("NFKC", text or "").lower()
+    s = s.translate(_KATAKANA)
+    return _DROP.sub("", s)
+
+def ngrams(s: str) -> set:
+    grams = set(s)
+    grams.update(s[i:i+2] for i in range(len(s) - 1))
+    return grams
+
+def _field_text(c: Dict[str, Any], field: str) -> str:
+    if field == "promise":
+        return " ".join(str(v) for k, v in c.items() if k.startswith("promise") and v)
+    v = c.get(field)
+    return str(v) if v else ""
+
+
+# 転置リストの要素は「文書番号 << FIELD_BITS | 項目番号」。どの項目に出たかまで分かるので、
+# 2 文字以下の語は確認なしで一致・スコアが決まる
+FIELD_BITS = 3
+
+
+class SearchIndex:
+    """add() で候補者を積み、freeze() 後に search() で ID をスコア順に返す。"""
+
+    def __init__(self, fields: Tuple[Tuple[str, int], ...] = SEARCH_FIELDS):
+        assert len(fields) <= 1 << FIELD_BITS
+        self.fields = fields
+        self.weights = [w for _, w in fields]
+        self.ids: List[int] = []                          # 文書番号 → 候補者ID
+        self.texts: List[Tuple[str, ...]] = []            # 文書番号 → 正規化済みの各項目
+        self._postings: Dict[str, Any] = {}               # n-gram → 文書番号<<3|項目（昇順 array）
+        self._keys = "i"                                  # 転置リストの型。キーが 32 ビットを超えたら "q" に広げる
+        self._shared: Dict[str, str] | None = {}          # 構築中だけ: 同じ正規化テキストは 1 つの str を共有する
+
+    def add(self, c: Dict[str, Any]):
+        doc = len(self.ids)
+        shared = self._shared
+        # 政党・地域などは全員ほぼ同じ文字列なので、正規化結果を文書ごとに別々に持たない
+        texts = tuple(shared.setdefault(t, t) for t in (normalize(_field_text(c, f)) for f, _ in self.fields))
+        self.ids.append(c["id"]); self.texts.append(texts)
+        if self._keys == "i" and (doc + 1) << FIELD_BITS >= 1 << 31:
+            self._keys = "q"
+            self._postings = {g: array("q", keys) for g, keys in self._postings.items()}
+        postings, code = self._postings, self._keys
+        for f, t in enumerate(texts):
+            key = doc << FIELD_BITS | f
+            for g in ngrams(t):
+                # list だと要素ごとに int オブジェクト（30 バイト前後）ができるので、最初から array に積む
+                # （"q" で積んでから "i" に詰め直すと、一時的に 3 倍の領域が要る）
+                p = postings.get(g)
+                if p is None: p = postings[g] = array(code)
+                p.append(key)
+
+    def freeze(self) -> "SearchIndex":
+        # 追加順＝昇順なので転置リストはそのまま使える。共有用の表だけ捨てる
+        self._shared = None
+        return self
+
+    @classmethod
+    def from_parts(cls, ids: Sequence[int], texts: Sequence[Tuple[str, ...]], postings: Mapping[str, Sequence[int]],
+                   fields: Tuple[Tuple[str, int], ...] = SEARCH_FIELDS) -> "SearchIndex":
+        """組み立て済みの部品（catalog_file の mmap 上のビューなど）から検索だけできる索引を作る。"""
+        idx = cls(fields)
+        idx.ids, idx.texts, idx._postings = ids, texts, postings
+        return idx
+
+    @classmethod
+    def build(cls, candidates: Iterable[Dict[str, Any]]) -> "SearchIndex":
+        idx = cls()
+        for c in candidates: idx.add(c)
+        return idx.freeze()
+
+    def postings(self) -> Mapping[str, Sequence[int]]:
+        """n-gram → 転置リスト（catalog_file への書き出し用）。"""
+        return self._postings
+
+    def _score(self, doc: int, f: int, term: str) -> int:
+        bonus = NAME_PREFIX_BONUS if self.fields[f][0] == "name" and self.texts[doc][f].startswith(term) else 0
+        return self.weights[f] + bonus
+
+    def _match(self, term: str) -> Dict[int, int]:
+        """{文書番号: その語のスコア}。n-gram の積集合（短いリストから二分探索）で候補を作る。"""
+        grams = {term} if len(term) <= 2 else {term[i:i+2] for i in range(len(term) - 1)}
+        lists = sorted((self._postings.get(g, ()) for g in grams), key=len)
+        if not lists or not lists[0]: return {}
+        head, rest = lists[0], lists[1:]
+        verify = len(term) > 2
+        mask = (1 << FIELD_BITS) - 1
+        out: Dict[int, int] = {}
+        for key in head:
+            for lst in rest:
+                i = bisect_left(lst, key)
+                if i == len(lst) or lst[i] != key: break
+            else:
+                doc, f = key >> FIELD_BITS, key & mask
+                if verify and term not in self.texts[doc][f]: continue
+                s = self._score(doc, f, term)
+                if s > out.get(doc, 0): out[doc] = s
+        return out
+
+    def search(self, query: str, limit: int | None = None) -> List[int]:
+        """空白区切りの各語をすべて含む候補者の ID をスコアの高い順に返す。"""
+        return [self.ids[d] for d in self.search_docs(query, limit)]
+
+    def search_docs(self, query: str, limit: int | None = None) -> List[int]:
+        """search() と同じだが、候補者 ID ではなく文書番号（追加順）を返す。"""
+        terms = [t for t in (normalize(w) for w in (query or "").split()) if t]
+        if not terms: return []
+        # 語ごとに索引で引き、件数の少ない順に積集合をとる
+        matches = sorted((self._match(t) for t in terms), key=len)
+        scores = matches[0]
+        for m in matches[1:]:
+            scores = {d: s + m[d] for d, s in scores.items() if d in m}
+        ids = self.ids
+        ranked = sorted(scores, key=lambda d: (-scores[d], ids[d]))
+        return ranked[:limit] if limit else ranked
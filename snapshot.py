@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# 🔄 候補者データのホットリロード（版つきスナップショット）
+#
+# - データファイル（data.py / CANDIDATES_PATH / CANDIDATES_DB）の mtime・サイズを裏のスレッドで見張り、
+#   変わったら新しいリポジトリを裏で組み立ててから参照 1 本の差し替えで切り替える
+#   （読む側は組み立て途中の索引を見ない。1 回の再実行の間は同じスナップショットを使い続ける）
+# - 版番号はファイル内容のハッシュ（共有カタログファイルは目次に書かれた版を version で渡す）。
+#   版に結びつくもの（API の応答キャッシュなど）は on_swap で捨てる。候補者ごとの HTML は内容ハッシュで引くので捨てない
+# - 組み立てに失敗した（または 0 件になった）ら古い版を出し続け、理由を last_error に残す
+
+from __future__ import annotations
+import hashlib, os, threading, time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, List, Tuple
+
+POLL_SECONDS = float(os.environ.get("DATA_POLL_SECONDS", "5"))
+SETTLE_SECONDS = 0.5   # 書き込み途中のファイルを読まないよう、変化が落ち着くまで待つ
+LOAD_ATTEMPTS = 3      # 組み立ての前後で版が食い違ったときに組み立て直す回数
+
+
+def file_version(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""): h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: str
+    repo: Any
+    errors: List[str] = field(default_factory=list)
+    loaded_at: datetime = field(default_factory=datetime.now)
+
+
+class SnapshotStore:
+    """current() は常に組み立て済みのスナップショットを返す。差し替えは参照の代入 1 回。"""
+
+    def __init__(self, path: str, build: Callable[[], Tuple[Any, List[str]]], poll: float = POLL_SECONDS,
+                 version: Callable[[str], str] = file_version):
+        self.path = path
+        self._build = build
+        self._version = version
+        self.poll = poll
+        self.last_error: str | None = None
+        self._listeners: List[Callable[[Snapshot, Snapshot], None]] = []
+        self._lock = threading.Lock()   # 組み立ては同時に 1 つだけ
+        self._stat = self._stat_of()
+        self._current = self._load()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def current(self) -> Snapshot:
+        return self._current
+
+    def on_swap(self, fn: Callable[[Snapshot, Snapshot], None]):
+        self._listeners.append(fn)
+
+    def _stat_of(self) -> Tuple[float, int] | None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> Snapshot:
+        # 組み立ての途中でファイルが置き換わると、古い版の番号と新しい中身が組になってしまう。
+        # 前後で版を読み、変わっていたら組み立て直す
+        for _ in range(LOAD_ATTEMPTS):
+            version = self._version(self.path)
+            repo, errors = self._build()
+            if self._version(self.path) == version: return Snapshot(version, repo, errors)
+        raise RuntimeError(f"読み込み中にファイルが {LOAD_ATTEMPTS} 回続けて書き換わりました")
+
+    # ---------- 見張り ----------
+    def check(self) -> bool:
+        """ファイルが変わっていれば組み立て直して差し替える。差し替えたら True。"""
+        stat = self._stat_of()
+        if stat is None or stat == self._stat: return False
+        time.sleep(SETTLE_SECONDS)
+        if self._stat_of() != stat: return False   # まだ書き込み中。次の見回りで拾う
+        with self._lock:
+            self._stat = stat
+            try:
+                if self._version(self.path) == self._current.version: return False   # touch だけ
+                snap = self._load()
+                if not len(snap.repo) and len(self._current.repo):
+                    # 中身が丸ごと消えるのは書き損じとみなして差し替えない
+                    raise ValueError(f"候補者が 0 件です（{len(snap.errors)} 行を読めませんでした）")
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                return False
+            old, self._current, self.last_error = self._current, snap, None
+        for fn in self._listeners: fn(old, snap)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll):
+            self.check()
+
+    def start(self) -> "SnapshotStore":
+        if self._thread is None and self.poll > 0:
+            self._thread = threading.Thread(target=self._run, name="snapshot-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
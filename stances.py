@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# ⚖️ 争点ごとのスタンス定義（表記ゆれの正規化・バッジ表示用のメタ情報）
+
+TOPIC_ORDER = ["消費税増税", "夫婦別姓", "外国人参政権", "原発再稼働", "憲法改正", "同性婚"]
+
+STANCE_CANON = {
+    "賛成":"賛成","反対":"反対","一部賛成":"一部賛成","一部反対":"一部反対",
+    "条件付き賛成":"一部賛成","条件付き反対":"一部反対","部分賛成":"一部賛成","部分反対":"一部反対",
+    "どちらとも言えない":"中立","どちらともいえない":"中立","中立":"中立","保留":"中立",
+    "不明":"未回答","わからない":"未回答","回答しない":"未回答","無回答":"未回答",
+}
+STANCE_META = {
+    "賛成":     {"icon":"✅","class":"pro","desc":"基本的に賛成の立場"},
+    "一部賛成": {"icon":"⚖️","class":"partial1","desc":"条件付き・一部賛成"},
+    "中立":     {"icon":"➖","class":"neutral","desc":"賛否を明確にせず"},
+    "一部反対": {"icon":"🤷‍♀️","class":"partial2","desc":"条件付き・一部反対"},
+    "反対":     {"icon":"❌","class":"con","desc":"基本的に反対の立場"},
+    "未回答":   {"icon":"❓","class":"unknown","desc":"情報が見つからない／未回答"},
+}
+def _normalize_stance(v: str) -> str:
+    s = (v or "").strip()
+    if not s: return "未回答"
+    s2 = STANCE_CANON.get(s, s)
+    return s2 if s2 in STANCE_META else "未回答"
+
+# ===== 順序尺度（比較表・マッチング用）=====
+# 賛成=2 … 反対=-2。未回答・項目なしは STANCE_MISSING（int8 に収まる番兵）
+STANCE_SCORE = {"賛成":2, "一部賛成":1, "中立":0, "一部反対":-1, "反対":-2}
+STANCE_MISSING = -128
+STANCE_FROM_SCORE = {v: k for k, v in STANCE_SCORE.items()}
+
+def stance_code(v: str) -> int:
+    return STANCE_SCORE.get(_normalize_stance(v), STANCE_MISSING)
+
+def topic_order_key(topic: str) -> int:
+    try: return TOPIC_ORDER.index(topic)
+    except ValueError: return len(TOPIC_ORDER) + 1
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+# 📦 静的サイト書き出し（一覧・地域別一覧・候補者ごとの詳細・比較・検索索引）
+#
+# 閲覧だけのアクセスは誰が見ても同じ HTML なので、Streamlit を通さずに前もって全部書き出し、
+# 任意の静的ファイルサーバ / CDN から配る。カード・詳細・CSS はアプリと同じ render.py を使う。
+#
+#   python static_export.py site/ [入力.jsonl|.csv|.parquet]   # 入力省略時は CANDIDATES_PATH / data.py
+#
+# 出力（すべて 1 階層に置くので、相対リンクのままどこに置いても動く）
+#   index.html, list-2.html …            全候補者の一覧（STATIC_PAGE_SIZE 件ずつ）
+#   regions.html, region-3.html, region-3-2.html …  地域（選挙区）ごとの一覧
+#   candidate-<id>.html                  詳細（同じ政党の候補者つき）
+#   compare.html / search.html           検索索引と候補者 JSON を読んでブラウザ側で組み立てる
+#   data/candidates/<id>.json            候補者レコード
+#   data/search-index.json               正規化済み 1/2-gram → 文書番号の転置索引
+#   static/                              ハッシュ付きの CSS（最小化）・JS・画像
+#   version.json                         データ版（snapshot.file_version）と件数
+#
+# 出力ディレクトリは、書き出し済みの世代ディレクトリ（.<名前>.site-<日時>-<乱数>）へのシンボリックリンクにする。
+# 新しい世代を書き終えてから一時リンクを os.replace で被せるので、配信側はいつ見ても古い版か新しい版の一式を見る
+# （サーバはシンボリックリンクをたどる設定にしておく）。直前の世代は残し、それより古い世代は消す。
+# 初回に出力先が普通のディレクトリだった場合だけは、それを脇へ退けてからリンクを置くまで一瞬だけ存在しない。
+# そのとき消してよいのは、空のディレクトリか以前の書き出し（version.json がある）だけ。それ以外は何もせず止める。
+
+from __future__ import annotations
+import html, json, os, shutil, sys, tempfile, time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+import assets, render
+from catalog import Catalog, candidate_label
+from loader import load_catalog, source_path
+from search import ngrams, normalize
+from snapshot import file_version
+from stances import TOPIC_ORDER
+
+STATIC_PAGE_SIZE = int(os.environ.get("STATIC_PAGE_SIZE", "60"))
+SAME_PARTY_LIMIT = 8
+# 検索索引に入れる項目（短い項目だけ。公約・経歴まで入れると索引が本文より大きくなる）
+INDEX_FIELDS = ("name", "kana", "party", "region", "keyPolicy")
+SEARCH_LIMIT = 50
+
+# 書き出したサイトだけで使う追加 CSS（Streamlit が出していた枠の代わり）
+SITE_CSS = """
+body{ margin:0; }
+.stApp{ min-height:100vh; padding:16px 0 32px; }
+.site-nav{ display:flex; gap:16px; justify-content:center; flex-wrap:wrap; margin:0 0 18px; }
+.site-nav a{ color:#667eea; font-weight:700; text-decoration:none; }
+.card-grid{ display:grid; grid-template-columns:repeat(auto-fill, minmax(220px, 1fr)); gap:24px; }
+a.card-link{ color:inherit; text-decoration:none; display:block; }
+.pager{ display:flex; gap:12px; justify-content:center; align-items:center; margin:24px 0; color:#666; }
+.pager a{ color:#667eea; text-decoration:none; font-weight:700; }
+.region-list{ list-style:none; padding:0; display:flex; flex-wrap:wrap; gap:10px; justify-content:center; }
+.region-list a{ text-decoration:none; }
+.search-box{ width:100%; max-width:480px; display:block; margin:0 auto 16px; padding:10px 14px; font-size:1rem;
+  border:1px solid #c7d2fe; border-radius:8px; }
+.search-results{ list-style:none; padding:0; max-width:640px; margin:0 auto; }
+.search-results li{ padding:8px 12px; background:white; border-radius:8px; margin-bottom:6px; display:flex; gap:8px; align-items:center; }
+.search-results a{ color:#333; font-weight:700; text-decoration:none; flex:1; }
+.compare-table{ width:100%; border-collapse:collapse; background:white; border-radius:8px; font-size:14px; }
+.compare-table th, .compare-table td{ padding:8px 10px; border:1px solid #eee; vertical-align:top; text-align:left; }
+"""
+
+# 検索・比較ページ用の JS（search.normalize と同じ正規化をブラウザ側でも行う）
+SITE_JS = r"""
+const DROP = /[\s・･,，、。()（）「」『』]+/g;
+function normalize(s){
+  s = (s || "").normalize("NFKC").toLowerCase();
+  s = s.replace(/[ァ-ヶ]/g, ch => String.fromCharCode(ch.charCodeAt(0) - 0x60));
+  return s.replace(DROP, "");
+}
+let INDEX = null;
+async function loadIndex(){
+  if (!INDEX) INDEX = await (await fetch("data/search-index.json")).json();
+  return INDEX;
+}
+async function search(query, limit){
+  const idx = await loadIndex();
+  const terms = query.split(/\s+/).map(normalize).filter(Boolean);
+  if (!terms.length) return [];
+  let hits = null;
+  for (const t of terms){
+    const grams = t.length === 1 ? [t] : Array.from({length: t.length - 1}, (_, i) => t.slice(i, i + 2));
+    let docs = null;
+    for (const g of grams){
+      const p = new Set(idx.grams[g] || []);
+      docs = docs ? new Set([...docs].filter(d => p.has(d))) : p;
+      if (!docs.size) break;
+    }
+    // n-gram の積は候補。正規化済みテキストの部分一致で確かめる
+    const ok = [...docs].filter(d => idx.docs[d][2].includes(t));
+    hits = hits ? ok.filter(d => hits.includes(d)) : ok;
+    if (!hits.length) break;
+  }
+  return hits.sort((a, b) => a - b).slice(0, limit).map(d => idx.docs[d]);
+}
+function esc(s){ return String(s).replace(/[&<>"']/g, c => ({"&":"&amp;","<":"&lt;",">":"&gt;",'"':"&quot;","'":"&#39;"}[c])); }
+function bindSearch(input, list, onPick){
+  let seq = 0;
+  input.addEventListener("input", async () => {
+    const my = ++seq, rows = await search(input.value, SEARCH_LIMIT);
+    if (my !== seq) return;
+    list.innerHTML = rows.map(([id, label]) =>
+      `<li><a href="candidate-${id}.html">${esc(label)}</a>` +
+      (onPick ? `<button data-id="${id}">比較に追加</button>` : "") + `</li>`).join("");
+    if (onPick) list.querySelectorAll("button").forEach(b => b.onclick = () => onPick(+b.dataset.id));
+  });
+}
+async function renderCompare(table){
+  const ids = (location.hash.match(/ids=([\d,]+)/) || [, ""])[1].split(",").filter(Boolean);
+  if (!ids.length){ table.innerHTML = "<tr><td>候補者を検索して追加してください。</td></tr>"; return; }
+  const cs = await Promise.all(ids.map(async id => (await fetch(`data/candidates/${id}.json`)).json()));
+  const nums = [...new Set(cs.flatMap(c => Object.keys(c).filter(k => /^promise\d+$/.test(k)).map(k => +k.slice(7))))].sort((a, b) => a - b);
+  const topics = [...new Set(cs.flatMap(c => Object.keys(c.comparisons || {})))]
+    .sort((a, b) => (TOPICS.indexOf(a) + 1 || 1e9) - (TOPICS.indexOf(b) + 1 || 1e9));
+  const row = (label, f) => `<tr><th>${esc(label)}</th>${cs.map(c => `<td>${esc(f(c) || "—")}</td>`).join("")}</tr>`;
+  table.innerHTML =
+    `<tr><th>項目</th>${cs.map(c => `<th><a href="candidate-${c.id}.html">${esc(c.name)}</a></th>`).join("")}</tr>` +
+    row("政党", c => c.party) + row("重点政策", c => c.keyPolicy) + row("経歴", c => c.career) +
+    nums.map(n => row(`公約${n}`, c => c[`promise${n}`])).join("") +
+    topics.map(t => row(t, c => (c.comparisons || {})[t])).join("");
+}
+function addToCompare(id){
+  const ids = (location.hash.match(/ids=([\d,]+)/) || [, ""])[1].split(",").filter(Boolean);
+  if (!ids.includes(String(id))) ids.push(String(id));
+  location.hash = "ids=" + ids.join(",");
+}
+"""
+
+
+# --------------------------------
+# ページの枠
+# --------------------------------
+def _page(title: str, body: str, css: str, version: str, script: str = "") -> str:
+    return f"""<!doctype html>
+<html lang="ja">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)} | 選挙候補者情報システム</title>
+<link rel="stylesheet" href="{css}">
+</head>
+<body>
+<div class="stApp"><div class="block-container">
+{body}
+<div class="data-footer">データ版 {version}</div>
+</div></div>
+{script}
+</body>
+</html>
+"""
+
+def _nav() -> str:
+    return ('<nav class="site-nav"><a href="index.html">📋 候補者一覧</a><a href="regions.html">🗺 地域別</a>'
+            '<a href="search.html">🔎 検索</a><a href="compare.html">📊 比較</a></nav>')
+
+def _pager(page: int, n_pages: int, href) -> str:
+    if n_pages <= 1: return ""
+    prev = f'<a href="{href(page - 1)}">← 前へ</a>' if page > 1 else "<span></span>"
+    nxt = f'<a href="{href(page + 1)}">次へ →</a>' if page < n_pages else "<span></span>"
+    return f'<div class="pager">{prev}<span>{page} / {n_pages} ページ</span>{nxt}</div>'
+
+
+# --------------------------------
+# 書き出し
+# --------------------------------
+class SiteWriter:
+    def __init__(self, out: Path, cat: Catalog, version: str, css: str):
+        self.out, self.cat, self.version, self.css = out, cat, version, css
+        self.header = render.header_html(cat.region, cat.region_others)
+        self.files = 0
+        self._cards: Dict[int, str] = {}   # 同じカードが一覧・地域・同じ政党欄に何度も出るので 1 回だけ組み立てる
+
+    def write(self, name: str, text: str):
+        p = self.out / name
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text, encoding="utf-8")
+        self.files += 1
+
+    def card(self, c: Dict[str, Any]) -> str:
+        html_ = self._cards.get(c["id"])
+        if html_ is None:
+            html_ = self._cards[c["id"]] = (
+                f'<a class="card-link" href="candidate-{c["id"]}.html">{render.candidate_card_html(c, self.cat.photos.get(c["id"]))}</a>')
+        return html_
+
+    def grid(self, cands: Iterable[Dict[str, Any]]) -> str:
+        return f'<div class="card-grid">{"".join(self.card(c) for c in cands)}</div>'
+
+    def page(self, name: str, title: str, body: str, script: str = ""):
+        self.write(name, _page(title, self.header + _nav() + body, self.css, self.version, script))
+
+    def list_pages(self, ids: Tuple[int, ...], title: str, href):
+        n_pages = max(1, -(-len(ids) // STATIC_PAGE_SIZE))
+        for page in range(1, n_pages + 1):
+            chunk = ids[(page - 1) * STATIC_PAGE_SIZE: page * STATIC_PAGE_SIZE]
+            pager = _pager(page, n_pages, href)
+            body = f"<h3>{html.escape(title)}（{len(ids):,} 人）</h3>{self.grid(self.cat.by_id[i] for i in chunk)}{pager}"
+            self.page(href(page), title, body)
+
+    def detail_pages(self):
+        for c in self.cat.candidates:
+            body = render.detail_html(c, self.cat.photos[c["id"]])
+            same = [self.cat.by_id[i] for i in self.cat.same_party_ids(c, SAME_PARTY_LIMIT)]
+            if same: body += f"<h4>同じ政党の候補者</h4>{self.grid(same)}"
+            self.page(f"candidate-{c['id']}.html", c.get("name", ""), body)
+            self.write(f"data/candidates/{c['id']}.json", json.dumps(dict(c), ensure_ascii=False))
+
+    def region_pages(self):
+        items = []
+        for k, region in enumerate(self.cat.region_options, 1):
+            ids = self.cat.ids_by_region[region]
+            self.list_pages(ids, region, lambda p, k=k: f"region-{k}.html" if p == 1 else f"region-{k}-{p}.html")
+            items.append(f'<li><a class="region-badge" href="region-{k}.html">🗺 {html.escape(region)}（{len(ids):,}）</a></li>')
+        self.page("regions.html", "地域別", f'<h3>地域（選挙区）</h3><ul class="region-list">{"".join(items)}</ul>')
+
+    def search_index(self):
+        docs, grams = [], {}
+        for doc, c in enumerate(self.cat.candidates):
+            fields = [normalize(str(c.get(f) or "")) for f in INDEX_FIELDS]
+            docs.append([c["id"], candidate_label(c), "\u0001".join(fields)])
+            for g in set().union(*(ngrams(t) for t in fields)):
+                grams.setdefault(g, []).append(doc)
+        self.write("data/search-index.json",
+                   json.dumps({"docs": docs, "grams": grams}, ensure_ascii=False, separators=(",", ":")))
+
+    def app_pages(self, js: str):
+        script = (f'<script src="{js}"></script>'
+                  f'<script>const SEARCH_LIMIT = {SEARCH_LIMIT}; const TOPICS = {json.dumps(list(TOPIC_ORDER), ensure_ascii=False)};</script>')
+        self.page("search.html", "検索",
+                  '<input class="search-box" id="q" placeholder="名前・政党・地域・政策で検索" autofocus>'
+                  '<ul class="search-results" id="hits"></ul>',
+                  script + '<script>bindSearch(q, hits);</script>')
+        self.page("compare.html", "比較",
+                  '<h3>候補者ごとの比較表</h3>'
+                  '<input class="search-box" id="q" placeholder="比較したい候補者を検索">'
+                  '<ul class="search-results" id="hits"></ul><table class="compare-table" id="cmp"></table>',
+                  script + '<script>bindSearch(q, hits, addToCompare);'
+                           'addEventListener("hashchange", () => renderCompare(cmp)); renderCompare(cmp);</script>')
+
+
+def _check_out(out: Path):
+    """out が書き出し先として使えるか（中身を消してよいものか）を、書き出しを始める前に確かめる。"""
+    if out.is_symlink() or not out.exists():
+        return
+    if not out.is_dir():
+        raise FileExistsError(f"{out} はディレクトリではありません")
+    if any(out.iterdir()) and not (out / "version.json").is_file():
+        raise FileExistsError(f"{out} は書き出し済みのサイトではありません（version.json がない）。"
+                              "中身を消さないよう止めました。空のディレクトリか新しいパスを指定してください")
+
+def _switch_link(out: Path, target: Path):
+    """out を target へのシンボリックリンクに付け替える（一時リンクを作って rename 1 回）。"""
+    link = out.with_name(f".{out.name}.link-{os.getpid()}")
+    if link.is_symlink(): link.unlink()
+    os.symlink(target.name, link)   # 相対リンク（親ディレクトリごと動かしても切れない）
+    old = None
+    if out.exists() and not out.is_symlink():
+        # 以前の形式（普通のディレクトリ）からの移行。ここだけは入れ替えの間 out が無い
+        old = out.with_name(f".{out.name}.old-{os.getpid()}")
+        os.replace(out, old)
+    os.replace(link, out)
+    if old: shutil.rmtree(old, ignore_errors=True)
+
+def export_site(out_dir: str, path: str | None = None) -> Tuple[int, List[str]]:
+    """サイトを新しい世代のディレクトリに書き出し、out_dir のリンクを付け替える。(ファイル数, 読み込みエラー) を返す。"""
+    out = Path(os.path.abspath(out_dir))   # resolve() だと今のリンク先になってしまう
+    _check_out(out)
+    prev = out.with_name(os.readlink(out)) if out.is_symlink() else None
+    cat, errors = load_catalog(path)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{out.name}.site-{time.strftime('%Y%m%d%H%M%S')}-", dir=out.parent))
+    tmp.chmod(0o755)   # mkdtemp は本人しか読めない権限で作る
+    version = file_version(source_path(path))
+
+    # 画像は書き出し先の static/ にハッシュ付きで置き、ページからの相対 URL で参照する
+    render.configure(static_dir=tmp / "static", base_url="static")
+    try:
+        static = tmp / "static"
+        static.mkdir(parents=True)
+        css = "static/" + render.publish_css(cat.party_options, extra=SITE_CSS)
+        js = "static/" + assets.publish_bytes("site.js", SITE_JS.encode("utf-8"), "js", static)
+        w = SiteWriter(tmp, cat, version, css)
+
+        w.list_pages(tuple(c["id"] for c in cat.candidates), "候補者一覧",
+                     lambda p: "index.html" if p == 1 else f"list-{p}.html")
+        w.region_pages()
+        w.detail_pages()
+        w.search_index()
+        w.app_pages(js)
+        w.write("version.json", json.dumps({"version": version, "candidates": len(cat.candidates),
+                                            "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S")}))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    finally:
+        render.configure()
+
+    _switch_link(out, tmp)
+    # 直前の世代は、付け替えの前にページを開いた閲覧者のために残す
+    for d in out.parent.glob(f".{out.name}.site-*"):
+        if d not in (tmp, prev): shutil.rmtree(d, ignore_errors=True)
+    return w.files, errors
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("使い方: python static_export.py 出力ディレクトリ [入力.jsonl|.csv|.parquet]")
+        sys.exit(1)
+    t0 = time.perf_counter()
+    try:
+        n, errs = export_site(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else os.environ.get("CANDIDATES_PATH") or None)
+    except FileExistsError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for e in errs: print(f"⚠️ {e}")
+    print(f"✅ {n:,} ファイルを {sys.argv[1]} に書き出しました（{time.perf_counter() - t0:.1f} 秒）")
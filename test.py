@@ -4,12 +4,19 @@
 from __future__ import annotations
 import streamlit as st
 from typing import List, Dict, Any
-from pathlib import Path
-import base64
-import re, html, unicodedata
-from textwrap import dedent
-from collections import Counter
+import hashlib, os
+import html
 import pandas as pd
+import assets
+import render
+from catalog_file import catalog_version
+from loader import source_path
+from frame import compare_table
+from repository import ALL, open_repository
+from match import rank as match_rank
+from profiling import PROFILE_ENV, RerunProfile
+from render_cache import RenderCache
+from snapshot import SnapshotStore, file_version
 
 # --------------------------------
 # ページ設定
@@ -21,237 +28,65 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
+# ---------- 計測（APP_PROFILE=1 か ?debug=1 のときだけ。profiling.py） ----------
+def _debug_enabled() -> bool:
+    try:
+        raw = st.query_params.get("debug")
+    except Exception:
+        raw = st.experimental_get_query_params().get("debug", [None])[0]
+    # 画面遷移でクエリが消えても、セッションの間は計測を続ける（?debug=0 で止める）
+    if raw is not None: st.session_state["debug"] = raw not in ("", "0")
+    return PROFILE_ENV or st.session_state.get("debug", False)
+
+PROF = RerunProfile(_debug_enabled())
+_URI_CACHE0 = render._data_uri_from_file.cache_info()
+
+def _html(body: str):
+    """HTML を送る（計測中は送ったバイト数も数える）。"""
+    if PROF.enabled: PROF.add_bytes(len(body.encode("utf-8")))
+    st.markdown(body, unsafe_allow_html=True)
+
+# ---------- 候補者データ（版つきスナップショット。ファイルが変わると裏で組み直して差し替え） ----------
+# CANDIDATES_CATALOG に共有カタログファイルを指定すると mmap して読む（catalog_file.py build で作成。
+# 同じホストのレプリカ同士で 1 つのファイルを共有し、起動時の組み立てもない）。
+# CANDIDATES_DB に SQLite を指定すると各ページが DB に問い合わせる（repository.py build で作成）。
+# どちらもなければ CANDIDATES_PATH の JSONL / CSV / Parquet（未指定なら data.py）をメモリに読み込む。
+# DATA_POLL_SECONDS（既定 5 秒、0 で無効）ごとにファイルを見張り、サーバーを止めずに新しい版へ切り替える。
+CANDIDATES_DB = os.environ.get("CANDIDATES_DB") or None
+CANDIDATES_PATH = os.environ.get("CANDIDATES_PATH") or None
+CANDIDATES_CATALOG = os.environ.get("CANDIDATES_CATALOG") or None
+
+@st.cache_resource(show_spinner="候補者データを読み込んでいます…")
+def _snapshot_store(db: str | None, path: str | None, mapped: str | None) -> SnapshotStore:
+    store = SnapshotStore(mapped or db or source_path(path), lambda: open_repository(db, path, mapped),
+                          version=catalog_version if mapped else file_version)
+    return store.start()
+
+# 1 回の再実行の間は同じ版を使う（途中で差し替わってもページ内で版が混ざらない）
+with PROF.phase("snapshot"):
+    SNAPSHOT = _snapshot_store(CANDIDATES_DB, CANDIDATES_PATH, CANDIDATES_CATALOG).current()
+    REPO, _load_errors = SNAPSHOT.repo, SNAPSHOT.errors
+    if _load_errors:
+        st.warning(f"読み込めなかった候補者データが {len(_load_errors):,} 件あります（例: {_load_errors[0]}）")
+    REGION, REGION_OTHERS = REPO.region_summary()
+
 # --------------------------------
-# CSS（画面遷移のアニメーション含む）
+# CSS（render.py で政党の色表＋データ中の政党から生成・最小化し、ハッシュ付きファイルで配信）
 # --------------------------------
-st.markdown(
-    """
-<style>
-.stApp {
-  background: linear-gradient(135deg, #ECECFF 0%, #F8F8FF 100%);
-  font-family: -apple-system, BlinkMacSystemFont, "Hiragino Sans", "Yu Gothic", "Noto Sans JP", sans-serif;
-}
-
-/* ヘッダー */
-.app-header { color:#4a4a6a; margin: 6px 0 18px; }
-.app-header h1 { font-size:2.0rem; margin-bottom:.2rem; text-shadow: 2px 2px 4px rgba(0,0,0,0.2); }
-.app-header .subtitle { font-size:1rem; opacity:.9; }
-
-/* ヘッダーは左・中央・右の3列。中央見出しは常に真正面 */
-.header-row{ display:grid; grid-template-columns: 1fr auto 1fr; align-items:center; }
-.header-center{ text-align:center; }
-.header-right{ justify-self:end; }
-
-/* 地域バッジ */
-.region-badge{
-  display:inline-block; padding:6px 12px; border-radius:999px;
-  background:#eef2ff; color:#334155; border:1px solid #c7d2fe;
-  font-weight:700; white-space:nowrap; box-shadow:0 1px 2px rgba(0,0,0,.06);
-}
-.region-note{ font-size:.85em; color:#64748b; margin-left:.4em; }
-
-/* 画面コンテナ & アニメーション */
-.page { background: transparent; }
-@media (prefers-reduced-motion: no-preference) {
-  .enter-left  { animation: slideInFromLeft .28s ease both; }
-  .enter-right { animation: slideInFromRight .28s ease both; }
-}
-@keyframes slideInFromLeft {
-  from { opacity: 0; transform: translateX(-10px); }
-  to   { opacity: 1; transform: translateX(0); }
-}
-@keyframes slideInFromRight {
-  from { opacity: 0; transform: translateX(10px); }
-  to   { opacity: 1; transform: translateX(0); }
-}
-
-/* フィルタ表示（チップ）*/
-.chips { display:flex; gap:8px; flex-wrap:wrap; align-items:center; background:#f8f9ff; border-radius:8px; padding:8px 12px; }
-.chip-label { font-weight:700; color:#666; margin-right:4px; }
-.chip { display:inline-flex; align-items:center; gap:6px; background:white; padding:6px 12px; border-radius:20px; font-size:.85em; color:#333; 
-        box-shadow: 0 2px 4px rgba(0,0,0,.08); }
-
-/* 候補者カード */
-.candidate-card { background:white; border-radius:16px; padding:16px; text-align:center; 
-  box-shadow: 0 4px 12px rgba(0,0,0,.08); transition: transform .2s ease, box-shadow .2s ease, border .2s ease; border: 2px solid transparent; }
-.candidate-card:hover { transform: translateY(-6px); box-shadow: 0 8px 24px rgba(0,0,0,.12); }
-.candidate-card.selected { border: 3px solid #667eea; box-shadow: 0 8px 24px rgba(102,126,234,.3); }
-
-.candidate-photo { width:120px; height:120px; border-radius:50%; margin: 0 auto 12px; display:flex; align-items:center; justify-content:center; 
-  color:white; font-size:2.4rem; font-weight:700; box-shadow: 0 5px 15px rgba(0,0,0,.2); border: 3px solid; overflow:hidden; position:relative; }
-.candidate-name { font-size:1.1rem; font-weight:700; color:#333; margin-bottom:6px; }
-.candidate-tags { font-size:.85rem; color:#888; margin-bottom:8px; display:flex; gap:8px; justify-content:center; flex-wrap:wrap; }
-.tag { background:#f0f0f0; padding:3px 8px; border-radius:4px; white-space:nowrap; }
-.candidate-party { display:inline-block; padding: 4px 12px; border-radius: 20px; font-size:.9rem; margin-bottom:8px; font-weight:700; border: 2px solid; }
-.party-icon { margin-right:6px; font-size:1.1em; }
-.candidate-brief { font-size:.9rem; color:#777; line-height:1.5; min-height: 3em; }
-
-/* 詳細カード（モーダル相当）*/
-.detail-card { background:white; border-radius:16px; padding:24px; box-shadow: 0 8px 32px rgba(0,0,0,.15); }
-.detail-header { text-align:center; padding-bottom:12px; border-bottom: 2px solid #f0f0f0; margin-bottom:16px; }
-.modal-photo { width:150px; height:150px; border-radius:50%; margin: 0 auto 12px; display:flex; align-items:center; justify-content:center; 
-  color:white; font-size:3rem; font-weight:700; box-shadow: 0 10px 25px rgba(0,0,0,.2); border: 4px solid; overflow:hidden; position:relative; }
-.section-title { font-size:1.2rem; font-weight:700; color:#667eea; margin: 16px 0 8px; padding-left: 12px; border-left: 4px solid #667eea; }
-.manifesto-list { list-style:none; padding-left:0; margin:0; }
-.manifesto-list li { padding:12px; margin: 0 0 10px; background:#f8f9ff; border-left: 4px solid #667eea; border-radius:5px; }
-.candidate-photo img,.modal-photo img{ width:100%; height:100%; object-fit:cover; display:block; }
-
-/* 主なスタンス 表 */
-.stance-table{ width:100%; border-collapse:collapse; margin-top:8px; font-size:14px; }
-.stance-table th, .stance-table td{ padding:10px 12px; border-top:1px solid #eee; vertical-align:middle; text-align:center; }
-.stance-table th{ width:60%; color:#333; font-weight:600; }
-
-/* バッジ */
-.stance-badge{ display:inline-block; padding:8px 16px; border-radius:999px; font-weight:700; line-height:1.25; letter-spacing:.02em; box-shadow:inset 0 0 0 1px rgba(0,0,0,.05); white-space:nowrap; }
-@media (min-width: 900px){ .stance-badge{ font-size:1.15rem; padding:10px 18px; } }
-.stance-badge.pro{      background:#e6f4ea; color:#137333; }  /* 緑: 賛成 */
-.stance-badge.partial1{ background:#fff7e5; color:#8a6d1d; }  /* 黄: 一部賛成 */
-.stance-badge.neutral{  background:#f1f3f4; color:#3c4043; }  /* 灰: 中立 */
-.stance-badge.partial2{ background:#fff3e0; color:#8a6d1d; }  /* 橙: 一部反対 */
-.stance-badge.con{      background:#fce8e6; color:#c5221f; }  /* 赤: 反対 */
-.stance-badge.unknown{  background:#e8f0fe; color:#1967d2; }  /* 青: 未回答 */
-
-.stance-legend{ margin-top:4px; font-size:12px; color:#666; display:flex; gap:8px; flex-wrap:wrap; justify-content:center; }
-
-/* 政党カラー（既存＋追加） */
-.photo-自民党  { background: linear-gradient(135deg, #3d94c3 0%, #2b7a9e 100%); border-color:#236680; }
-.party-自民党  { background:#e8f4f8; color:#2b7a9e; border-color:#2b7a9e; }
-
-.photo-民主党  { background: linear-gradient(135deg, #e89060 0%, #d77840 100%); border-color:#b8623a; }
-.party-民主党  { background:#fff5ed; color:#d77840; border-color:#d77840; }
-
-.photo-立憲民主党{ background: linear-gradient(135deg, #9a5fb8 0%, #7d4a9a 100%); border-color:#603b7a; }
-.party-立憲民主党{ background:#f5eef8; color:#7d4a9a; border-color:#7d4a9a; }
-
-/* 互換：もし古いデータに「立憲社会党」が来ても崩れないよう残す */
-.photo-立憲社会党{ background: linear-gradient(135deg, #9a5fb8 0%, #7d4a9a 100%); border-color:#603b7a; }
-.party-立憲社会党{ background:#f5eef8; color:#7d4a9a; border-color:#7d4a9a; }
-
-.photo-社民党  { background: linear-gradient(135deg, #55a563 0%, #3d8b4a 100%); border-color:#2e6b38; }
-.party-社民党  { background:#eef8f0; color:#3d8b4a; border-color:#3d8b4a; }
-
-.photo-共産党  { background: linear-gradient(135deg, #e66b6b 0%, #c83e3e 100%); border-color:#a83232; }
-.party-共産党  { background:#fdeaea; color:#c83e3e; border-color:#c83e3e; }
-
-.photo-社会党  { background: linear-gradient(135deg, #4F8FCB 0%, #2E6FA6 100%); border-color:#2E6FA6; }
-.party-社会党  { background:#e8f1fb; color:#2E6FA6; border-color:#2E6FA6; }
-
-.photo-無所属  { background: linear-gradient(135deg, #616161 0%, #424242 100%); border-color:#212121; }
-.party-無所属  { background:#f5f5f5; color:#424242; border-color:#757575; }
-
-/* 党アイコンの画像サイズ */
-.party-icon img{ width:1.15em; height:1.15em; object-fit:contain; vertical-align:-0.18em; display:inline-block; }
-
-/* ===== 中央寄せ（本文幅を絞って読みやすく） ===================== */
-.block-container{ max-width: 1080px; margin-left:auto; margin-right:auto; padding: 0 16px; }
-.app-header, .chips, .detail-card{ max-width: 880px; margin-left:auto; margin-right:auto; }
-</style>
-""",
-    unsafe_allow_html=True,
-)
+# 毎回送るのは <link> 1 行だけ。政党の顔ぶれが変わった時だけ中身（＝URL）が変わる
+@st.cache_resource(show_spinner=False)
+def _stylesheet_tag(parties: tuple) -> str:
+    return render.stylesheet_tag(parties)
 
-from data import candidates
-CANDIDATES: List[Dict[str, Any]] = candidates
-
-# ---------- 地域（region）: 正規化 & 多数派検出 ----------
-def _norm_region(s: str) -> str:
-    s = unicodedata.normalize("NFKC", s or "")
-    s = re.sub(r"\s+", "", s)
-    s = s.replace("東京都", "東京")
-    return s
-
-def _detect_common_region(cands: List[Dict[str, Any]]):
-    regs = [_norm_region(c.get("region","")) for c in cands if c.get("region")]
-    if not regs: return None, 0
-    cnt = Counter(regs)
-    top, n_top = cnt.most_common(1)[0]
-    others = sum(cnt.values()) - n_top
-    return top, others
-
-REGION, REGION_OTHERS = _detect_common_region(CANDIDATES)
-
-# ===== スタンス定義 =====
-TOPIC_ORDER = ["消費税増税", "夫婦別姓", "外国人参政権", "原発再稼働", "憲法改正", "同性婚"]
-
-STANCE_CANON = {
-    "賛成":"賛成","反対":"反対","一部賛成":"一部賛成","一部反対":"一部反対",
-    "条件付き賛成":"一部賛成","条件付き反対":"一部反対","部分賛成":"一部賛成","部分反対":"一部反対",
-    "どちらとも言えない":"中立","どちらともいえない":"中立","中立":"中立","保留":"中立",
-    "不明":"未回答","わからない":"未回答","回答しない":"未回答","無回答":"未回答",
-}
-STANCE_META = {
-    "賛成":     {"icon":"✅","class":"pro","desc":"基本的に賛成の立場"},
-    "一部賛成": {"icon":"⚖️","class":"partial1","desc":"条件付き・一部賛成"},
-    "中立":     {"icon":"➖","class":"neutral","desc":"賛否を明確にせず"},
-    "一部反対": {"icon":"🤷‍♀️","class":"partial2","desc":"条件付き・一部反対"},
-    "反対":     {"icon":"❌","class":"con","desc":"基本的に反対の立場"},
-    "未回答":   {"icon":"❓","class":"unknown","desc":"情報が見つからない／未回答"},
-}
-def _normalize_stance(v: str) -> str:
-    s = (v or "").strip()
-    if not s: return "未回答"
-    s2 = STANCE_CANON.get(s, s)
-    return s2 if s2 in STANCE_META else "未回答"
-
-# ---------- 党アイコン ----------
-PARTY_ICON_DEFAULT = {
-    "自民党":"🏛️","民主党":"👨‍👩‍👧","立憲民主党":"🏥","社民党":"🌿","共産党":"🗣️","社会党":"🏫","無所属":"🧭"
-}
-
-@st.cache_data(show_spinner=False)
-def _data_uri_from_file(path: str) -> str:
-    p = Path(path)
-    if not p.exists(): return ""
-    ext = p.suffix.lower()
-    mime = "image/png" if ext == ".png" else ("image/jpeg" if ext in [".jpg",".jpeg"] else "image/png")
-    b64 = base64.b64encode(p.read_bytes()).decode("ascii")
-    return f"data:{mime};base64,{b64}"
-
-def set_party_icon_from_file(party: str, path: str):
-    uri = _data_uri_from_file(path)
-    if uri:
-        PARTY_ICON_DEFAULT[party] = f'<img src="{uri}" alt="{party}">'
-    else:
-        st.warning(f"党アイコン画像が見つかりません: {path}")
-
-# 必要なら党ロゴを画像に
-set_party_icon_from_file("自民党", "zimin.png")
-set_party_icon_from_file("民主党", "minsh.png")
-set_party_icon_from_file("立憲民主党", "rikken.png")  # ← 立憲民主党に修正
-set_party_icon_from_file("社民党", "shamin.png")
-
-# ---------- 顔写真（自動割当） ----------
-IMAGE_FILES = [
-    "asano.png","kawarada.png","hiratuka.png","murakami.png","yanagisawa.png",
-    "men1.png","men2.png","woman1.png","woman2.png","woman3.png",
-]
-IMG_URI = {fn: _data_uri_from_file(fn) for fn in IMAGE_FILES}
-
-PHOTO_MAP_BY_ID = { 1:"asano.png", 2:"kawarada.png", 3:"hiratuka.png", 4:"murakami.png", 5:"woman1.png" }
-PHOTO_MAP_BY_NAME = {
-    "佐藤太郎":"asano.png","鈴木次郎":"kawarada.png","田中三郎":"hiratuka.png",
-    "加藤花":"murakami.png","石原さくら":"woman1.png",
-}
-
-FEM_HINTS = ("子","美","花","華","さくら","桜","奈","香","莉","恵","江", "さやか", "みさき", "まりこ", "まい", "あい", "あかね")
-MEN_POOL   = ["men1.png","men2.png"]
-WOMEN_POOL = ["woman1.png","woman2.png","woman3.png"]
-
-def _photo_uri_for(c: Dict[str, Any]) -> str | None:
-    # 1) データに photo があれば最優先
-    p = c.get("photo")
-    # 2) 明示マップ
-    if not p:
-        p = PHOTO_MAP_BY_ID.get(c.get("id")) or PHOTO_MAP_BY_NAME.get(c.get("name"))
-    # 3) 簡易推定 → 安定分配
-    if not p:
-        name = c.get("name","")
-        is_female = any(h in name for h in FEM_HINTS)
-        pool = WOMEN_POOL if is_female else MEN_POOL
-        seed = c.get("id") if isinstance(c.get("id"), int) else abs(hash(name))
-        p = pool[seed % len(pool)]
-    uri = IMG_URI.get(p)
-    return uri if uri else None
+with PROF.phase("css"):
+    _html(_stylesheet_tag(REPO.options("party")))
+
+# ---------- 党アイコン・顔写真（render.py） ----------
+from stances import TOPIC_ORDER, STANCE_SCORE
+with PROF.phase("icons"):
+    PARTY_ICONS, _missing_icons = render.party_icon_table()
+for path in _missing_icons:
+    st.warning(f"党アイコン画像が見つかりません: {path}")
 
 # --------------------------------
 # ルーティング補助
@@ -273,8 +108,8 @@ def consume_clear_if_needed():
     except Exception:
         has_clear = "clear" in st.experimental_get_query_params()
     if has_clear:
-        st.session_state["party_filter"]  = "すべて"
-        st.session_state["policy_filter"] = "すべて"
+        st.session_state["party_filter"]  = ALL
+        st.session_state["policy_filter"] = ALL
         st.session_state["search_input"]  = ""
         st.session_state["selected_id"]   = None
         _set_query_params(view="list"); st.rerun()
@@ -290,6 +125,23 @@ def get_query_params():
         cid  = qp.get("id",[None])[0] if "id" in qp else None
     return view, cid
 
+def get_page_param() -> int:
+    try:
+        raw = st.query_params.get("page","1")
+    except Exception:
+        raw = st.experimental_get_query_params().get("page",["1"])[0]
+    try:
+        return max(1, int(raw))
+    except (TypeError, ValueError):
+        return 1
+
+def nav_to_page(page: int):
+    _set_query_params(view="list", page=page); st.rerun()
+
+def nav_to_list():
+    """一覧へ戻る（nav_to で URL の page は消えるので、最後に見ていたページはセッションから）。"""
+    nav_to_page(st.session_state.get("list_page", 1))
+
 def nav_to(view: str, cid: int | None = None):
     try:
         st.query_params.clear(); st.query_params["view"] = view
@@ -299,213 +151,154 @@ def nav_to(view: str, cid: int | None = None):
         else: st.experimental_set_query_params(view=view)
     st.rerun()
 
-def get_party_icon(party: str, fallback: str | None) -> str:
-    return fallback or PARTY_ICON_DEFAULT.get(party, "🏛️")
-
 # --------------------------------
 # フィルタ・検索
 # --------------------------------
-if "party_filter" not in st.session_state:  st.session_state.party_filter  = "すべて"
-if "policy_filter" not in st.session_state: st.session_state.policy_filter = "すべて"
+if "party_filter" not in st.session_state:  st.session_state.party_filter  = ALL
+if "policy_filter" not in st.session_state: st.session_state.policy_filter = ALL
 if "search_input" not in st.session_state:  st.session_state.search_input  = ""
 
-def apply_filters(data: List[Dict[str, Any]], party: str, policy: str, search: str) -> List[Dict[str, Any]]:
-    search = (search or "").strip()
-    out = []
-    for c in data:
-        ok_party  = (party == "すべて") or (c.get("party") == party)
-        ok_policy = (policy == "すべて") or (c.get("keyPolicy") == policy)
-        ok_search = (not search) or (search in c.get("name",""))
-        if ok_party and ok_policy and ok_search: out.append(c)
-    return out
-
 # --------------------------------
 # コンポーネント描画
 # --------------------------------
 def render_header():
-    if REGION:
-        note = f"<span class='region-note'>※表記差 {REGION_OTHERS} 件</span>" if REGION_OTHERS>0 else ""
-        region_badge = f"<span class='region-badge'>🗺 {html.escape(REGION)}{note}</span>"
-    else:
-        region_badge = ""
-    st.markdown(dedent(f"""
-    <div class="app-header">
-      <div class="header-row">
-        <div class="header-left"></div>
-        <div class="header-center">
-          <h1>選挙候補者情報システム</h1>
-          <p class="subtitle">候補者の公約・政策を確認して、あなたの一票を決めましょう</p>
-        </div>
-        <div class="header-right">{region_badge}</div>
-      </div>
-    </div>
-    """), unsafe_allow_html=True)
-
-def candidate_card_html(c: Dict[str, Any]) -> str:
-    party = c.get("party","無所属")
-    photo_class = f"photo-{party}"
-    party_class = f"party-{party}"
-    name = c.get("name","")
-    key_policy = c.get("keyPolicy","")
-    brief = c.get("brief","")
-    party_icon = get_party_icon(party, c.get("partyIcon"))
-    photo_uri = _photo_uri_for(c)
-    photo_html = f'<img src="{photo_uri}" alt="{html.escape(name)}">' if photo_uri else html.escape(c.get("initial",""))
-
-    tags = []
-    if key_policy: tags.append(f'<span class="tag">🎯 {html.escape(key_policy)}</span>')
-    tags_html = "".join(tags)
-
-    return f"""
-    <div class="candidate-card">
-      <div class="candidate-photo {photo_class}">{photo_html}</div>
-      <div class="candidate-name">{html.escape(name)}</div>
-      <div class="candidate-tags">{tags_html}</div>
-      <div class="candidate-party {party_class}">
-        <span class="party-icon">{party_icon}</span>{html.escape(party)}
-      </div>
-      <div class="candidate-brief">{html.escape(brief)}</div>
-    </div>
-    """
-
-def detail_html(c: Dict[str, Any]) -> str:
-    party = c.get("party","無所属")
-    photo_class = f"photo-{party}"
-    party_class = f"party-{party}"
-    key_policy = c.get("keyPolicy","")
-    brief = c.get("brief","")
-    party_icon = get_party_icon(party, c.get("partyIcon"))
-    initial = c.get("initial","")
-    name = c.get("name","")
-    career = c.get("career","")
-    photo_uri = _photo_uri_for(c)
-    photo_html = f'<img src="{photo_uri}" alt="{html.escape(name)}">' if photo_uri else html.escape(initial)
-
-    # 公約: promise1..N を数字順に
-    promises = []
-    for k, v in c.items():
-        if k.startswith("promise") and v:
-            m = re.findall(r"\d+", k); num = int(m[0]) if m else 0
-            promises.append((num, v))
-    promises.sort(key=lambda t: t[0])
-    manifesto_items = "\n".join([f"<li>{html.escape(v)}</li>" for _, v in promises])
-
-    # 主なスタンス
-    comparisons = c.get("comparisons", {}) or {}
-    comparisons_html = ""
-    if comparisons:
-        def _order_key(topic: str) -> int:
-            try: return TOPIC_ORDER.index(topic)
-            except ValueError: return len(TOPIC_ORDER) + 1
-
-        rows = []
-        for topic, raw in sorted(comparisons.items(), key=lambda kv: _order_key(kv[0])):
-            stance = _normalize_stance(raw)
-            m = STANCE_META.get(stance, STANCE_META["未回答"])
-            badge_class = m.get("class","unknown")
-            badge_icon  = m.get("icon","❓")
-            badge_desc  = html.escape(m.get("desc",""), quote=True)
-            t = html.escape(topic); s = html.escape(stance)
-            rows.append(
-                f'<tr><th class="stance-topic">{t}</th>'
-                f'<td class="stance-value"><span class="stance-badge {badge_class}" title="{badge_desc}">{badge_icon} {s}</span></td></tr>'
-            )
-        legend = ' '.join([
-            '<span class="stance-badge pro">✅ 賛成</span>',
-            '<span class="stance-badge partial1">⚖️ 一部賛成</span>',
-            '<span class="stance-badge neutral">➖ 中立</span>',
-            '<span class="stance-badge partial2">🤷‍♀️ 一部反対</span>',
-            '<span class="stance-badge con">❌ 反対</span>',
-            '<span class="stance-badge unknown">❓ 未回答</span>',
-        ])
-        comparisons_html = dedent(f"""
-        <div class="section">
-          <div class="section-title">📌 主なスタンス</div>
-          <div class="stance-legend">{legend}</div>
-          <table class="stance-table" aria-label="政策ごとの賛否一覧">
-            <tbody>
-              {'\n'.join(rows)}
-            </tbody>
-          </table>
-        </div>
-        """).strip()
-
-    return dedent(f"""
-    <div class="detail-card">
-      <div class="detail-header">
-        <div class="modal-photo {photo_class}">{photo_html}</div>
-        <h2 style="margin:0 0 8px 0;">{html.escape(name)}</h2>
-        <div class="candidate-party {party_class}" style="display:inline-block;">
-          <span class="party-icon">{party_icon}</span>{html.escape(party)}
-        </div>
-      </div>
-      <div class="section">
-        <div class="section-title">📋 主な公約</div>
-        <ul class="manifesto-list">{manifesto_items}</ul>
-      </div>
-      <div class="section">
-        <div class="section-title">💼 経歴・実績</div>
-        <div style="line-height:1.8; color:#555;">{html.escape(career)}</div>
-      </div>
-      {comparisons_html}
-      <div class="section">
-        <div class="section-title">🎯 重点政策</div>
-        <p style="margin:0; font-weight:bold;">分野：{html.escape(key_policy)}</p>
-        <div style="line-height:1.8; color:#555;">{html.escape(brief)}</div>
-      </div>
-    </div>
-    """).strip()
+    with PROF.phase("header"):
+        _html(render.header_html(REGION, REGION_OTHERS))
+
+# --------------------------------
+# 描画キャッシュ（候補者ID × 内容ハッシュ × アセット版）
+# データ版はキーに入れない: 再読み込みで中身が変わった候補者だけハッシュが変わって引き直しになり、
+# 使われなくなった古い HTML は LRU で押し出される
+# --------------------------------
+RENDER_CACHE_SIZE = int(os.environ.get("RENDER_CACHE_SIZE", "4096"))
+
+@st.cache_resource(show_spinner=False)
+def _render_cache() -> RenderCache:
+    return RenderCache(RENDER_CACHE_SIZE)
+
+@st.cache_resource(show_spinner=False)
+def _asset_version() -> str:
+    """画像の渡し方・サムネイル・スプライト・党アイコンが変わると変わる版番号。"""
+    parts = [render.IMAGE_MODE, assets.ASSET_BASE_URL, repr(sorted(PARTY_ICONS.items())), repr(render._sprite())]
+    for fn, variants in sorted(render._thumb_index().items()):
+        for ext, by_size in sorted(variants.items()):
+            parts += [f"{p}:{os.path.getmtime(p)}" for _, p in sorted(by_size.items())]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:12]
+
+def _cached_html(kind: str, c: Dict[str, Any], build) -> str:
+    cid = c.get("id")
+    digest = REPO.digest(c)
+    built = []
+    with PROF.phase(f"{kind}_html"):
+        out = _render_cache().get_or_build((kind, cid, digest, _asset_version()),
+                                           lambda: built.append(1) or build(c, REPO.photo(c)))
+    PROF.count(f"{kind}_cache_{'miss' if built else 'hit'}")
+    return out
+
+def cached_card_html(c: Dict[str, Any]) -> str:
+    return _cached_html("card", c, render.candidate_card_html)
+
+def cached_detail_html(c: Dict[str, Any]) -> str:
+    return _cached_html("detail", c, render.detail_html)
 
 # --------------------------------
 # 一覧ページ
 # --------------------------------
-def render_list_page():
-    render_header()
-    consume_clear_if_needed()
+# 1 ページのカード数（4 列グリッドなので 4 の倍数がおすすめ）
+PAGE_SIZE = max(1, int(os.environ.get("PAGE_SIZE", "20")))
+
+def render_pager(page: int, n_pages: int, start: int, n_shown: int, total: int):
+    pc1, pc2, pc3 = st.columns([1, 2, 1])
+    with pc1:
+        if st.button("← 前へ", key="page_prev", disabled=page <= 1, use_container_width=True):
+            nav_to_page(page - 1)
+    with pc2:
+        _html(
+            f"<div style='text-align:center; color:#666; padding-top:6px;'>"
+            f"{start + 1:,}–{start + n_shown:,} 件目 / 全 {total:,} 件（{page} / {n_pages} ページ）</div>"
+        )
+    with pc3:
+        if st.button("次へ →", key="page_next", disabled=page >= n_pages, use_container_width=True):
+            nav_to_page(page + 1)
+
+def render_card_grid(items: List[Dict[str, Any]], key_prefix: str, label: str, n_cols: int = 4):
+    # カードの HTML（キャッシュ）と、ウィジェット（columns / markdown / button）の時間を分けて測る
+    cols = st.columns(n_cols, gap="large")
+    for idx, c in enumerate(items):
+        html_ = cached_card_html(c)
+        with PROF.phase("widgets"), cols[idx % len(cols)]:
+            _html(html_)
+            if st.button(label, key=f"{key_prefix}_{c['id']}", use_container_width=True):
+                nav_to("detail", c["id"])
 
-    # データ駆動のフィルタ
+def render_filters(party_counts: Dict[str, int], policy_counts: Dict[str, int]):
     fc1, fc2, fc3, fc4 = st.columns([1, 1, 2, 1])
     with fc1:
-        party_options = ["すべて"] + sorted({c.get("party","無所属") for c in CANDIDATES})
-        st.selectbox("政党", options=party_options, key="party_filter")
+        party_options = [ALL, *REPO.options("party")]
+        st.selectbox("政党", options=party_options, key="party_filter",
+                     format_func=lambda v: f"{v} ({party_counts.get(v, 0):,})")
     with fc2:
-        policy_options = ["すべて"] + sorted({c.get("keyPolicy","") for c in CANDIDATES if c.get("keyPolicy")})
-        st.selectbox("政策テーマ", options=policy_options, key="policy_filter")
+        policy_options = [ALL, *REPO.options("keyPolicy")]
+        st.selectbox("政策テーマ", options=policy_options, key="policy_filter",
+                     format_func=lambda v: f"{v} ({policy_counts.get(v, 0):,})")
     with fc3:
-        st.text_input("候補者名で検索", key="search_input", placeholder="例：田中 / 佐藤 など")
+        st.text_input("候補者を検索", key="search_input", placeholder="例：田中 / 自民 / 子育て / 東京1区 など")
     with fc4:
         if st.button("🧹 すべてクリア", use_container_width=True):
             nav_to_list_clear()
 
     # アクティブフィルタ（チップ）
     chips = []
-    if st.session_state.party_filter != "すべて":
+    if st.session_state.party_filter != ALL:
         chips.append(f"<span class='chip'>政党：{html.escape(st.session_state.party_filter)}</span>")
-    if st.session_state.policy_filter != "すべて":
+    if st.session_state.policy_filter != ALL:
         chips.append(f"<span class='chip'>政策：{html.escape(st.session_state.policy_filter)}</span>")
     if st.session_state.search_input.strip():
         chips.append(f"<span class='chip'>検索：『{html.escape(st.session_state.search_input.strip())}』</span>")
     if chips:
-        st.markdown("<div class='chips'><span class='chip-label'>現在の条件：</span>" + "".join(chips) + "</div>", unsafe_allow_html=True)
+        _html("<div class='chips'><span class='chip-label'>現在の条件：</span>" + "".join(chips) + "</div>")
+
+def render_list_page():
+    render_header()
+    consume_clear_if_needed()
+
+    # データ駆動のフィルタ（件数はビットマップから）
+    with PROF.phase("facets"):
+        party_counts, policy_counts = REPO.facet_counts(
+            st.session_state.party_filter, st.session_state.policy_filter, st.session_state.search_input)
+    with PROF.phase("widgets"):
+        render_filters(party_counts, policy_counts)
 
     st.divider()
 
-    # グリッド
-    items = apply_filters(CANDIDATES, st.session_state.party_filter, st.session_state.policy_filter, st.session_state.search_input)
-    if not items:
+    # ページング: 表示中のページ分だけ取り出して描画する（ウィジェット数は PAGE_SIZE で頭打ち）
+    page = get_page_param()
+    sig = (st.session_state.party_filter, st.session_state.policy_filter, st.session_state.search_input.strip())
+    if st.session_state.get("filter_sig", sig) != sig and page != 1:
+        page = 1; st.query_params["page"] = "1"   # 条件が変わったら先頭へ
+    st.session_state.filter_sig = sig
+    with PROF.phase("query"):
+        total, page_items = REPO.query(*sig, offset=(page - 1) * PAGE_SIZE, limit=PAGE_SIZE)
+    if not total:
         st.info("該当する候補者が見つかりません。条件を調整してください。")
         return
-
-    N_COLS = 4
-    cols = st.columns(N_COLS, gap="large")
-    for idx, c in enumerate(items):
-        col = cols[idx % N_COLS]
-        with col:
-            st.markdown(candidate_card_html(c), unsafe_allow_html=True)
-            if st.button("詳細を見る ➜", key=f"goto_{c['id']}", use_container_width=True):
-                nav_to("detail", c["id"])
-    if st.button("比較する", key="go_compare", use_container_width=True):
-        nav_to("compare")
+    n_pages = max(1, -(-total // PAGE_SIZE))
+    if page > n_pages:
+        page = n_pages
+        with PROF.phase("query"):
+            total, page_items = REPO.query(*sig, offset=(page - 1) * PAGE_SIZE, limit=PAGE_SIZE)
+    start = (page - 1) * PAGE_SIZE
+    st.session_state.list_page = page
+
+    render_card_grid(page_items, "goto", "詳細を見る ➜")
+
+    with PROF.phase("widgets"):
+        if n_pages > 1:
+            render_pager(page, n_pages, start, len(page_items), total)
+        if st.button("比較する", key="go_compare", use_container_width=True):
+            nav_to("compare")
+        if st.button("🧭 相性診断（争点に答えて近い候補者を探す）", key="go_match", use_container_width=True):
+            nav_to("match")
 
 # --------------------------------
 # 詳細ページ
@@ -516,35 +309,24 @@ def render_detail_page(cid_str: str | None):
     bc1, bc2 = st.columns([1, 6])
     with bc1:
         if st.button("← 一覧へ戻る", use_container_width=True):
-            _set_query_params(view="list"); st.rerun()
+            nav_to_list()
     with bc2:
         if st.button("🧹 すべてクリア", use_container_width=True):
             nav_to_list_clear()
 
-    candidate = None
-    try:
-        cid = int(cid_str) if cid_str is not None else None
-    except ValueError:
-        cid = None
-    if cid is not None:
-        for c in CANDIDATES:
-            if c["id"] == cid:
-                candidate = c; break
+    with PROF.phase("query"):
+        candidate = REPO.get(cid_str)
     if not candidate:
         st.warning("対象の候補者が見つかりません。")
         return
 
-    st.markdown(detail_html(candidate), unsafe_allow_html=True)
+    _html(cached_detail_html(candidate))
 
-    same_party = [c for c in CANDIDATES if c.get("party")==candidate.get("party") and c["id"]!=candidate["id"]]
+    with PROF.phase("query"):
+        same_party = REPO.same_party(candidate)
     if same_party:
         st.markdown("#### 同じ政党の候補者")
-        cols = st.columns(min(4, len(same_party)), gap="large")
-        for i, c in enumerate(same_party):
-            with cols[i % len(cols)]:
-                st.markdown(candidate_card_html(c), unsafe_allow_html=True)
-                if st.button("この候補を見る ➜", key=f"goto_same_{c['id']}", use_container_width=True):
-                    nav_to("detail", c["id"])
+        render_card_grid(same_party, "goto_same", "この候補を見る ➜", n_cols=min(4, len(same_party)))
 
 # --------------------------------
 # 比較ページ（簡易表）
@@ -553,80 +335,113 @@ def render_compare_page():
     render_header()
     st.subheader("候補者ごとの比較表")
 
-    labels = [f"{c.get('name','')}（{c.get('party','無所属')}）" for c in CANDIDATES]
-    label_to_obj = {labels[i]: CANDIDATES[i] for i in range(len(CANDIDATES))}
-
-    selected = st.multiselect("比較したい候補者", options=labels, default=[])
+    with PROF.phase("query"):
+        label_to_id = REPO.label_to_id()
+    selected = st.multiselect("比較したい候補者", options=list(label_to_id), default=[])
 
     if st.button("← 一覧へ戻る", use_container_width=True):
-        _set_query_params(view="list"); st.rerun()
+        nav_to_list()
 
     if not selected:
         st.info("候補者を1人以上選んでね。")
         return
-
     show_comparisons = st.checkbox("争点", value=True)
     show_promises    = st.checkbox("行いたい政策", value=False)
     show_career      = st.checkbox("基本情報", value=False)
 
-    rows = []
-
-    if show_career:
-        row = {"項目": "年齢"}
-        for label in selected: row[label] = label_to_obj[label].get("age","") or ""
-        rows.append(row)
-
-        row = {"項目": "経歴"}
-        for label in selected: row[label] = label_to_obj[label].get("career","") or ""
-        rows.append(row)
-
-    if show_promises:
-        row = {"項目": "重点政策"}
-        for label in selected: row[label] = label_to_obj[label].get("keyPolicy","") or ""
-        rows.append(row)
-
-        row = {"項目": "政策説明"}
-        for label in selected: row[label] = label_to_obj[label].get("brief","") or ""
-        rows.append(row)
-
-        PROMISE_MAX = 4
-        for i in range(1, PROMISE_MAX + 1):
-            key = f"promise{i}"
-            row = {"項目": f"📋 公約{i}"}
-            for label in selected: row[label] = label_to_obj[label].get(key,"") or ""
-            rows.append(row)
-
-    if show_comparisons:
-        topics, seen = [], set()
-        for label in selected:
-            for t in (label_to_obj[label].get("comparisons") or {}).keys():
-                if t not in seen: seen.add(t); topics.append(t)
-        for t in topics:
-            row = {"項目": f"⚖️ {t}"}
-            for label in selected:
-                stance = (label_to_obj[label].get("comparisons") or {}).get(t,"")
-                row[label] = stance
-            rows.append(row)
-
-    if not rows:
+    # 列指向ストアから選んだ行・列を切り出して転置するだけ
+    ids = [label_to_id[lb] for lb in selected]
+    with PROF.phase("compare_table"):
+        df = compare_table(REPO.compare_frame(ids), ids, selected,
+                           career=show_career, promises=show_promises, comparisons=show_comparisons)
+
+    if df.empty:
         st.info("上のチェックボックスで出したい“かたまり”を選んでね。")
         return
 
-    df = pd.DataFrame(rows)
-    st.dataframe(df, use_container_width=True)
+    with PROF.phase("widgets"):
+        st.dataframe(df, use_container_width=True)
+    if PROF.enabled: PROF.add_bytes(int(df.memory_usage(deep=True).sum()))   # 表は HTML ではないので概算
+
+# --------------------------------
+# 相性診断ページ（スタンス一致度）
+# --------------------------------
+MATCH_SKIP = "答えない"
+MATCH_CHOICES = [MATCH_SKIP, *STANCE_SCORE]   # 答えない / 賛成 / 一部賛成 / 中立 / 一部反対 / 反対
+
+def render_match_page():
+    render_header()
+    st.subheader("🧭 あなたに近い候補者")
+
+    if st.button("← 一覧へ戻る", use_container_width=True):
+        nav_to_list()
+
+    answers = {}
+    for topic in TOPIC_ORDER:
+        v = st.radio(topic, MATCH_CHOICES, horizontal=True, key=f"match_{topic}")
+        if v != MATCH_SKIP: answers[topic] = STANCE_SCORE[v]
+
+    if not answers:
+        st.info("争点に1つ以上答えてね。")
+        return
+
+    with PROF.phase("query"):
+        results = match_rank(REPO.stance_matrix(), answers, limit=PAGE_SIZE)
+    if not results:
+        st.info("比べられる候補者が見つかりません。")
+        return
+
+    st.divider()
+    N_COLS = 4
+    cols = st.columns(N_COLS, gap="large")
+    records = REPO.get_many([cid for cid, _, _ in results])
+    for idx, (c, (cid, score, n_topics)) in enumerate(zip(records, results)):
+        html_ = cached_card_html(c)
+        with PROF.phase("widgets"), cols[idx % N_COLS]:
+            _html(f"<div class='match-score'>一致度 {score:.0f}%（{n_topics} 争点）</div>")
+            _html(html_)
+            if st.button("詳細を見る ➜", key=f"goto_match_{cid}", use_container_width=True):
+                nav_to("detail", cid)
 
 # --------------------------------
 # ルーティング
 # --------------------------------
 view, cid = get_query_params()
+PROF.context.update(view=view, data_version=SNAPSHOT.version)
 enter_class = "enter-right" if view == "detail" else "enter-left"
-st.markdown(f"<div class='page {enter_class}'>", unsafe_allow_html=True)
-
-if view == "detail":
-    render_detail_page(cid)
-elif view == "compare":
-    render_compare_page()
-else:
-    render_list_page()
-
-st.markdown("</div>", unsafe_allow_html=True)
+_html(f"<div class='page {enter_class}'>")
+
+try:
+    if view == "detail":
+        render_detail_page(cid)
+    elif view == "compare":
+        render_compare_page()
+    elif view == "match":
+        render_match_page()
+    else:
+        render_list_page()
+
+    _html("</div>")
+
+    # フッター: いま表示しているデータの版
+    _store = _snapshot_store(CANDIDATES_DB, CANDIDATES_PATH, CANDIDATES_CATALOG)
+    _html(f"<div class='data-footer'>データ版 {SNAPSHOT.version} · {SNAPSHOT.loaded_at:%Y-%m-%d %H:%M:%S} 更新</div>")
+    if _store.last_error:
+        st.caption(f"⚠️ 最新のデータを読み込めなかったため、前の版を表示しています（{_store.last_error}）")
+finally:
+    # ボタンで st.rerun() した再実行もここでログに残る（パネルは描けないのでログだけ）
+    if PROF.enabled:
+        _uri = render._data_uri_from_file.cache_info()
+        PROF.count("data_uri_hit", _uri.hits - _URI_CACHE0.hits)
+        PROF.count("data_uri_miss", _uri.misses - _URI_CACHE0.misses)
+        PROF.log()
+
+# 計測パネル（この再実行の内訳。ログと同じ中身）
+if PROF.enabled:
+    _rec = PROF.record()
+    with st.expander(f"⏱ 計測: {_rec['total_ms']:.0f} ms · {_rec['bytes_sent']:,} バイト", expanded=False):
+        _phases = pd.Series(_rec["phases_ms"], name="ms").sort_values(ascending=False)
+        st.dataframe(_phases.to_frame().assign(割合=lambda d: (d["ms"] / _rec["total_ms"] * 100).round(1)),
+                     use_container_width=True)
+        st.caption("widgets は Streamlit の部品づくり（columns / markdown / button）、*_html はカード・詳細の HTML 組み立て")
+        st.json({"counters": _rec["counters"], "view": view, "data_version": SNAPSHOT.version}, expanded=False)